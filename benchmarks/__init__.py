@@ -0,0 +1 @@
+"""Benchmarks for the HouseCanary API client."""
@@ -0,0 +1,110 @@
+"""
+Size and speed of the cache entry formats of the Redis cache backend.
+
+For a single component result and a result with many components, reports
+the bytes per entry, the time to encode an entry and the time of a cache hit:
+decoding an entry and building the Property objects from it. The formats are
+the plain json the backend used to store, the EntryCodec json and zlib formats,
+and msgpack and zstd if the msgpack and zstandard packages are installed.
+
+Run with `python -m benchmarks.bench_cache`.
+
+Usage: benchmarks.bench_cache [-n NUMBER] [-r REPEAT]
+
+Options:
+    -n NUMBER --number=NUMBER   Entries per timing run. Default is 2000.
+    -r REPEAT --repeat=REPEAT   Timing runs per benchmark, the best is reported. Default is 5.
+    -h --help                   Show usage
+"""
+
+from __future__ import print_function
+import json
+import timeit
+
+from docopt import docopt
+
+from benchmarks.mock_server import build_body
+
+IDENTIFIER = {'address': '43 Valmonte Plz', 'zipcode': '90274'}
+COMPONENTS = ['property/value', 'property/details', 'property/sales_history',
+              'property/value_forecast', 'property/census', 'property/flood',
+              'property/school', 'property/zip_details', 'property/zip_hpi_historical']
+
+
+class PlainJsonCodec(object):
+    """The json of [stored_at, value] the Redis cache backend used to store."""
+
+    @staticmethod
+    def encode(entry):
+        return json.dumps([entry.stored_at, entry.value], separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def decode(data):
+        from housecanary.cache import CacheEntry
+        stored_at, value = json.loads(data.decode('utf-8'))
+        return CacheEntry(value, stored_at)
+
+
+def get_codecs():
+    from housecanary.serialization import EntryCodec, _import_msgpack, _import_zstandard
+
+    codecs = [('plain json', PlainJsonCodec()),
+              ('json', EntryCodec('json')),
+              ('json + zlib', EntryCodec('json', 'zlib'))]
+    if _import_zstandard() is not None:
+        codecs.append(('json + zstd', EntryCodec('json', 'zstd')))
+    if _import_msgpack() is not None:
+        codecs.append(('msgpack', EntryCodec('msgpack')))
+        codecs.append(('msgpack + zlib', EntryCodec('msgpack', 'zlib')))
+        if _import_zstandard() is not None:
+            codecs.append(('msgpack + zstd', EntryCodec('msgpack', 'zstd')))
+    return codecs
+
+
+def get_payloads():
+    return [
+        ('property/value', build_body('property', 'value', [IDENTIFIER], {})[0]),
+        ('{} components'.format(len(COMPONENTS)),
+         build_body('property', 'component_mget', [IDENTIFIER],
+                    {'components': ','.join(COMPONENTS)})[0]),
+    ]
+
+
+def get_benchmarks(codec, payload, number):
+    from housecanary.cache import CacheEntry
+    from housecanary.response import Response
+
+    entry = CacheEntry(payload, 1500000000.0)
+    data = codec.encode(entry)
+
+    def encode():
+        for _ in range(number):
+            codec.encode(entry)
+
+    def hit():
+        for _ in range(number):
+            value = codec.decode(data).value
+            Response.create('property/value', [value], None).objects()
+
+    return len(data), encode, hit
+
+
+def main():
+    args = docopt(__doc__)
+    number = int(args['--number'] or 2000)
+    repeat = int(args['--repeat'] or 5)
+
+    print('{:<16} {:<16} {:>10} {:>14} {:>12}'.format(
+        'payload', 'format', 'bytes', 'us per encode', 'us per hit'))
+    for payload_name, payload in get_payloads():
+        for codec_name, codec in get_codecs():
+            size, encode, hit = get_benchmarks(codec, payload, number)
+            encode_time = min(timeit.repeat(encode, number=1, repeat=repeat))
+            hit_time = min(timeit.repeat(hit, number=1, repeat=repeat))
+            print('{:<16} {:<16} {:>10} {:>14.2f} {:>12.2f}'.format(
+                payload_name, codec_name, size, encode_time * 1e6 / number,
+                hit_time * 1e6 / number))
+
+
+if __name__ == '__main__':
+    main()
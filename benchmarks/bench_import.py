@@ -0,0 +1,55 @@
+"""
+Measures the cold import time of the housecanary package.
+
+Each sample imports the package in a fresh interpreter with `-X importtime`
+and reads the cumulative time of the top level module. Exits with status 1
+if the median exceeds the given budget, so it can be used as a CI gate.
+
+Run with `python -m benchmarks.bench_import`.
+
+Usage: benchmarks.bench_import [<module>] [-n SAMPLES] [-b BUDGET]
+
+Options:
+    <module>                        The import to time. Default is "housecanary".
+    -n SAMPLES --samples=SAMPLES    Number of fresh interpreters to sample. Default is 10.
+    -b BUDGET --budget=BUDGET       Optional. Fail if the median import time in ms exceeds this.
+    -h --help                       Show usage
+"""
+
+from __future__ import print_function
+import subprocess
+import sys
+
+from docopt import docopt
+
+
+def import_time_ms(module):
+    """Returns the cumulative import time in ms of module in a fresh interpreter."""
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        stderr=subprocess.STDOUT).decode('utf-8')
+
+    for line in output.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000.0
+
+    raise RuntimeError('Could not find import time of {}'.format(module))
+
+
+def main():
+    args = docopt(__doc__)
+    module = args['<module>'] or 'housecanary'
+    samples = sorted(import_time_ms(module) for _ in range(int(args['--samples'] or 10)))
+    median = samples[len(samples) // 2]
+
+    print('import {}: median {:.1f} ms, min {:.1f} ms, max {:.1f} ms'.format(
+        module, median, samples[0], samples[-1]))
+
+    if args['--budget'] and median > float(args['--budget']):
+        print('Import time exceeds the budget of {} ms'.format(args['--budget']))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Microbenchmarks of object construction and identifier conversion.
+
+Only public APIs are used, so the same script can be run against two checkouts
+to compare before and after a change.
+
+Run with `python -m benchmarks.bench_objects`.
+
+Usage: benchmarks.bench_objects [-n NUMBER] [-r REPEAT]
+
+Options:
+    -n NUMBER --number=NUMBER   Items per timing run. Default is 10000.
+    -r REPEAT --repeat=REPEAT   Timing runs per benchmark, the best is reported. Default is 5.
+    -h --help                   Show usage
+"""
+
+from __future__ import print_function
+import subprocess
+import sys
+import timeit
+
+from docopt import docopt
+
+
+def _property_json(idx):
+    return {
+        'property/value': {'api_code_description': 'ok', 'api_code': 0,
+                           'result': {'value': {'price_mean': 1000 + idx}}},
+        'address_info': {
+            'city': 'Palos Verdes Estates', 'county_fips': '06037', 'geo_precision': 'rooftop',
+            'block_id': '060376703241005', 'zipcode': '90274',
+            'address_full': '43 Valmonte Plz Palos Verdes Estates CA 90274',
+            'state': 'CA', 'zipcode_plus4': '1444', 'address': '{} Valmonte Plz'.format(idx),
+            'lat': 33.79814, 'lng': -118.36455, 'slug': 'slug-{}'.format(idx), 'unit': None
+        },
+        'meta': 'meta {}'.format(idx)
+    }
+
+
+def get_benchmarks(number):
+    from housecanary.apiclient import ApiClient
+    from housecanary.object import Property
+    from housecanary.response import Response
+
+    client = ApiClient('key', 'secret')
+    tuples = [('{} Main St'.format(idx), '01960') for idx in range(number)]
+    dicts = [{'address': '{} Main St'.format(idx), 'zipcode': '01960', 'meta': str(idx)}
+             for idx in range(number)]
+    slugs = ['{}-Main-St-Peabody-MA-01960'.format(idx) for idx in range(number)]
+    blocks = ['0603767032410{:02d}'.format(idx % 100) for idx in range(number)]
+    body = [_property_json(idx) for idx in range(number)]
+    columns = {'address': [d['address'] for d in dicts], 'zipcode': [d['zipcode'] for d in dicts],
+               'meta': [d['meta'] for d in dicts]}
+
+    return [
+        ('Property(address, zipcode)',
+         lambda: [Property(address, zipcode) for address, zipcode in tuples]),
+        ('Property.create_from_json', lambda: [Property.create_from_json(j) for j in body]),
+        ('Response.objects()', lambda: Response.create('property/value', body, None).objects()),
+        ('get_identifier_input(tuples)', lambda: client.property.get_identifier_input(tuples)),
+        ('get_identifier_input(dicts)', lambda: client.property.get_identifier_input(dicts)),
+        ('convert_identifier_columns',
+         lambda: client.property.convert_identifier_columns(columns)),
+        ('get_identifier_input(slugs)', lambda: client.property.get_identifier_input(slugs)),
+        ('block get_identifier_input', lambda: client.block.get_identifier_input(blocks)),
+    ]
+
+
+def import_time_ms(module):
+    output = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        stderr=subprocess.STDOUT).decode('utf-8')
+    for line in output.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000.0
+    return None
+
+
+def main():
+    args = docopt(__doc__)
+    number = int(args['--number'] or 10000)
+    repeat = int(args['--repeat'] or 5)
+
+    print('{:<32} {:>12} {:>14}'.format('benchmark', 'best ms', 'ns per item'))
+    for name, func in get_benchmarks(number):
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print('{:<32} {:>12.2f} {:>14.0f}'.format(name, best * 1000, best * 1e9 / number))
+
+    module = 'housecanary.authentication'
+    print('{:<32} {:>12.2f}'.format('import ' + module, import_time_ms(module) or 0))
+    loaded_future = subprocess.check_output(
+        [sys.executable, '-c', 'import housecanary.apiclient, housecanary.authentication, sys;'
+         'print("future" in sys.modules)']).decode('utf-8').strip()
+    print('{:<32} {:>12}'.format('future imported', loaded_future))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Throughput of HCAuthV1 request signing.
+
+Compares signing a prepared request through the requests auth hook (which
+re-parses the url) with `HCAuthV1.sign_url`, and measures signed GET requests
+per second against the local mock server.
+
+Run with `python -m benchmarks.bench_signing`.
+
+Usage: benchmarks.bench_signing [-n NUMBER] [-r REPEAT] [-c CALLS]
+
+Options:
+    -n NUMBER --number=NUMBER   Signatures per timing run. Default is 20000.
+    -r REPEAT --repeat=REPEAT   Timing runs per benchmark, the best is reported. Default is 5.
+    -c CALLS --calls=CALLS      Signed requests sent to the mock server. Default is 500.
+    -h --help                   Show usage
+"""
+
+from __future__ import print_function
+import time
+import timeit
+
+from docopt import docopt
+
+from benchmarks.mock_server import MockServer
+
+PARAMS = {'address': '43 Valmonte Plz', 'zipcode': '90274'}
+
+
+def get_benchmarks(number):
+    import requests
+    from housecanary.authentication import HCAuthV1
+
+    auth = HCAuthV1('my_key', 'my_secret')
+    url = 'https://api.housecanary.com/v2/property/value'
+    prepared = requests.Request('GET', url, params=PARAMS).prepare()
+    body = b'[' + b','.join([b'{"address": "43 Valmonte Plz", "zipcode": "90274"}'] * 100) + b']'
+
+    def sign_prepared():
+        for _ in range(number):
+            auth(prepared.copy())
+
+    def sign_url():
+        for _ in range(number):
+            auth.sign_url('GET', url, PARAMS)
+
+    def sign_post_body():
+        for _ in range(number):
+            auth.sign_url('POST', url, None, body)
+
+    return [
+        ('auth hook on prepared request', sign_prepared),
+        ('sign_url', sign_url),
+        ('sign_url with 100 item body', sign_post_body),
+    ]
+
+
+def requests_per_second(calls):
+    from housecanary.authentication import HCAuthV1
+    from housecanary.requestclient import RequestClient
+
+    client = RequestClient(authenticator=HCAuthV1('my_key', 'my_secret'))
+    with MockServer() as server:
+        url = server.url + '/v2/property/value'
+        client.get(url, PARAMS)
+        start = time.time()
+        for _ in range(calls):
+            client.get(url, PARAMS)
+        return calls / (time.time() - start)
+
+
+def main():
+    args = docopt(__doc__)
+    number = int(args['--number'] or 20000)
+    repeat = int(args['--repeat'] or 5)
+    calls = int(args['--calls'] or 500)
+
+    print('{:<32} {:>12} {:>14}'.format('benchmark', 'signs/sec', 'us per sign'))
+    for name, func in get_benchmarks(number):
+        best = min(timeit.repeat(func, number=1, repeat=repeat))
+        print('{:<32} {:>12.0f} {:>14.2f}'.format(name, number / best, best * 1e6 / number))
+
+    print('{:<32} {:>12.0f}'.format('signed GET req/sec', requests_per_second(calls)))
+
+
+if __name__ == '__main__':
+    main()
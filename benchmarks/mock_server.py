@@ -0,0 +1,355 @@
+"""
+A local mock of the HouseCanary API for benchmarking the client.
+
+It emulates the /v2/property/*, /v2/block/*, /v2/zip/* and /v2/msa/* endpoints
+(including component_mget, value_report and rental_report) with realistically
+sized payloads, rate limit headers and configurable latency.
+
+Run with `python -m benchmarks.mock_server`.
+
+Usage: benchmarks.mock_server [-p PORT] [-l LATENCY] [-j JITTER] [-r LIMIT]
+
+Options:
+    -p PORT --port=PORT             Port to listen on. Default is 8765.
+    -l LATENCY --latency=LATENCY    Fixed server latency in milliseconds. Default is 0.
+    -j JITTER --jitter=JITTER       Random extra latency in milliseconds. Default is 0.
+    -r LIMIT --rate-limit=LIMIT     Requests allowed per rate limit period. Default is 1000000.
+"""
+
+from __future__ import print_function
+import io
+import json
+import os
+import random
+import threading
+import time
+import zlib
+
+try:
+    # Python 3
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qsl
+except ImportError:
+    # Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qsl
+
+
+RATE_LIMIT_PERIOD = 60
+
+XLSX_REPORT_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'tests', 'test_files', 'test_excel.xlsx')
+
+INFO_KEYS = {
+    'property': 'address_info',
+    'block': 'block_info',
+    'zip': 'zipcode_info',
+    'msa': 'msa_info',
+}
+
+
+def _months(count, start_year=1976):
+    return ['{}-{:02d}-01'.format(start_year + idx // 12, idx % 12 + 1) for idx in range(count)]
+
+
+def _time_series(rng, count, forecast=False):
+    start_year = 2018 if forecast else 1976
+    return [{'month': month,
+             'value': round(rng.uniform(100000, 900000), 1),
+             'value_sqft': round(rng.uniform(50, 900), 2)}
+            for month in _months(count, start_year)]
+
+
+def _flat(rng, prefix, count):
+    return {'{}_{}'.format(prefix, idx): round(rng.uniform(0, 100000), 3) for idx in range(count)}
+
+
+def _histogram(rng):
+    return [{'bin_min': idx * 1000, 'bin_max': (idx + 1) * 1000,
+             'count': rng.randint(0, 50)} for idx in range(10)]
+
+
+def _school(rng, name):
+    return {'name': name, 'address': '{} School Rd'.format(rng.randint(1, 999)),
+            'zipcode': '{:05d}'.format(rng.randint(1000, 99999)), 'city': 'Springfield',
+            'state': 'CA', 'distance_miles': round(rng.uniform(0, 5), 2),
+            'score': rng.randint(1, 10), 'education_level': ['elementary']}
+
+
+def component_result(component, rng):
+    """Returns a realistically sized result for a component."""
+    name = component.split('/')[1]
+
+    if 'hpi_ts' in name or 'value_ts' in name:
+        if name.endswith('forecast'):
+            return _time_series(rng, 36, forecast=True)
+        return _time_series(rng, 420)
+
+    if 'histogram' in name:
+        return _histogram(rng)
+
+    if name in ('value', 'rental_value'):
+        return {'value': {'price_upr': rng.randint(100000, 2000000),
+                          'price_lwr': rng.randint(100000, 2000000),
+                          'price_mean': rng.randint(100000, 2000000),
+                          'fsd': round(rng.uniform(0, 0.3), 4)}}
+
+    if name == 'value_forecast':
+        return {key: {'value': rng.randint(100000, 2000000)}
+                for key in ('month_03', 'month_06', 'month_12', 'month_18', 'month_24',
+                            'month_30', 'month_36')}
+
+    if name in ('value_within_block', 'rental_value_within_block'):
+        return {key: _flat(rng, 'percentile', 4)
+                for key in ('housecanary_value_percentile_range',
+                            'housecanary_value_sqft_percentile_range',
+                            'client_value_percentile_range',
+                            'client_value_sqft_percentile_range')}
+
+    if name in ('zip_details', 'details') and component.startswith(('property/zip', 'zip/')):
+        return {'multi_family': _flat(rng, 'metric', 6), 'single_family': _flat(rng, 'metric', 6)}
+
+    if name == 'details':
+        return {'property': _flat(rng, 'property', 20), 'assessment': _flat(rng, 'assessment', 12)}
+
+    if name == 'school':
+        return {'school': {level: [_school(rng, '{} {}'.format(level, idx)) for idx in range(3)]
+                           for level in ('elementary', 'middle', 'high')}}
+
+    if name == 'nod':
+        nod = _flat(rng, 'nod', 6)
+        nod['default_history'] = [_flat(rng, 'default', 8) for _ in range(3)]
+        return nod
+
+    if name in ('sales_history', 'ltv_details'):
+        return [_flat(rng, 'event', 10) for _ in range(6)]
+
+    return _flat(rng, name, 12)
+
+
+def identifier_info(level, identifier):
+    """Returns the info dict (such as address_info) echoed back for an identifier."""
+    if level == 'property':
+        info = {'address': identifier.get('address'), 'unit': identifier.get('unit'),
+                'city': identifier.get('city', 'Springfield'),
+                'state': identifier.get('state', 'CA'),
+                'zipcode': identifier.get('zipcode', '90274'), 'zipcode_plus4': '1444',
+                'address_full': identifier.get('address'), 'block_id': '060376703241005',
+                'county_fips': '06037', 'geo_precision': 'rooftop', 'lat': 33.79814,
+                'lng': -118.36455, 'msa': '31080', 'metrodiv': '31084',
+                'slug': identifier.get('slug', 'mock-slug')}
+        return info
+    if level == 'block':
+        return {'block_id': identifier.get('block_id'),
+                'property_type': identifier.get('property_type')}
+    if level == 'zip':
+        return {'zipcode': identifier.get('zipcode')}
+    return {'msa': identifier.get('msa'), 'msa_name': 'Mock MSA'}
+
+
+def build_body(level, endpoint, identifiers, query):
+    """Builds the json body for a request."""
+    if endpoint == 'component_mget':
+        components = [c for c in query.get('components', '').split(',') if c]
+    else:
+        components = ['{}/{}'.format(level, endpoint)]
+
+    body = []
+    for identifier in identifiers:
+        # seed per identifier so results are stable between runs
+        rng = random.Random(json.dumps(identifier, sort_keys=True))
+        item = {INFO_KEYS[level]: identifier_info(level, identifier)}
+        if 'meta' in identifier:
+            item['meta'] = identifier['meta']
+        for component in components:
+            item[component] = {'api_code': 0, 'api_code_description': 'ok',
+                               'result': component_result(component, rng)}
+        body.append(item)
+    return body
+
+
+def decompress_body(body, encoding):
+    """Decodes a request body sent with a Content-Encoding."""
+    if encoding == 'gzip':
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return zlib.decompress(body)
+    if encoding == 'br':
+        import brotli
+        return brotli.decompress(body)
+    return body
+
+
+class MockServerState(object):
+    """Shared configuration and rate limit counters for the mock server."""
+
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit=1000000):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._remaining = rate_limit
+        self._report = None
+
+    def take_rate_limit(self):
+        """Counts a request against the rate limit.
+
+        Returns:
+            (remaining, reset_timestamp) after this request, remaining is -1 if throttled.
+        """
+        with self._lock:
+            self.requests += 1
+            now = time.time()
+            if now - self._window_start >= RATE_LIMIT_PERIOD:
+                self._window_start = now
+                self._remaining = self.rate_limit
+            reset = int(self._window_start + RATE_LIMIT_PERIOD)
+            if self._remaining <= 0:
+                return -1, reset
+            self._remaining -= 1
+            return self._remaining, reset
+
+    @property
+    def report(self):
+        if self._report is None:
+            with io.open(XLSX_REPORT_FILE, 'rb') as report_file:
+                self._report = report_file.read()
+        return self._report
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """Serves the mock HouseCanary API."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._handle(None)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        length = int(self.headers.get('Content-Length') or 0)
+        self._handle(decompress_body(self.rfile.read(length),
+                                     self.headers.get('Content-Encoding')))
+
+    def _handle(self, post_body):
+        state = self.server.state
+
+        delay = state.latency + random.uniform(0, state.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        url = urlparse(self.path)
+        query = dict(parse_qsl(url.query))
+        parts = url.path.strip('/').split('/')
+
+        remaining, reset = state.take_rate_limit()
+        headers = {
+            'X-RateLimit-Limit': str(state.rate_limit),
+            'X-RateLimit-Remaining': str(max(remaining, 0)),
+            'X-RateLimit-Reset': str(reset),
+            'X-RateLimit-Period': str(RATE_LIMIT_PERIOD),
+        }
+
+        if remaining < 0:
+            return self._send(429, 'application/json', headers, json.dumps(
+                {'code': 429, 'code_description': 'Too Many Requests',
+                 'message': 'Rate limit exceeded'}).encode('utf-8'))
+
+        if len(parts) != 3 or parts[1] not in INFO_KEYS:
+            return self._send(404, 'application/json', headers, json.dumps(
+                {'code': 404, 'message': 'Not Found'}).encode('utf-8'))
+
+        level, endpoint = parts[1], parts[2]
+
+        if endpoint in ('value_report', 'rental_report'):
+            if query.get('format') == 'xlsx':
+                return self._send(200, 'application/xlsx', headers, state.report)
+            body = {'address_info': identifier_info('property', query),
+                    'report': component_result('property/details', random.Random(0))}
+            return self._send(200, 'application/json', headers, json.dumps(body).encode('utf-8'))
+
+        if post_body:
+            identifiers = json.loads(post_body.decode('utf-8'))
+        else:
+            identifiers = [{key: value for key, value in query.items()
+                            if not key.startswith('Auth') and key != 'components'}]
+
+        body = build_body(level, endpoint, identifiers, query)
+        self._send(200, 'application/json', headers, json.dumps(body).encode('utf-8'))
+
+    def _send(self, status, content_type, headers, content):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MockServer(object):
+    """Runs the mock API server on a background thread."""
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, rate_limit=1000000):
+        """
+        Args:
+            port - Optional. Port to listen on. Default is 0, a free port.
+            latency (float) - Optional. Fixed latency of every request in seconds.
+            jitter (float) - Optional. Random extra latency of every request in seconds.
+            rate_limit - Optional. Requests allowed per rate limit period.
+        """
+        self.state = MockServerState(latency, jitter, rate_limit)
+        self._server = _ThreadingHTTPServer(('127.0.0.1', port), MockRequestHandler)
+        self._server.state = self.state
+        self._thread = None
+
+    @property
+    def url(self):
+        """The url prefix to use in place of constants.URL_PREFIX."""
+        return 'http://127.0.0.1:{}'.format(self._server.server_address[1])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    from docopt import docopt
+    args = docopt(__doc__)
+    server = MockServer(port=int(args['--port'] or 8765),
+                        latency=float(args['--latency'] or 0) / 1000,
+                        jitter=float(args['--jitter'] or 0) / 1000,
+                        rate_limit=int(args['--rate-limit'] or 1000000))
+    print('Mock HouseCanary API listening on {}'.format(server.url))
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
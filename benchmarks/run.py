@@ -0,0 +1,142 @@
+"""
+Runs the client benchmarks against a local mock HouseCanary server.
+
+Each scenario runs in its own process so CPU time and peak RSS are measured
+for that scenario alone. The mock server runs in this process.
+
+Run with `python -m benchmarks.run`.
+
+Usage: benchmarks.run [<scenario>...] [-l LATENCY] [-j JITTER] [-s SIZE] [-o FILE]
+
+Scenarios:
+    fetch_single, fetch_batch, component_mget, component_mget_streaming, component_mget_planned,
+    hc_api_export, concat_excel_reports. Default is all of them.
+
+Options:
+    -l LATENCY --latency=LATENCY    Mock server latency in milliseconds. Default is 20.
+    -j JITTER --jitter=JITTER       Mock server random extra latency in milliseconds. Default is 10.
+    -s SIZE --size=SIZE             Override the size (iterations or identifiers) of every scenario.
+    -o FILE --output=FILE           Optional. Write the results as json to FILE so they can be
+                                    compared across versions.
+    -h --help                       Show usage
+"""
+
+from __future__ import print_function
+import json
+import subprocess
+import sys
+import time
+
+from docopt import docopt
+
+from benchmarks.mock_server import MockServer
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def percentile(values, pct):
+    """Returns the pct percentile of values using the nearest rank method."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    if sys.platform == 'darwin':
+        return max_rss / (1024.0 * 1024.0)
+    return max_rss / 1024.0
+
+
+def run_scenario(name, url, size):
+    """Runs a scenario in this process and returns its measurements."""
+    import housecanary.constants as constants
+    from benchmarks.scenarios import SCENARIOS
+
+    constants.URL_PREFIX = url
+    func, default_size = SCENARIOS[name]
+    size = size or default_size
+
+    cpu_start = time.process_time() if hasattr(time, 'process_time') else time.clock()
+    wall_start = time.time()
+    latencies, requests_made = func(size)
+    wall = time.time() - wall_start
+    cpu_end = time.process_time() if hasattr(time, 'process_time') else time.clock()
+
+    return {
+        'scenario': name,
+        'size': size,
+        'operations': len(latencies),
+        'requests': requests_made,
+        'wall_seconds': wall,
+        'requests_per_second': requests_made / wall if wall else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'cpu_seconds': cpu_end - cpu_start,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _run_in_subprocess(name, url, size):
+    command = [sys.executable, '-m', 'benchmarks.run', '--child', name, url, str(size or 0)]
+    output = subprocess.check_output(command)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def print_results(results):
+    header = '{:<24} {:>8} {:>10} {:>10} {:>10} {:>8} {:>10}'.format(
+        'scenario', 'size', 'req/s', 'p50 ms', 'p99 ms', 'cpu s', 'rss MB')
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print('{:<24} {:>8} {:>10.1f} {:>10.1f} {:>10.1f} {:>8.2f} {:>10.1f}'.format(
+            result['scenario'], result['size'], result['requests_per_second'],
+            result['p50_ms'], result['p99_ms'], result['cpu_seconds'],
+            result['peak_rss_mb'] or 0.0))
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        _, _, name, url, size = sys.argv
+        print(json.dumps(run_scenario(name, url, int(size))))
+        return
+
+    from benchmarks.scenarios import SCENARIOS
+    import housecanary
+
+    args = docopt(__doc__)
+    names = args['<scenario>'] or sorted(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print('Unknown scenarios: {}'.format(', '.join(unknown)))
+        sys.exit(2)
+
+    latency = float(args['--latency'] or 20) / 1000
+    jitter = float(args['--jitter'] or 10) / 1000
+    size = int(args['--size'] or 0)
+
+    results = []
+    with MockServer(latency=latency, jitter=jitter) as server:
+        for name in names:
+            results.append(_run_in_subprocess(name, server.url, size))
+
+    print_results(results)
+
+    if args['--output']:
+        with open(args['--output'], 'w') as output_file:
+            json.dump({'version': housecanary.__version__, 'latency': latency,
+                       'jitter': jitter, 'results': results}, output_file, indent=2)
+        print('Saved results to {}'.format(args['--output']))
+
+
+if __name__ == '__main__':
+    main()
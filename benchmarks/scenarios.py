@@ -0,0 +1,141 @@
+"""
+Benchmark scenarios for the HouseCanary client.
+
+Each scenario takes a `size` and returns a list of per operation latencies
+in seconds and the number of API requests made.
+The client is pointed at the mock server through constants.URL_PREFIX.
+"""
+
+from __future__ import print_function
+import contextlib
+import csv
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import housecanary
+from housecanary.excel import utilities as excel_utilities
+from housecanary.hc_api_export import hc_api_export as hc_api_export_tool
+from housecanary.output import StreamingOutputGenerator
+from housecanary.planner import MgetPlanner
+
+
+def make_addresses(count):
+    return [{'address': '{} Main St'.format(idx + 1), 'zipcode': '{:05d}'.format(90000 + idx)}
+            for idx in range(count)]
+
+
+@contextlib.contextmanager
+def _quiet():
+    stdout = sys.stdout
+    sys.stdout = io.StringIO() if sys.version_info[0] >= 3 else io.BytesIO()
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
+
+
+def _timed(func, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.time()
+        func()
+        latencies.append(time.time() - start)
+    return latencies
+
+
+def fetch_single(size):
+    """ApiClient.fetch with a single identifier (GET)."""
+    client = housecanary.ApiClient('test_key', 'test_secret')
+    identifier = make_addresses(1)
+    return _timed(lambda: client.fetch('property/value', identifier), size), size
+
+
+def fetch_batch(size):
+    """ApiClient.fetch with batches of 100 identifiers (POST)."""
+    client = housecanary.ApiClient('test_key', 'test_secret')
+    identifiers = make_addresses(100)
+    return _timed(lambda: client.fetch('property/value', identifiers).objects(), size), size
+
+
+def component_mget(size):
+    """component_mget of all property endpoints for `size` identifiers in one call."""
+    client = housecanary.ApiClient('test_key', 'test_secret')
+    identifiers = make_addresses(size)
+    endpoints = excel_utilities.get_all_endpoints('property')
+    latencies = _timed(lambda: client.property.component_mget(identifiers, endpoints), 3)
+    return latencies, 3
+
+
+def component_mget_streaming(size):
+    """component_mget of all property endpoints for `size` identifiers, parsed incrementally."""
+    client = housecanary.ApiClient('test_key', 'test_secret',
+                                   output_generator=StreamingOutputGenerator())
+    identifiers = make_addresses(size)
+    endpoints = excel_utilities.get_all_endpoints('property')
+    latencies = _timed(
+        lambda: sum(1 for _ in client.property.component_mget(identifiers, endpoints)), 3)
+    return latencies, 3
+
+
+def component_mget_planned(size):
+    """component_mget of all property endpoints for `size` identifiers with an MgetPlanner."""
+    client = housecanary.ApiClient('test_key', 'test_secret')
+    identifiers = make_addresses(size)
+    endpoints = excel_utilities.get_all_endpoints('property')
+    planner = MgetPlanner()
+    calls = len(planner.plan(identifiers, endpoints))
+    latencies = _timed(
+        lambda: client.property.component_mget(identifiers, endpoints, planner=planner), 3)
+    return latencies, 3 * calls
+
+
+def hc_api_export(size):
+    """hc_api_export of all property endpoints to Excel for `size` identifiers."""
+    work_dir = tempfile.mkdtemp()
+    try:
+        input_file = os.path.join(work_dir, 'input.csv')
+        with io.open(input_file, 'w' if sys.version_info[0] >= 3 else 'wb') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(['address', 'zipcode'])
+            for identifier in make_addresses(size):
+                writer.writerow([identifier['address'], identifier['zipcode']])
+
+        args = {'<input>': input_file, '<endpoints>': 'property/*', '--type': 'excel',
+                '--output': os.path.join(work_dir, 'output.xlsx'), '--path': None,
+                '--key': 'test_key', '--secret': 'test_secret', '--retry': False}
+        calls = len(MgetPlanner().plan(make_addresses(size),
+                                       excel_utilities.get_all_endpoints('property')))
+        with _quiet():
+            latencies = _timed(lambda: hc_api_export_tool.hc_api_export(args), 1)
+        return latencies, calls
+    finally:
+        shutil.rmtree(work_dir)
+
+
+def concat_excel_reports(size):
+    """concat_excel_reports of `size` Value Report xlsx files."""
+    work_dir = tempfile.mkdtemp()
+    try:
+        addresses = [(a['address'], a['zipcode']) for a in make_addresses(size)]
+        with _quiet():
+            latencies = _timed(lambda: housecanary.concat_excel_reports(
+                addresses, 'output.xlsx', 'value_report', 'full', False,
+                'test_key', 'test_secret', work_dir), 1)
+        return latencies, size
+    finally:
+        shutil.rmtree(work_dir)
+
+
+SCENARIOS = {
+    'fetch_single': (fetch_single, 200),
+    'fetch_batch': (fetch_batch, 50),
+    'component_mget': (component_mget, 50),
+    'component_mget_streaming': (component_mget_streaming, 50),
+    'component_mget_planned': (component_mget_planned, 50),
+    'hc_api_export': (hc_api_export, 50),
+    'concat_excel_reports': (concat_excel_reports, 10),
+}
@@ -1,7 +1,37 @@
 __version__ = '0.7.1'
 
+import sys
+
 from housecanary.apiclient import ApiClient
-from housecanary.excel import export_analytics_data_to_excel
-from housecanary.excel import export_analytics_data_to_csv
-from housecanary.excel import concat_excel_reports
-from housecanary.excel import utilities as excel_utilities
+
+# The excel helpers pull in openpyxl and slugify, which are slow to import
+# and not needed by callers that only use ApiClient, so they are loaded on first use.
+_LAZY_ATTRIBUTES = {
+    'export_analytics_data_to_excel': ('housecanary.excel', 'export_analytics_data_to_excel'),
+    'export_analytics_data_to_csv': ('housecanary.excel', 'export_analytics_data_to_csv'),
+    'concat_excel_reports': ('housecanary.excel', 'concat_excel_reports'),
+    'excel_utilities': ('housecanary.excel.utilities', None),
+}
+
+
+def _load_lazy_attribute(name):
+    import importlib
+    module_name, attribute = _LAZY_ATTRIBUTES[name]
+    module = importlib.import_module(module_name)
+    value = module if attribute is None else getattr(module, attribute)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _LAZY_ATTRIBUTES:
+            return _load_lazy_attribute(name)
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+else:
+    # module level __getattr__ is not supported, so import everything up front
+    for _name in _LAZY_ATTRIBUTES:
+        _load_lazy_attribute(_name)
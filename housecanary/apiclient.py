@@ -1,10 +1,19 @@
 from __future__ import print_function
 import os
-from builtins import object
-from housecanary.output import ResponseOutputGenerator
+import time
+from housecanary.output import (ResponseOutputGenerator, JsonOutputGenerator,
+                                StreamingOutputGenerator)
 from housecanary.requestclient import RequestClient
+from housecanary.hooks import Hooks
+from housecanary.dispatch import AdaptiveConcurrency, Dispatcher
+from housecanary import utilities
+from housecanary import validation
+from housecanary import dataframes
+from housecanary.response import Response
 import housecanary.exceptions
 import housecanary.constants as constants
+from housecanary.compat import string_types
+import requests
 from requests.auth import HTTPBasicAuth
 
 
@@ -12,7 +21,10 @@ class ApiClient(object):
     """Base class for making API calls"""
 
     def __init__(self, auth_key=None, auth_secret=None, version=None, request_client=None,
-                 output_generator=None, auth=None):
+                 output_generator=None, auth=None, hooks=None, compression=None,
+                 compression_threshold=constants.DEFAULT_COMPRESSION_THRESHOLD,
+                 scheduler=None, timeout=constants.DEFAULT_TIMEOUT, hedging=None,
+                 cache=None, circuit_breaker=None):
         """
         auth_key and auth_secret can be passed in as parameters or
         pulled automatically from the following environment variables:
@@ -36,6 +48,27 @@ class ApiClient(object):
             authenticator - Optional. An instance of a requests.auth.AuthBase implementation
                             for providing authentication to the request.
                             Default is requests.auth.HTTPBasicAuth.
+            hooks - Optional. An instance of housecanary.hooks.Hooks for receiving
+                    request_start, response_received, parse_done, retry and throttled events.
+                    Default is an empty Hooks available as the `hooks` attribute.
+            compression (str) - Optional. Compress POST bodies with "gzip", "deflate" or "br"
+                                (requires the brotli package). Default is None.
+            compression_threshold (int) - Optional. Only compress bodies of at least
+                                          this many bytes. Default is 1024.
+            scheduler - Optional. A housecanary.scheduler.PriorityScheduler that orders
+                        and limits this client's requests by priority class.
+            timeout - Optional. Seconds to wait for the server, as a number or a
+                      (connect timeout, read timeout) tuple. None waits forever.
+                      Default is (10, 300).
+            hedging - Optional. A housecanary.hedging.HedgingPolicy for sending a duplicate
+                      of single identifier requests that are slower than usual.
+            cache - Optional. A housecanary.cache.ResponseCache to keep the result of each
+                    identifier in. Requires the default ResponseOutputGenerator or a
+                    JsonOutputGenerator.
+            circuit_breaker - Optional. A housecanary.circuitbreaker.CircuitBreaker that
+                              rejects requests to endpoint families the API is failing for.
+                              While a circuit is open, results older than the cache's ttl
+                              are served if every identifier has one.
         """
 
         self._auth_key = auth_key or os.getenv('HC_API_KEY')
@@ -43,22 +76,48 @@ class ApiClient(object):
 
         self._version = version or constants.DEFAULT_VERSION
 
+        self.hooks = hooks if hooks is not None else Hooks()
+
         # user can pass in a custom request_client
         self._request_client = request_client
+        _output_generator = getattr(request_client, '_output_generator', output_generator)
 
         # if no request_client provided, use the defaults.
         if self._request_client is None:
             # allow using custom OutputGenerator or Authenticator with the RequestClient
             _output_generator = output_generator or ResponseOutputGenerator()
             _auth = auth or HTTPBasicAuth(self._auth_key, self._auth_secret)
-            self._request_client = RequestClient(_output_generator, _auth)
+            self._request_client = RequestClient(_output_generator, _auth, self.hooks,
+                                                 compression, compression_threshold, timeout)
+
+        self.scheduler = scheduler
+        if scheduler is not None:
+            scheduler.attach(self.hooks)
+
+        self.hedging = hedging
+        if hedging is not None:
+            hedging.attach(self.hooks)
+
+        self.cache = cache
+        if cache is not None:
+            # cached results must be returned as the output generator would have
+            self._returns_json = _returns_json(_output_generator)
+        else:
+            try:
+                self._returns_json = _returns_json(_output_generator)
+            except ValueError:
+                self._returns_json = None
+
+        self.circuit_breaker = circuit_breaker
+        if circuit_breaker is not None:
+            circuit_breaker.attach(self.hooks)
 
         self.property = PropertyComponentWrapper(self)
         self.block = BlockComponentWrapper(self)
         self.zip = ZipComponentWrapper(self)
         self.msa = MsaComponentWrapper(self)
 
-    def fetch(self, endpoint_name, identifier_input, query_params=None):
+    def fetch(self, endpoint_name, identifier_input, query_params=None, priority=None):
         """Calls this instance's request_client's post method with the
         specified component endpoint
 
@@ -98,25 +157,275 @@ class ApiClient(object):
 
                 The "meta" field is always optional.
 
+            - priority (str) - Optional. The scheduler priority class of the request,
+                like "bulk". Default is the class set with scheduler.priority,
+                or the scheduler's default class. Ignored without a scheduler.
+
         Returns:
             A Response object, or the output of a custom OutputGenerator
             if one was specified in the constructor.
         """
 
-        endpoint_url = constants.URL_PREFIX + "/" + self._version + "/" + endpoint_name
-
         if query_params is None:
             query_params = {}
 
+        if self.cache is not None:
+            return self._fetch_cached(endpoint_name, identifier_input, query_params, priority)
+
+        return self._fetch(endpoint_name, identifier_input, query_params, priority)
+
+    def _fetch(self, endpoint_name, identifier_input, query_params, priority):
+        endpoint_url = constants.URL_PREFIX + "/" + self._version + "/" + endpoint_name
+
         if len(identifier_input) == 1:
             # If only one identifier specified, use a GET request
             query_params.update(identifier_input[0])
-            return self._request_client.get(endpoint_url, query_params)
+            return self._send(endpoint_name, priority, self._get, endpoint_url, query_params)
 
         # when more than one address, use a POST request
-        return self._request_client.post(endpoint_url, identifier_input, query_params)
+        return self._send(endpoint_name, priority, self._request_client.post, endpoint_url,
+                          identifier_input, query_params, len(identifier_input))
+
+    def _fetch_cached(self, endpoint_name, identifier_input, query_params, priority):
+        """Fetches the identifiers that have no fresh result in the cache
+        and merges them with the cached ones.
+
+        If every identifier has a result that is fresh or stale but not expired,
+        they are returned at once and the stale ones are refreshed in the background.
+        """
+        keys = [self.cache.get_key(endpoint_name, identifier, query_params)
+                for identifier in identifier_input]
+        entries = self.cache.get_entries(keys)
+        now = time.time()
+        missing = []
+        stale = []
+        for idx, key in enumerate(keys):
+            if key not in entries or self.cache.is_expired(entries[key], now):
+                missing.append(idx)
+            elif not self.cache.is_fresh(entries[key], now):
+                stale.append(idx)
+
+        if not missing:
+            if stale:
+                self._refresh_in_background(endpoint_name, identifier_input, keys, stale,
+                                            query_params, priority)
+            return self.create_result(endpoint_name, [entries[key].value for key in keys])
+
+        # the request can't be avoided, so refresh the stale results with it
+        missing = sorted(missing + stale)
+
+        missing_input = [identifier_input[idx] for idx in missing]
+        try:
+            result = self._fetch(endpoint_name, missing_input, dict(query_params), priority)
+        except housecanary.exceptions.CircuitOpenException:
+            if any(keys[idx] not in entries or not self.cache.is_usable_on_error(entries[keys[idx]])
+                   for idx in missing):
+                raise
+            # serve the stale results while the API is unavailable
+            return self.create_result(endpoint_name, [entries[key].value for key in keys])
+
+        if isinstance(result, dict):
+            # the error body of a json output generator, which has no results to cache
+            return result
+
+        items = _get_batch_json(result)
+        _zip_batch(endpoint_name, missing_input, items)
+        values = dict((keys[idx], item) for idx, item in zip(missing, items))
+        self.cache.set_many(_get_cacheable(values))
+        if len(missing) == len(keys):
+            return result
+
+        merged = [values[key] if key in values else entries[key].value for key in keys]
+        return self.create_result(endpoint_name, merged, getattr(result, "response", None))
+
+    def _refresh_in_background(self, endpoint_name, identifier_input, keys, stale, query_params,
+                               priority):
+        """Refetches the stale results of a batch in the cache's background threads."""
+        identifiers = dict((keys[idx], identifier_input[idx]) for idx in stale)
+        # the refresh is sent from another thread
+        priority = self.current_priority(priority)
+
+        def refresh(refresh_keys):
+            refresh_input = [identifiers[key] for key in refresh_keys]
+            result = self._fetch(endpoint_name, refresh_input, dict(query_params), priority)
+            if isinstance(result, dict):
+                # an error body, the stale results are kept until they expire
+                return
+            items = _get_batch_json(result)
+            _zip_batch(endpoint_name, refresh_input, items)
+            values = dict(zip(refresh_keys, items))
+            self.cache.set_many(_get_cacheable(values))
+
+        self.cache.refresh_in_background(list(identifiers), refresh)
+
+    def create_result(self, endpoint_name, items, response=None):
+        """Returns json results that were not fetched in a single request, like cached
+        or merged ones, as the output generator would have: a Response, or the json list
+        for a JsonOutputGenerator or a custom one. A Response of results that were not
+        fetched at all has no original response."""
+        if self._returns_json is False:
+            return Response.create(endpoint_name, items, response)
+        return items
+
+    def _send(self, endpoint_name, priority, send, *args):
+        """Calls send(*args) through the circuit breaker and the scheduler, if any."""
+        if self.circuit_breaker is None:
+            return self._schedule(priority, send, *args)
+
+        self.circuit_breaker.before_request(endpoint_name)
+        try:
+            return self._schedule(priority, send, *args)
+        except requests.exceptions.RequestException:
+            # failed without a response, like a timeout or a refused connection
+            self.circuit_breaker.on_error(endpoint_name)
+            raise
+
+    def _get(self, endpoint_url, query_params):
+        """Makes a GET request, hedged if a hedging policy is set."""
+        if self.hedging is None:
+            return self._request_client.get(endpoint_url, query_params)
+        return self.hedging.call(self._request_client.get, endpoint_url, query_params)
+
+    def _schedule(self, priority, send, *args):
+        """Calls send(*args) in a slot of the scheduler, if any."""
+        if self.scheduler is None:
+            return send(*args)
+        with self.scheduler.slot(priority):
+            return send(*args)
+
+    def current_priority(self, priority=None):
+        """Returns the scheduler priority class that a request made in this thread
+        would have, or None without a scheduler."""
+        if self.scheduler is None:
+            return priority
+        return self.scheduler.current_priority(priority)
+
+    def iter_fetch(self, endpoint_name, identifiers, batch_size=100, concurrency=4,
+                   ordered=True, query_params=None, priority=None, deadline=None):
+        """Fetches an endpoint for a stream of identifiers and yields the result
+        of each identifier.
+
+        The identifiers are read lazily and sent in batches, with at most `concurrency`
+        requests in flight, so memory use does not grow with the length of the stream.
+
+        Args:
+            - endpoint_name (str) - The endpoint to call like "property/value".
+            - identifiers - Any iterable of identifiers, such as a file reader or a
+                database cursor. Each identifier can be in any of the forms accepted by
+                the endpoint methods, like an (address, zipcode) tuple or a dict.
+            - batch_size (int) - Optional. Identifiers per request. Default is 100.
+            - concurrency (int) - Optional. Requests in flight at once, or a
+                housecanary.dispatch.AdaptiveConcurrency to adjust it. Default is 4.
+            - ordered (bool) - Optional. If True (default), results are yielded in the
+                order of identifiers. Otherwise each batch is yielded as it completes.
+            - query_params (dict) - Optional. Query params to add to every request.
+            - priority (str) - Optional. The scheduler priority class of the requests.
+                Default is the class set for the calling thread.
+            - deadline - Optional. Seconds, or a housecanary.dispatch.Deadline, for the
+                whole job. Requests are not sent after the deadline and their timeouts
+                are capped at the time remaining.
+
+        Returns:
+            A generator of (identifier, result) tuples, where identifier is the item
+            from `identifiers` and result is its Property, Block, ZipCode or Msa object,
+            or its json dict if a json output generator is used.
+
+        Raises:
+            DeadlineExceededException when the deadline passes. Its partial_result is
+            the list of (identifier, result) tuples that completed but were not yielded.
+            IncompleteResultException if a batch's result does not have one item
+            per identifier.
+        """
+        wrapper = getattr(self, endpoint_name.split("/")[0])
+        # the batches are sent from the dispatcher's threads
+        priority = self.current_priority(priority)
+
+        def fetch_batch(batch):
+            identifier_input = [wrapper.convert_identifier(identifier) for identifier in batch]
+            params = dict(query_params) if query_params else {}
+            result = self.fetch(endpoint_name, identifier_input, params, priority)
+            return _zip_batch(endpoint_name, batch, _get_batch_items(result))
+
+        return self._iter_batch_results(fetch_batch, identifiers, batch_size, concurrency,
+                                        ordered, deadline)
 
-    def fetch_synchronous(self, endpoint_name, query_params=None):
+    def fetch_to_store(self, endpoint_name, identifiers, store, batch_size=100, concurrency=4,
+                       query_params=None, priority=None, deadline=None):
+        """Fetches an endpoint for a stream of identifiers and writes the json result
+        of each identifier to a ResultStore.
+
+        Batches are fetched like in iter_fetch. Each result is stored under the
+        identifier as converted by the endpoint's wrapper, like
+        {"address": "43 Valmonte Plz", "zipcode": "90274"} or {"slug": slug},
+        which the store also finds by its only value, like the slug.
+
+        Args:
+            - endpoint_name (str) - The endpoint to call like "property/value".
+            - identifiers - Any iterable of identifiers.
+            - store - A housecanary.store.ResultStore to write to.
+            - batch_size (int) - Optional. Identifiers per request. Default is 100.
+            - concurrency (int) - Optional. Requests in flight at once, or a
+                housecanary.dispatch.AdaptiveConcurrency to adjust it. Default is 4.
+            - query_params (dict) - Optional. Query params to add to every request.
+            - priority (str) - Optional. The scheduler priority class of the requests.
+                Default is the class set for the calling thread.
+            - deadline - Optional. Seconds, or a housecanary.dispatch.Deadline, for the
+                whole job.
+
+        Returns:
+            The number of results written.
+
+        Raises:
+            DeadlineExceededException when the deadline passes. Every result that
+            completed in time is written first, and partial_result is their number.
+            IncompleteResultException if a batch's result does not have one item
+            per identifier.
+        """
+        wrapper = getattr(self, endpoint_name.split("/")[0])
+        # the batches are sent from the dispatcher's threads
+        priority = self.current_priority(priority)
+
+        def fetch_batch(batch):
+            identifier_input = [wrapper.convert_identifier(identifier) for identifier in batch]
+            params = dict(query_params) if query_params else {}
+            result = self.fetch(endpoint_name, identifier_input, params, priority)
+            return _zip_batch(endpoint_name, identifier_input, _get_batch_json(result))
+
+        num_written = 0
+        try:
+            for identifier, record in self._iter_batch_results(fetch_batch, identifiers,
+                                                               batch_size, concurrency, False,
+                                                               deadline):
+                store.write(endpoint_name, identifier, record)
+                num_written += 1
+        except housecanary.exceptions.DeadlineExceededException as e:
+            for identifier, record in e.partial_result:
+                store.write(endpoint_name, identifier, record)
+                num_written += 1
+            e.partial_result = num_written
+            raise
+        finally:
+            store.flush()
+        return num_written
+
+    def _iter_batch_results(self, fetch_batch, identifiers, batch_size, concurrency, ordered,
+                            deadline=None):
+        if isinstance(concurrency, AdaptiveConcurrency):
+            concurrency.attach(self.hooks)
+        dispatcher = Dispatcher(concurrency)
+        batches = utilities.iter_batches(identifiers, batch_size)
+        try:
+            for results in dispatcher.imap(fetch_batch, batches, ordered=ordered,
+                                           deadline=deadline):
+                for identifier_result in results:
+                    yield identifier_result
+        except housecanary.exceptions.DeadlineExceededException as e:
+            # the completed batches, flattened to (identifier, result) tuples
+            e.partial_result = [identifier_result for results in e.partial_result
+                                for identifier_result in results]
+            raise
+
+    def fetch_synchronous(self, endpoint_name, query_params=None, priority=None):
         """Calls this instance's request_client's get method with the
         specified component endpoint"""
 
@@ -125,7 +434,66 @@ class ApiClient(object):
         if query_params is None:
             query_params = {}
 
-        return self._request_client.get(endpoint_url, query_params)
+        return self._send(endpoint_name, priority, self._request_client.get, endpoint_url,
+                          query_params)
+
+
+def _zip_batch(endpoint_name, identifiers, items):
+    """Returns the (identifier, result) tuples of a batch, or raises IncompleteResultException
+    if there is not one result per identifier, rather than dropping identifiers."""
+    if len(items) != len(identifiers):
+        raise housecanary.exceptions.IncompleteResultException(endpoint_name, identifiers,
+                                                               len(items))
+    return list(zip(identifiers, items))
+
+
+def _get_cacheable(values):
+    """Returns the items of a dict of cache key to result that have no component errors.
+    Errors, like a 204 for an address that has no data yet, are fetched again next time."""
+    return dict((key, item) for key, item in values.items()
+                if all(value.get("api_code", constants.BIZ_CODE_OK) == constants.BIZ_CODE_OK
+                       for value in item.values() if isinstance(value, dict)))
+
+
+def _get_batch_items(result):
+    """Returns the list of per identifier results from the result of a fetch."""
+    if isinstance(result, list):
+        return result
+    if hasattr(result, "objects"):
+        return result.objects()
+    # a StreamingResponse or the output of a custom OutputGenerator
+    return list(result)
+
+
+def _returns_json(output_generator):
+    """Returns whether an output generator returns the json body, or raises ValueError
+    if it returns something other than a json list or a Response."""
+    if output_generator is None:
+        # the default ResponseOutputGenerator
+        return False
+    if isinstance(output_generator, string_types) and output_generator.lower() == "json":
+        return True
+    if isinstance(output_generator, JsonOutputGenerator):
+        return True
+    if (isinstance(output_generator, ResponseOutputGenerator) and
+            not isinstance(output_generator, StreamingOutputGenerator)):
+        return False
+    raise ValueError("The response cache requires a ResponseOutputGenerator or "
+                     "a JsonOutputGenerator")
+
+
+def _get_batch_json(result):
+    """Returns the list of per identifier json results from the result of a fetch."""
+    if isinstance(result, list):
+        return result
+    if hasattr(result, "json"):
+        return result.json()
+    # a StreamingResponse, which must not convert the results to objects
+    items = list(result)
+    if items and not isinstance(items[0], dict):
+        raise TypeError("fetch_to_store requires json results, use an output generator "
+                        "that returns json")
+    return items
 
 
 class ComponentWrapper(object):
@@ -136,10 +504,85 @@ class ComponentWrapper(object):
         """
         self._api_client = api_client
 
+    # Override in subclasses
+    ALLOWED_KEYS = frozenset()
+    REQUIRED_KEYS = ()
+    INPUT_NAME = ""
+
     def _convert_to_identifier_json(self, identifier_data):
         """Override in subclasses"""
         raise NotImplementedError()
 
+    def _check_identifier_keys(self, identifier_data):
+        """Raises InvalidInputException if the dict has a key that is not allowed."""
+        if not self.ALLOWED_KEYS.issuperset(identifier_data):
+            for key in identifier_data:
+                if key not in self.ALLOWED_KEYS:
+                    msg = "Key in " + self.INPUT_NAME + " input not allowed: " + key
+                    raise housecanary.exceptions.InvalidInputException(msg)
+
+    def convert_identifier_columns(self, data):
+        """Validates a column oriented batch of identifiers, such as a dict of lists
+        or a pandas DataFrame, and converts its valid rows.
+
+        Unlike get_identifier_input, this does not raise on the first invalid row.
+
+        Args:
+            data - A dict mapping keys like "address" and "zipcode" to lists of values,
+                   or a pandas DataFrame with those columns.
+
+        Returns:
+            A tuple of (identifier_input, report). identifier_input is the list of
+            dicts for the valid rows, and report is a housecanary.validation.ValidationReport
+            listing the invalid ones.
+        """
+        return validation.convert_columns(data, self.ALLOWED_KEYS, self.REQUIRED_KEYS,
+                                          self.INPUT_NAME)
+
+    def convert_identifier(self, identifier):
+        """Converts a single identifier, in any of the accepted forms,
+        into the dict expected by the ApiClient fetch method."""
+        return self._convert_to_identifier_json(identifier)
+
+    def component_mget_frames(self, data, components, planner=None):
+        """Calls component_mget for the identifiers in a DataFrame and returns
+        the results of each endpoint as a DataFrame. Requires pandas.
+
+        The results are flattened with the same rules as the Excel export, with
+        the identifier columns first.
+
+        Args:
+            data - A pandas DataFrame or pyarrow Table with identifier columns,
+                   like "address" and "zipcode", or a dict of lists.
+            components - A list of endpoint names, like ["property/value"].
+            planner - Optional. A housecanary.planner.MgetPlanner to split the job with.
+
+        Returns:
+            An OrderedDict of endpoint name to DataFrame. property/nod results are
+            split into "property/nod" and "property/nod/default_history". The DataFrames
+            are empty, and no call is made, if there are no identifiers.
+
+        Raises:
+            InvalidInputException listing every invalid row.
+        """
+        identifier_input, report = self.convert_identifier_columns(
+            dataframes.get_identifier_columns(data))
+        report.raise_for_errors()
+
+        if not components:
+            return dataframes.to_frames([], [], None, set())
+        result_info_key = dataframes.RESULT_INFO_KEYS[components[0].split("/")[0]]
+        if not identifier_input:
+            # nothing to fetch, so each endpoint gets an empty DataFrame
+            return dataframes.to_frames([], components, result_info_key, set())
+
+        result = self.component_mget(identifier_input, components, planner=planner)
+        api_data = result.json() if isinstance(result, Response) else list(result)
+
+        # only keys every identifier has, since they are read back from each result
+        identifier_keys = set.intersection(*[set(identifier) for identifier in identifier_input])
+        return dataframes.to_frames(api_data, components, result_info_key, identifier_keys)
+
     def get_identifier_input(self, identifier_data):
         """Convert the various formats of input identifier_data into
         the proper json format expected by the ApiClient fetch method,
@@ -166,6 +609,23 @@ class ComponentWrapper(object):
 
         return self._api_client.fetch(endpoint_name, identifier_input, query_params)
 
+    def fetch_component_mget(self, endpoint_name, identifier_data, components, planner=None):
+        """Common method for the component_mget endpoints.
+
+        If a planner is given, the job is split into several calls by the planner.
+        """
+        if not isinstance(components, list):
+            print("Components param must be a list")
+            return
+
+        if planner is not None:
+            identifier_input = self.get_identifier_input(identifier_data)
+            return planner.execute(self._api_client, endpoint_name, identifier_input, components)
+
+        query_params = {"components": ",".join(components)}
+
+        return self.fetch_identifier_component(endpoint_name, identifier_data, query_params)
+
 
 class PropertyComponentWrapper(ComponentWrapper):
     """Property specific components
@@ -215,10 +675,15 @@ class PropertyComponentWrapper(ComponentWrapper):
     or the output of a custom OutputGenerator if one was specified in the constructor.
     """
 
+    ALLOWED_KEYS = frozenset(["address", "zipcode", "unit", "city", "state", "slug", "meta",
+                              "client_value", "client_value_sqft"])
+    REQUIRED_KEYS = ("address", "slug")
+    INPUT_NAME = "address"
+
     def _convert_to_identifier_json(self, address_data):
         """Convert input address data into json format"""
 
-        if isinstance(address_data, str):
+        if isinstance(address_data, string_types):
             # allow just passing a slug string.
             return {"slug": address_data}
 
@@ -231,14 +696,8 @@ class PropertyComponentWrapper(ComponentWrapper):
             return address_json
 
         if isinstance(address_data, dict):
-            allowed_keys = ["address", "zipcode", "unit", "city", "state", "slug", "meta",
-                            "client_value", "client_value_sqft"]
-
             # ensure the dict does not contain any unallowed keys
-            for key in address_data:
-                if key not in allowed_keys:
-                    msg = "Key in address input not allowed: " + key
-                    raise housecanary.exceptions.InvalidInputException(msg)
+            self._check_identifier_keys(address_data)
 
             # ensure it contains an "address" key
             if "address" in address_data or "slug" in address_data:
@@ -393,22 +852,17 @@ class PropertyComponentWrapper(ComponentWrapper):
         """Call the zip_volatility endpoint"""
         return self.fetch_identifier_component("property/zip_volatility", data)
 
-    def component_mget(self, data, components):
+    def component_mget(self, data, components, planner=None):
         """Call the component_mget endpoint
 
         Args:
             - data - As described in the class docstring.
             - components - A list of strings for each component to include in the request.
                 Example: ["property/details", "property/flood", "property/value"]
+            - planner - Optional. An MgetPlanner used to split the request into several
+                smaller calls that run concurrently. The results are merged into one.
         """
-        if not isinstance(components, list):
-            print("Components param must be a list")
-            return
-
-        query_params = {"components": ",".join(components)}
-
-        return self.fetch_identifier_component(
-            "property/component_mget", data, query_params)
+        return self.fetch_component_mget("property/component_mget", data, components, planner)
 
     def value_report(self, address, zipcode, report_type="full", format_type="json"):
         """Call the value_report component
@@ -486,19 +940,18 @@ class BlockComponentWrapper(ComponentWrapper):
     or the output of a custom OutputGenerator if one was specified in the constructor.
     """
 
+    ALLOWED_KEYS = frozenset(["block_id", "num_bins", "property_type", "meta"])
+    REQUIRED_KEYS = ("block_id",)
+    INPUT_NAME = "block"
+
     def _convert_to_identifier_json(self, block_data):
-        if isinstance(block_data, str):
+        if isinstance(block_data, string_types):
             # allow just passing a block_id string.
             return {"block_id": block_data}
 
         if isinstance(block_data, dict):
-            allowed_keys = ["block_id", "num_bins", "property_type", "meta"]
-
             # ensure the dict does not contain any unallowed keys
-            for key in block_data:
-                if key not in allowed_keys:
-                    msg = "Key in block input not allowed: " + key
-                    raise housecanary.exceptions.InvalidInputException(msg)
+            self._check_identifier_keys(block_data)
 
             # ensure it contains a "block_id" key
             if "block_id" in block_data:
@@ -549,22 +1002,17 @@ class BlockComponentWrapper(ComponentWrapper):
         """Call the value_ts_historical endpoint"""
         return self.fetch_identifier_component("block/value_ts_historical", block_data)
 
-    def component_mget(self, block_data, components):
+    def component_mget(self, block_data, components, planner=None):
         """Call the block component_mget endpoint
 
         Args:
             - block_data - As described in the class docstring.
             - components - A list of strings for each component to include in the request.
                 Example: ["block/value_ts", "block/value_distribution"]
+            - planner - Optional. An MgetPlanner used to split the request into several
+                smaller calls that run concurrently. The results are merged into one.
         """
-        if not isinstance(components, list):
-            print("Components param must be a list")
-            return
-
-        query_params = {"components": ",".join(components)}
-
-        return self.fetch_identifier_component(
-            "block/component_mget", block_data, query_params)
+        return self.fetch_component_mget("block/component_mget", block_data, components, planner)
 
 
 class ZipComponentWrapper(ComponentWrapper):
@@ -591,19 +1039,18 @@ class ZipComponentWrapper(ComponentWrapper):
     or the output of a custom OutputGenerator if one was specified in the constructor.
     """
 
+    ALLOWED_KEYS = frozenset(["zipcode", "meta"])
+    REQUIRED_KEYS = ("zipcode",)
+    INPUT_NAME = "zip"
+
     def _convert_to_identifier_json(self, zip_data):
-        if isinstance(zip_data, str):
+        if isinstance(zip_data, string_types):
             # allow just passing a zipcode string.
             return {"zipcode": zip_data}
 
         if isinstance(zip_data, dict):
-            allowed_keys = ["zipcode", "meta"]
-
             # ensure the dict does not contain any unallowed keys
-            for key in zip_data:
-                if key not in allowed_keys:
-                    msg = "Key in zip input not allowed: " + key
-                    raise housecanary.exceptions.InvalidInputException(msg)
+            self._check_identifier_keys(zip_data)
 
             # ensure it contains a "zipcode" key
             if "zipcode" in zip_data:
@@ -642,22 +1089,17 @@ class ZipComponentWrapper(ComponentWrapper):
         """Call the volatility endpoint"""
         return self.fetch_identifier_component("zip/volatility", zip_data)
 
-    def component_mget(self, zip_data, components):
+    def component_mget(self, zip_data, components, planner=None):
         """Call the zip component_mget endpoint
 
         Args:
             - zip_data - As described in the class docstring.
             - components - A list of strings for each component to include in the request.
                 Example: ["zip/details", "zip/volatility"]
+            - planner - Optional. An MgetPlanner used to split the request into several
+                smaller calls that run concurrently. The results are merged into one.
         """
-        if not isinstance(components, list):
-            print("Components param must be a list")
-            return
-
-        query_params = {"components": ",".join(components)}
-
-        return self.fetch_identifier_component(
-            "zip/component_mget", zip_data, query_params)
+        return self.fetch_component_mget("zip/component_mget", zip_data, components, planner)
 
 
 class MsaComponentWrapper(ComponentWrapper):
@@ -684,19 +1126,18 @@ class MsaComponentWrapper(ComponentWrapper):
     or the output of a custom OutputGenerator if one was specified in the constructor.
     """
 
+    ALLOWED_KEYS = frozenset(["msa", "meta"])
+    REQUIRED_KEYS = ("msa",)
+    INPUT_NAME = "msa"
+
     def _convert_to_identifier_json(self, msa_data):
-        if isinstance(msa_data, str):
+        if isinstance(msa_data, string_types):
             # allow just passing a msa string.
             return {"msa": msa_data}
 
         if isinstance(msa_data, dict):
-            allowed_keys = ["msa", "meta"]
-
             # ensure the dict does not contain any unallowed keys
-            for key in msa_data:
-                if key not in allowed_keys:
-                    msg = "Key in msa input not allowed: " + key
-                    raise housecanary.exceptions.InvalidInputException(msg)
+            self._check_identifier_keys(msa_data)
 
             # ensure it contains a "msa" key
             if "msa" in msa_data:
@@ -723,19 +1164,14 @@ class MsaComponentWrapper(ComponentWrapper):
         """Call the hpi_ts_historical endpoint"""
         return self.fetch_identifier_component("msa/hpi_ts_historical", msa_data)
 
-    def component_mget(self, msa_data, components):
+    def component_mget(self, msa_data, components, planner=None):
         """Call the msa component_mget endpoint
 
         Args:
             - msa_data - As described in the class docstring.
             - components - A list of strings for each component to include in the request.
                 Example: ["msa/details", "msa/hpi_ts"]
+            - planner - Optional. An MgetPlanner used to split the request into several
+                smaller calls that run concurrently. The results are merged into one.
         """
-        if not isinstance(components, list):
-            print("Components param must be a list")
-            return
-
-        query_params = {"components": ",".join(components)}
-
-        return self.fetch_identifier_component(
-            "msa/component_mget", msa_data, query_params)
+        return self.fetch_component_mget("msa/component_mget", msa_data, components, planner)
@@ -4,15 +4,9 @@ This module provides an authentication implementation for requests to the HouseC
 
 import hmac
 import hashlib
-import datetime
-import calendar
-from future import standard_library
-from urllib.parse import urlencode
-from urllib.parse import urlparse, parse_qsl, urlunparse
-from builtins import str
+import time
 import requests
-
-standard_library.install_aliases()
+from housecanary.compat import text_type, urlencode, urlparse, urlsplit, parse_qsl, urlunparse
 
 
 class HCAuth(requests.auth.AuthBase):
@@ -38,31 +32,32 @@ class HCAuthV1(HCAuth):
     """ HouseCanary API V1 Authentication handler for Requests.
 
     Generates an HMAC-SHA1 signature for the X-Auth-Signature header.
+
+    The HMAC is keyed once with the secret and copied for every request,
+    and the signed message is built from bytes.
     """
 
-    SIGN_DELIMITER = "\n"
+    SIGN_DELIMITER = b"\n"
     AUTH_PROTO_V1 = "hc_hmac_v1"
+    AUTH_PARAMS = ("AuthKey", "AuthProto", "AuthTimestamp")
+
+    def __init__(self, auth_key, auth_secret):
+        super(HCAuthV1, self).__init__(auth_key, auth_secret)
+        self._hmac = hmac.new(_to_bytes(auth_secret), digestmod=hashlib.sha1)
+        # the auth params other than the timestamp never change
+        self._auth_query_prefix = urlencode(
+            [("AuthKey", auth_key), ("AuthProto", self.AUTH_PROTO_V1), ("AuthTimestamp", "")])
+        self._paths = {}
 
     def __call__(self, request):
         # parse the url of the request
         scheme, netloc, path, params, query, fragment = urlparse(request.url)
 
-        # convert the query string to a dict
-        query_params = dict(parse_qsl(query))
-
-        # add additional query params that are required for authentication
-        query_params['AuthKey'] = self._auth_key
-        query_params['AuthProto'] = self.AUTH_PROTO_V1
-        query_params['AuthTimestamp'] = str(self._get_timestamp_utc())
-
-        # back to string
-        query_string = urlencode(query_params, True)
-
-        # get the post data from the request, if any
-        data = request.body or ""
+        # add the query params that are required for authentication
+        query_string = self._get_query_string(parse_qsl(query))
 
         # set the auth signature as required by the HouseCanary API
-        signature = self._get_signature(path, query_string, request.method, data)
+        signature = self.get_signature(request.method, path, query_string, request.body)
         request.headers["X-Auth-Signature"] = signature
 
         # recreate the url with the updated query string
@@ -71,18 +66,60 @@ class HCAuthV1(HCAuth):
 
         return request
 
-    def _get_signature(self, endpoint_path, query_string, http_method, data):
-        # all the inputs should be strings
+    def sign_url(self, http_method, url, query_params=None, body=None):
+        """Signs a request without parsing a prepared url.
 
-        # uses hmac to produce a signature from the api secret and a message.
-        # The message is defined as:
-        # (HTTP_METHOD, HTTP_LOCATION, HTTP_QUERY_STRING, HTTP_POST_BODY)
-        # concatenated by newline "\n" (unix style).
-        sign_str = self.SIGN_DELIMITER.join([http_method, endpoint_path, query_string, data])
-        signature = hmac.new(str(self._auth_secret), sign_str, digestmod=hashlib.sha1).hexdigest()
-        return signature
+        Args:
+            http_method (str) - The http method of the request.
+            url (str) - The url to the API without query params.
+            query_params (dict) - Optional. Query params to add to the request.
+            body (bytes) - Optional. The request body exactly as it will be sent.
+
+        Returns:
+            A tuple of (signed_url, signature). The signature belongs in
+            the X-Auth-Signature header.
+        """
+        path = self._paths.get(url)
+        if path is None:
+            path = self._paths[url] = urlsplit(url).path
+
+        query_string = self._get_query_string(query_params.items() if query_params else ())
+        signature = self.get_signature(http_method, path, query_string, body)
+        return url + "?" + query_string, signature
+
+    def get_signature(self, http_method, endpoint_path, query_string, data=None):
+        """Returns the hex HMAC-SHA1 signature of a request.
+
+        The message is defined as:
+        (HTTP_METHOD, HTTP_LOCATION, HTTP_QUERY_STRING, HTTP_POST_BODY)
+        concatenated by newline "\n" (unix style).
+        """
+        signer = self._hmac.copy()
+        signer.update(_to_bytes(http_method))
+        signer.update(self.SIGN_DELIMITER)
+        signer.update(_to_bytes(endpoint_path))
+        signer.update(self.SIGN_DELIMITER)
+        signer.update(_to_bytes(query_string))
+        signer.update(self.SIGN_DELIMITER)
+        if data:
+            signer.update(_to_bytes(data))
+        return signer.hexdigest()
+
+    def _get_query_string(self, query_params):
+        # the auth params go last, replacing any the caller passed in
+        params = [(key, value) for key, value in query_params
+                  if value is not None and key not in self.AUTH_PARAMS]
+        query_string = self._auth_query_prefix + text_type(self._get_timestamp_utc())
+        if params:
+            query_string = urlencode(params, True) + "&" + query_string
+        return query_string
 
     @staticmethod
     def _get_timestamp_utc():
-        cur_utc_time = calendar.timegm(datetime.datetime.utcnow().utctimetuple())
-        return cur_utc_time
+        return int(time.time())
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return text_type(value).encode("utf-8")
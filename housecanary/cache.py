@@ -0,0 +1,206 @@
+"""
+Provides a ResponseCache that keeps the json result of each identifier
+an ApiClient fetches, so repeated lookups don't use the rate limit.
+
+Results are cached per identifier under keys made of the endpoint, the
+identifier and the query params, so a batch can be served partly from
+the cache and partly from the API.
+
+With stale-while-revalidate, results older than the ttl but younger than
+max_age are still returned at once, while they are refreshed in the background.
+Results are kept for stale_if_error seconds, or max_age if it is longer, so
+they can be returned while the API is unavailable.
+"""
+
+import collections
+import copy
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CacheEntry = collections.namedtuple('CacheEntry', ['value', 'stored_at'])
+
+
+def get_cache_key(endpoint_name, identifier, query_params=None):
+    """Returns the cache key of an identifier's result, like
+    'property/value:{"address":"43 Valmonte Plz","zipcode":"90274"}'.
+
+    Args:
+        endpoint_name (str) - The endpoint, like "property/value".
+        identifier (dict) - The identifier as sent to the API.
+        query_params (dict) - Optional. The query params of the request, like components.
+    """
+    key_data = dict(query_params or {})
+    key_data.update(identifier)
+    return endpoint_name + ":" + json.dumps(key_data, sort_keys=True, separators=(",", ":"))
+
+
+class MemoryCacheBackend(object):
+    """Keeps cache entries in memory, evicting the least recently used ones.
+
+    Values are copied when they are stored and when they are returned, so
+    changing a result doesn't change the cached entry.
+    """
+
+    def __init__(self, max_entries=100000):
+        """
+        Args:
+            max_entries (int) - Optional. The most entries to keep. Default is 100000.
+        """
+        self._max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(self, keys):
+        """Returns a dict of key to CacheEntry for the keys that have an entry."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    # reinsert to mark it as the most recently used
+                    self._entries[key] = entry
+                    found[key] = CacheEntry(copy.deepcopy(entry.value), entry.stored_at)
+        return found
+
+    def set_many(self, entries, ttl=None):
+        """Stores a dict of key to CacheEntry.
+
+        Args:
+            entries (dict) - The entries to store.
+            ttl (float) - Optional. Seconds after which the backend may drop the
+                          entries. Entries are only dropped when the cache is full.
+        """
+        with self._lock:
+            for key, entry in entries.items():
+                self._entries.pop(key, None)
+                self._entries[key] = CacheEntry(copy.deepcopy(entry.value), entry.stored_at)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        """Removes the entries of keys."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class ResponseCache(object):
+    """Caches the json result of each identifier for `ttl` seconds.
+
+    Pass it as the cache of an ApiClient. Results between ttl and max_age seconds
+    old are stale: they are returned at once and refreshed in the background.
+    Older results are fetched again before returning, but are kept for
+    stale_if_error seconds so they can be served while the API is unavailable.
+    """
+
+    def __init__(self, ttl=3600, backend=None, max_age=None, refresh_workers=2,
+                 stale_if_error=86400):
+        """
+        Args:
+            ttl (float) - Optional. Seconds a result is fresh for. Default is 3600.
+            backend - Optional. Where entries are kept, like a MemoryCacheBackend.
+                      Default is a MemoryCacheBackend.
+            max_age (float) - Optional. Seconds a stale result may be returned for while
+                              it is refreshed. Default is ttl, which never returns
+                              stale results.
+            refresh_workers (int) - Optional. The number of threads refreshing stale
+                                    results. Default is 2.
+            stale_if_error (float) - Optional. Seconds a result may be returned for while
+                                     the circuit of its endpoint is open. The backend keeps
+                                     entries this long, or max_age if it is longer.
+                                     Default is 86400. None only keeps them for max_age.
+        """
+        self.ttl = ttl
+        self.max_age = max(ttl, max_age) if max_age is not None else ttl
+        self.stale_if_error = stale_if_error
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self._refresh_workers = refresh_workers
+        self._refresh_executor = None
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.num_refresh_errors = 0
+
+    @staticmethod
+    def get_key(endpoint_name, identifier, query_params=None):
+        """Returns the cache key of an identifier's result."""
+        return get_cache_key(endpoint_name, identifier, query_params)
+
+    def is_fresh(self, entry, now=None):
+        """Returns whether an entry is younger than ttl."""
+        return (now or time.time()) - entry.stored_at < self.ttl
+
+    def is_expired(self, entry, now=None):
+        """Returns whether an entry is too old to be returned while it is refreshed."""
+        return (now or time.time()) - entry.stored_at >= self.max_age
+
+    def get_retention(self):
+        """Returns the seconds entries are kept for."""
+        return max(self.max_age, self.stale_if_error or 0)
+
+    def is_usable_on_error(self, entry, now=None):
+        """Returns whether an entry may be returned while the API is unavailable."""
+        return (now or time.time()) - entry.stored_at < self.get_retention()
+
+    def get_entries(self, keys):
+        """Returns a dict of key to CacheEntry for the keys that have an entry,
+        fresh or not."""
+        return self.backend.get_many(keys)
+
+    def get(self, endpoint_name, identifier, query_params=None):
+        """Returns the fresh cached result of an identifier, or None."""
+        key = self.get_key(endpoint_name, identifier, query_params)
+        entry = self.backend.get_many([key]).get(key)
+        if entry is None or not self.is_fresh(entry):
+            return None
+        return entry.value
+
+    def set_many(self, values):
+        """Stores a dict of key to json result."""
+        now = time.time()
+        # keep the entries as long as they may be returned stale
+        self.backend.set_many(dict((key, CacheEntry(value, now))
+                                   for key, value in values.items()), self.get_retention())
+
+    def invalidate(self, keys):
+        """Removes the entries of keys."""
+        self.backend.delete_many(keys)
+
+    def refresh_in_background(self, keys, refresh):
+        """Calls refresh(keys) in a background thread for the keys that are not
+        being refreshed already, so concurrent lookups of a stale result make
+        a single request.
+
+        Args:
+            keys - The keys of the stale results.
+            refresh - A callable that fetches and stores the results of a list of keys.
+                      Its errors are counted in num_refresh_errors, and the results
+                      stay stale until a later lookup refreshes them.
+
+        Returns:
+            The future of the refresh, or None if every key is being refreshed.
+        """
+        with self._lock:
+            keys = [key for key in collections.OrderedDict.fromkeys(keys)
+                    if key not in self._refreshing]
+            if not keys:
+                return None
+            self._refreshing.update(keys)
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=self._refresh_workers)
+
+        def run():
+            try:
+                refresh(keys)
+            except Exception:  # pylint: disable=broad-except
+                with self._lock:
+                    self.num_refresh_errors += 1
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update(keys)
+
+        return self._refresh_executor.submit(run)
@@ -0,0 +1,175 @@
+"""
+Provides request clients that record API responses to a cassette file and
+replay them without a network connection.
+
+A cassette is a gzipped file of json lines, one per request and response.
+Requests are matched by method, url path, query params and a hash of the
+request body, so a cassette recorded against production can be replayed
+with any URL prefix. Response headers, including the rate limit headers,
+are kept so rate limit handling behaves the same on replay.
+"""
+
+import base64
+import collections
+import datetime
+import gzip
+import hashlib
+import json
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from housecanary.compat import urlsplit
+from housecanary.exceptions import CassetteMissException
+from housecanary.requestclient import RequestClient
+import housecanary.constants as constants
+
+RECORDED_LATENCY = "recorded"
+
+# headers that describe the transfer of the body, which is stored decoded
+_TRANSFER_HEADERS = frozenset(["content-encoding", "content-length", "transfer-encoding"])
+
+
+def get_request_key(http_method, url, query_params, post_data):
+    """Returns the key a request is matched by: method, url path, sorted query params
+    and the sha1 of the json body."""
+    params = sorted((str(key), str(value)) for key, value in (query_params or {}).items()
+                    if value is not None)
+    body_hash = None
+    if post_data is not None:
+        body_hash = hashlib.sha1(RequestClient._serialize_body(post_data)).hexdigest()
+    return json.dumps([http_method.upper(), urlsplit(url).path, params, body_hash],
+                      separators=(",", ":"))
+
+
+def _encode_content(content):
+    try:
+        return {"body": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_base64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_content(interaction):
+    if "body_base64" in interaction:
+        return base64.b64decode(interaction["body_base64"])
+    return interaction["body"].encode("utf-8")
+
+
+class RecordingRequestClient(RequestClient):
+    """A RequestClient that sends requests and records each response to a cassette file.
+
+    Use as a context manager, or call close when done to finish the file.
+    """
+
+    def __init__(self, cassette_path, output_generator=None, authenticator=None, hooks=None,
+                 compression=None, compression_threshold=constants.DEFAULT_COMPRESSION_THRESHOLD,
+                 timeout=constants.DEFAULT_TIMEOUT):
+        """
+        Args:
+            cassette_path (str) - The file to record to. An existing file is replaced.
+            Other args are the same as for RequestClient.
+        """
+        super(RecordingRequestClient, self).__init__(
+            output_generator, authenticator, hooks, compression, compression_threshold, timeout)
+        self._lock = threading.Lock()
+        self._file = gzip.open(cassette_path, "wb")
+        self.num_recorded = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _send_request(self, url, http_method, query_params, post_data, batch_size=None):
+        response = super(RecordingRequestClient, self)._send_request(
+            url, http_method, query_params, post_data, batch_size)
+
+        interaction = {
+            "request": get_request_key(http_method, url, query_params, post_data),
+            "status_code": response.status_code,
+            "headers": {key: value for key, value in response.headers.items()
+                        if key.lower() not in _TRANSFER_HEADERS},
+            "elapsed": response.elapsed.total_seconds(),
+        }
+        # reads a streamed body, the output generator then reads it from memory
+        interaction.update(_encode_content(response.content))
+
+        line = json.dumps(interaction, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self.num_recorded += 1
+
+        return response
+
+    def close(self):
+        """Finishes the cassette file."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class ReplayRequestClient(RequestClient):
+    """A RequestClient that serves responses from a cassette file instead of the network.
+
+    Requests that were recorded more than once are served in the order recorded,
+    and the last response is repeated when they run out.
+    """
+
+    def __init__(self, cassette_path, output_generator=None, hooks=None, latency=None):
+        """
+        Args:
+            cassette_path (str) - The cassette file to replay.
+            output_generator - Optional. Same as for RequestClient.
+            hooks - Optional. Same as for RequestClient.
+            latency - Optional. None (default) to respond immediately, a number of seconds
+                      to wait before each response, or "recorded" to wait for as long
+                      as each request took when it was recorded.
+        """
+        super(ReplayRequestClient, self).__init__(output_generator, None, hooks)
+        self._latency = latency
+        self._lock = threading.Lock()
+        self._interactions = {}
+
+        with gzip.open(cassette_path, "rb") as cassette_file:
+            for line in cassette_file:
+                interaction = json.loads(line.decode("utf-8"))
+                self._interactions.setdefault(
+                    interaction["request"], collections.deque()).append(interaction)
+
+    def __len__(self):
+        return sum(len(interactions) for interactions in self._interactions.values())
+
+    def _get_interaction(self, http_method, url, query_params, post_data):
+        key = get_request_key(http_method, url, query_params, post_data)
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                raise CassetteMissException(
+                    "No recorded response for {} {}".format(http_method, url))
+            if len(interactions) > 1:
+                return interactions.popleft()
+            return interactions[0]
+
+    def _send_request(self, url, http_method, query_params, post_data, batch_size=None):
+        interaction = self._get_interaction(http_method, url, query_params, post_data)
+
+        elapsed = interaction["elapsed"]
+        if self._latency == RECORDED_LATENCY:
+            time.sleep(elapsed)
+        elif self._latency:
+            elapsed = self._latency
+            time.sleep(elapsed)
+
+        response = requests.Response()
+        response.status_code = interaction["status_code"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = _decode_content(interaction)  # pylint: disable=protected-access
+        response._content_consumed = True  # pylint: disable=protected-access
+        # output generators read the endpoint name from the request url
+        response.request = requests.Request(http_method, url, params=query_params).prepare()
+        response.url = response.request.url
+        response.elapsed = datetime.timedelta(seconds=elapsed)
+        return response
@@ -0,0 +1,219 @@
+"""
+Provides a CircuitBreaker that stops an ApiClient from sending requests
+to an endpoint family ("property", "block", "zip" or "msa") while the API
+is failing or slow for it, so callers fail fast instead of piling up
+blocked threads.
+
+A circuit is closed while requests succeed. It opens when too many of the
+recent requests failed or were slow, and rejects requests for `open_seconds`.
+Then it is half-open and lets a few probe requests through: if they succeed
+it closes, otherwise it opens again. Only the outcomes of the probes count
+while it is half-open, not those of requests that were already in flight.
+"""
+
+import collections
+import contextlib
+import threading
+import time
+
+from housecanary import hooks as hook_events
+from housecanary.exceptions import CircuitOpenException
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_local = threading.local()
+
+
+def get_endpoint_family(endpoint_name):
+    """Returns the family of an endpoint, like "property" for "property/value"."""
+    return endpoint_name.split("/")[0]
+
+
+def get_current_probe():
+    """Returns the probe that before_request admitted in this thread, or None."""
+    return getattr(_local, 'probe', None)
+
+
+@contextlib.contextmanager
+def probe_applied(probe):
+    """A context manager that makes the responses received in this thread count
+    as the outcome of a probe, for requests sent from another thread."""
+    previous = get_current_probe()
+    _local.probe = probe
+    try:
+        yield probe
+    finally:
+        _local.probe = previous
+
+
+class _Circuit(object):
+    def __init__(self, window):
+        self.state = CLOSED
+        self.outcomes = collections.deque(maxlen=window)
+        self.changed_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        # the probes admitted while half-open whose outcome is not recorded yet
+        self.pending_probes = set()
+
+
+class CircuitBreaker(object):
+    """Tracks a circuit per endpoint family and rejects requests while it is open.
+
+    Pass it as the circuit_breaker of an ApiClient. It listens to the client's
+    response_received events and emits circuit_state_changed and request_rejected
+    events to its hooks.
+    """
+
+    def __init__(self, failure_ratio=0.5, min_requests=10, window=50, slow_call_duration=None,
+                 open_seconds=30.0, half_open_requests=1):
+        """
+        Args:
+            failure_ratio (float) - Optional. The circuit opens when at least this fraction
+                                    of the recent requests failed. Default is 0.5.
+            min_requests (int) - Optional. The circuit doesn't open before this many
+                                 requests were made. Default is 10.
+            window (int) - Optional. The number of recent requests to count failures
+                           over. Default is 50.
+            slow_call_duration (float) - Optional. Requests that take longer than this many
+                                         seconds count as failures. Default is None,
+                                         which doesn't count slow requests.
+            open_seconds (float) - Optional. Seconds the circuit stays open before probe
+                                   requests are let through. Default is 30.
+            half_open_requests (int) - Optional. The number of probe requests that must
+                                       succeed to close the circuit. Default is 1.
+        """
+        self._failure_ratio = failure_ratio
+        self._min_requests = max(1, int(min_requests))
+        self._window = max(self._min_requests, int(window))
+        self._slow_call_duration = slow_call_duration
+        self._open_seconds = open_seconds
+        self._half_open_requests = max(1, int(half_open_requests))
+
+        self._lock = threading.Lock()
+        self._circuits = {}
+        self._hooks = []
+
+    def attach(self, hooks):
+        """Listens to the response events of a client's hooks and emits circuit
+        events to them. Attaching the same hooks again does nothing."""
+        if any(attached is hooks for attached in self._hooks):
+            return
+        hooks.register(hook_events.RESPONSE_RECEIVED, self.on_response_received)
+        self._hooks.append(hooks)
+
+    def get_state(self, family):
+        """Returns the state of a family's circuit: "closed", "open" or "half_open"."""
+        with self._lock:
+            circuit = self._circuits.get(family)
+            if circuit is None:
+                return CLOSED
+            if circuit.state == OPEN and self._get_open_wait(circuit) == 0:
+                return HALF_OPEN
+            return circuit.state
+
+    def _get_circuit(self, family):
+        circuit = self._circuits.get(family)
+        if circuit is None:
+            circuit = self._circuits[family] = _Circuit(self._window)
+        return circuit
+
+    def _get_open_wait(self, circuit):
+        return max(circuit.changed_at + self._open_seconds - time.time(), 0.0)
+
+    def before_request(self, endpoint_name):
+        """Raises CircuitOpenException if a request to the endpoint may not be sent."""
+        family = get_endpoint_family(endpoint_name)
+        with self._lock:
+            circuit = self._get_circuit(family)
+            change = None
+            if circuit.state == OPEN and self._get_open_wait(circuit) == 0:
+                change = self._set_state(circuit, HALF_OPEN)
+            elif (circuit.state == HALF_OPEN and circuit.probes >= self._half_open_requests and
+                  self._get_open_wait(circuit) == 0):
+                # the outcome of the probes was never reported, so let new ones through
+                circuit.probes = 0
+                circuit.pending_probes.clear()
+                circuit.changed_at = time.time()
+
+            retry_after = None
+            probe = None
+            if circuit.state == OPEN:
+                retry_after = self._get_open_wait(circuit)
+            elif circuit.state == HALF_OPEN:
+                if circuit.probes < self._half_open_requests:
+                    circuit.probes += 1
+                    probe = object()
+                    circuit.pending_probes.add(probe)
+                else:
+                    retry_after = self._get_open_wait(circuit)
+
+        self._emit_change(family, change)
+        if retry_after is not None:
+            for hooks in self._hooks:
+                hooks.emit(hook_events.REQUEST_REJECTED, endpoint=endpoint_name, family=family)
+            raise CircuitOpenException(family, retry_after)
+        # the response of the request this thread sends next is the probe's outcome
+        _local.probe = probe
+
+    def on_response_received(self, endpoint, status_code, duration, **kwargs):
+        """Records the outcome of a response."""
+        if status_code >= 500:
+            self.record(endpoint, False)
+        elif self._slow_call_duration is not None and duration > self._slow_call_duration:
+            self.record(endpoint, False)
+        elif status_code < 400:
+            self.record(endpoint, True)
+
+    def on_error(self, endpoint_name):
+        """Records a request that failed without a response, like a timeout."""
+        self.record(endpoint_name, False)
+
+    def record(self, endpoint_name, success):
+        """Records the outcome of a request and opens or closes the circuit.
+
+        While the circuit is half-open, only the outcome of a probe admitted by
+        before_request in this thread, or applied with probe_applied, is recorded.
+        """
+        family = get_endpoint_family(endpoint_name)
+        with self._lock:
+            circuit = self._get_circuit(family)
+            change = None
+            if circuit.state == HALF_OPEN:
+                probe = get_current_probe()
+                # requests that were in flight before the circuit opened are not probes
+                if probe in circuit.pending_probes:
+                    circuit.pending_probes.discard(probe)
+                    if not success:
+                        change = self._set_state(circuit, OPEN)
+                    else:
+                        circuit.probe_successes += 1
+                        if circuit.probe_successes >= self._half_open_requests:
+                            change = self._set_state(circuit, CLOSED)
+            elif circuit.state == CLOSED:
+                circuit.outcomes.append(success)
+                num_failures = len(circuit.outcomes) - sum(circuit.outcomes)
+                if (len(circuit.outcomes) >= self._min_requests and
+                        num_failures >= self._failure_ratio * len(circuit.outcomes)):
+                    change = self._set_state(circuit, OPEN)
+        self._emit_change(family, change)
+
+    def _set_state(self, circuit, state):
+        previous_state = circuit.state
+        circuit.state = state
+        circuit.changed_at = time.time()
+        circuit.probes = 0
+        circuit.probe_successes = 0
+        circuit.pending_probes.clear()
+        circuit.outcomes.clear()
+        return state, previous_state
+
+    def _emit_change(self, family, change):
+        if change is None:
+            return
+        state, previous_state = change
+        for hooks in self._hooks:
+            hooks.emit(hook_events.CIRCUIT_STATE_CHANGED, family=family, state=state,
+                       previous_state=previous_state)
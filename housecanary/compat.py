@@ -0,0 +1,21 @@
+"""
+Python 2 and 3 compatibility helpers.
+
+On Python 3 these are the native types (string_types is a single type rather
+than a tuple because isinstance is faster that way) and nothing from the `future`
+package is imported, so hot code paths never go through compatibility wrappers.
+"""
+
+import sys
+
+PY2 = sys.version_info[0] == 2
+
+if PY2:
+    from builtins import str as text_type  # pylint: disable=redefined-builtin
+    string_types = basestring  # noqa: F821 pylint: disable=undefined-variable
+    from urllib import urlencode  # noqa: F401 pylint: disable=no-name-in-module
+    from urlparse import urlparse, urlsplit, parse_qsl, urlunparse  # noqa: F401
+else:
+    text_type = str
+    string_types = str
+    from urllib.parse import urlencode, urlparse, urlsplit, parse_qsl, urlunparse  # noqa: F401
@@ -6,3 +6,11 @@ BIZ_CODE_OK = 0
 
 URL_PREFIX = "https://api.housecanary.com"
 DEFAULT_VERSION = "v2"
+
+# request body compression
+COMPRESSION_ENCODINGS = ("gzip", "deflate", "br")
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+COMPRESSION_LEVEL = 6
+
+# (connect, read) timeouts of a request in seconds
+DEFAULT_TIMEOUT = (10.0, 300.0)
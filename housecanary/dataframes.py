@@ -0,0 +1,121 @@
+"""
+Provides conversion between pandas DataFrames and Analytics API data.
+
+Identifiers are read from a DataFrame (or a pyarrow Table) column by column,
+and each endpoint's results are flattened with the same rules as the Excel
+export and built into a DataFrame from columns.
+
+pandas is an optional dependency, it is only imported when a DataFrame is built.
+"""
+
+from collections import OrderedDict
+
+from housecanary import schemas
+
+RESULT_INFO_KEYS = {
+    'property': 'address_info',
+    'block': 'block_info',
+    'zip': 'zipcode_info',
+    'msa': 'msa_info',
+}
+
+NOD_DEFAULT_HISTORY = 'property/nod/default_history'
+
+
+def _import_pandas():
+    try:
+        import pandas
+    except ImportError:
+        raise ImportError(
+            "DataFrame support requires pandas. Install it with `pip install pandas`.")
+    return pandas
+
+
+def get_identifier_columns(data):
+    """Returns the input as something convert_identifier_columns accepts.
+
+    Args:
+        data - A pandas DataFrame, a pyarrow Table or a dict of lists.
+    """
+    if hasattr(data, 'to_pydict') and not hasattr(data, 'iloc'):
+        # a pyarrow Table, to_pydict builds python lists a column at a time
+        return data.to_pydict()
+    return data
+
+
+def get_endpoint_columns(api_data, endpoints, result_info_key, identifier_keys):
+    """Flattens the results of each endpoint into columns.
+
+    Uses the same flattening rules as the Excel export. Endpoints with a registered
+    ResultSchema get the schema's columns and typed values. property/nod is split
+    into 'property/nod' and 'property/nod/default_history', like its two worksheets.
+
+    Args:
+        api_data - Analytics API data as a list of dicts (one per identifier).
+                   The dicts are modified.
+        endpoints - The endpoint names to convert.
+        result_info_key - The key in api_data dicts that contains the identifier info.
+        identifier_keys - The keys used as requested identifiers (address, zipcode, etc).
+
+    Returns:
+        An OrderedDict of endpoint name to (column names, dict of column name to list)
+    """
+    from housecanary.excel import analytics_data_excel
+
+    data_list = analytics_data_excel.get_cleaned_data(api_data, result_info_key)
+
+    endpoint_rows = OrderedDict()
+    for endpoint in endpoints:
+        if endpoint == 'property/nod':
+            details, history = analytics_data_excel.process_property_nod_data(
+                data_list, result_info_key, identifier_keys)
+            endpoint_rows[endpoint] = details
+            endpoint_rows[NOD_DEFAULT_HISTORY] = history
+        else:
+            endpoint_rows[endpoint] = analytics_data_excel.process_data(
+                endpoint, data_list, result_info_key, identifier_keys)
+
+    endpoint_columns = OrderedDict()
+    for endpoint, rows in endpoint_rows.items():
+        schema = schemas.get_schema(endpoint)
+        if rows and not isinstance(rows[0], dict):
+            # results that are lists of plain values go in a single column
+            endpoint_columns[endpoint] = (['value'], {'value': rows})
+        elif schema is not None:
+            endpoint_columns[endpoint] = _get_schema_columns(schema, identifier_keys, rows)
+        else:
+            keys = analytics_data_excel.get_keys(rows) if rows else []
+            endpoint_columns[endpoint] = (keys, {key: [row.get(key) for row in rows]
+                                                 for key in keys})
+    return endpoint_columns
+
+
+def _get_schema_columns(schema, identifier_keys, rows):
+    """Returns the (column names, dict of column name to list) of rows with a schema,
+    collected in a single pass. Keys that are not in the schema follow its columns, sorted."""
+    keys = schema.get_columns(identifier_keys)
+    columns = dict((key, [None] * len(rows)) for key in keys)
+    extra_keys = []
+    for idx, row in enumerate(rows):
+        for key, value in row.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * len(rows)
+                extra_keys.append(key)
+            column[idx] = schema.convert_value(key, value)
+    return keys + sorted(extra_keys), columns
+
+
+def to_frames(api_data, endpoints, result_info_key, identifier_keys):
+    """Returns an OrderedDict of endpoint name to a pandas DataFrame of its flattened results.
+
+    Args are the same as for get_endpoint_columns.
+    """
+    pandas = _import_pandas()
+
+    frames = OrderedDict()
+    endpoint_columns = get_endpoint_columns(api_data, endpoints, result_info_key,
+                                            identifier_keys)
+    for endpoint, (keys, columns) in endpoint_columns.items():
+        frames[endpoint] = pandas.DataFrame(columns, columns=keys)
+    return frames
@@ -0,0 +1,401 @@
+"""
+Provides a Dispatcher for running batches of API calls concurrently
+while keeping a bounded number of them in flight, AdaptiveConcurrency
+for adjusting that bound to the API's latency and rate limits, and
+Deadline for limiting the time of a whole job.
+"""
+
+import collections
+import contextlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+from housecanary import hooks as hook_events
+from housecanary import utilities
+from housecanary.exceptions import DeadlineExceededException, RateLimitException
+import housecanary.constants as constants
+
+_local = threading.local()
+
+
+class Deadline(object):
+    """A point in time by which a job must be done.
+
+    While a deadline is applied to a thread, requests made in that thread are not
+    sent after it expires and their timeouts are capped at the time remaining.
+    """
+
+    def __init__(self, seconds):
+        """
+        Args:
+            seconds (float) - The time from now until the deadline.
+        """
+        self.expires_at = time.time() + seconds
+
+    @classmethod
+    def create(cls, deadline):
+        """Returns deadline as a Deadline. deadline can be a Deadline, seconds or None."""
+        if deadline is None or isinstance(deadline, Deadline):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self):
+        """Returns the seconds until the deadline, or 0 if it has passed."""
+        return max(self.expires_at - time.time(), 0.0)
+
+    def expired(self):
+        """Returns whether the deadline has passed."""
+        return time.time() >= self.expires_at
+
+    @contextlib.contextmanager
+    def applied(self):
+        """A context manager that applies the deadline to requests made in this thread."""
+        previous = getattr(_local, 'deadline', None)
+        _local.deadline = self
+        try:
+            yield self
+        finally:
+            _local.deadline = previous
+
+
+def get_current_deadline():
+    """Returns the Deadline applied to this thread, or None."""
+    return getattr(_local, 'deadline', None)
+
+
+class AdaptiveConcurrency(object):
+    """Adjusts the number of calls in flight with additive increase, multiplicative decrease.
+
+    The limit grows by one for every `limit` successful responses while latency is
+    stable and the rate limit has requests to spare. It is multiplied by `backoff`
+    on a 429 response, a timeout or a latency spike. Responses to requests that were
+    sent before the last decrease don't decrease it again.
+
+    Calls that are throttled with a 429 response are retried at the reduced limit,
+    after the rate limit resets or an exponential backoff, up to `max_retries` times.
+
+    Pass it as the concurrency of ApiClient.iter_fetch, ApiClient.fetch_to_store or
+    an MgetPlanner. It listens to the client's response_received events and emits
+    concurrency_changed events with the starting limit and each new limit, and retry
+    events for the throttled calls it retries.
+    """
+
+    def __init__(self, initial_limit=4, min_limit=1, max_limit=32, backoff=0.5,
+                 latency_tolerance=2.0, min_rate_limit_remaining=0.1, smoothing=0.1,
+                 max_retries=3, retry_delay=1.0, max_retry_delay=300):
+        """
+        Args:
+            initial_limit (int) - Optional. The starting limit. Default is 4.
+            min_limit (int) - Optional. The lowest limit. Default is 1.
+            max_limit (int) - Optional. The highest limit. Default is 32.
+            backoff (float) - Optional. The factor the limit is multiplied by on
+                              a decrease. Default is 0.5.
+            latency_tolerance (float) - Optional. A response that takes longer than this
+                                        multiple of the average response time is a latency
+                                        spike. Default is 2.0.
+            min_rate_limit_remaining (float) - Optional. The limit doesn't grow while fewer
+                                               than this fraction of the rate limit's
+                                               requests remain. Default is 0.1.
+            smoothing (float) - Optional. The weight of each response time in the moving
+                                average response time. Default is 0.1.
+            max_retries (int) - Optional. How many times a throttled call is retried.
+                                Default is 3.
+            retry_delay (float) - Optional. Seconds before the first retry of a throttled
+                                  call when the rate limit reset is unknown, doubled for
+                                  each retry. Default is 1.
+            max_retry_delay (float) - Optional. A throttled call is not retried if the rate
+                                      limit resets later than this. Default is 300.
+        """
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self._limit = min(max(int(initial_limit), self.min_limit), self.max_limit)
+        self._backoff = backoff
+        self._latency_tolerance = latency_tolerance
+        self._min_rate_limit_remaining = min_rate_limit_remaining
+        self._smoothing = smoothing
+        self.max_retries = max_retries
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+
+        self._lock = threading.Lock()
+        self._average_duration = None
+        self._num_successes = 0
+        self._last_decrease = 0.0
+        self._hooks = []
+
+    @property
+    def limit(self):
+        """The current number of calls allowed in flight."""
+        return self._limit
+
+    def attach(self, hooks):
+        """Listens to the response events of a client's hooks and emits
+        concurrency_changed events to them. Attaching the same hooks again does nothing."""
+        if any(attached is hooks for attached in self._hooks):
+            return
+        hooks.register(hook_events.RESPONSE_RECEIVED, self.on_response_received)
+        self._hooks.append(hooks)
+
+    def start(self):
+        """Emits the current limit, so it is reported before it first changes.
+        Called by the Dispatcher when a run starts."""
+        self._emit((None, 'start'))
+
+    def on_response_received(self, duration, status_code, rate_limit_remaining=None,
+                             rate_limit_limit=None, **kwargs):
+        """Adjusts the limit for a response."""
+        sent_at = time.time() - duration
+
+        with self._lock:
+            if status_code == constants.HTTP_TOO_MANY_REQUESTS:
+                change = self._decrease('throttled', sent_at)
+            elif status_code >= 400:
+                change = None
+            elif (self._average_duration is not None and
+                  duration > self._average_duration * self._latency_tolerance):
+                self._update_average_duration(duration)
+                change = self._decrease('latency', sent_at)
+            else:
+                self._update_average_duration(duration)
+                change = None
+                if self._has_rate_limit_to_spare(rate_limit_remaining, rate_limit_limit):
+                    change = self._increase()
+
+        self._emit(change)
+
+    def on_error(self, error):
+        """Adjusts the limit for a call that raised an error. Decreases it on timeouts."""
+        if isinstance(error, requests.exceptions.Timeout):
+            with self._lock:
+                change = self._decrease('timeout', time.time())
+            self._emit(change)
+
+    def get_retry_delay(self, error, attempt):
+        """Returns the seconds to wait before retrying a call that raised an error,
+        or None if it should not be retried.
+
+        Args:
+            error - The exception the call raised.
+            attempt (int) - The number of times the call was retried already.
+        """
+        if not isinstance(error, RateLimitException) or attempt >= self.max_retries:
+            return None
+        delay = self._retry_delay * 2 ** attempt
+        try:
+            delay = max(delay, error.rate_limits[0]["reset_in_seconds"])
+        except (AttributeError, IndexError, KeyError, TypeError):
+            # the response has no rate limit headers
+            pass
+        if delay > self._max_retry_delay:
+            return None
+        return delay
+
+    def on_retry(self, error, attempt, delay):
+        """Emits a retry event for a call that is retried after delay seconds.
+
+        Args:
+            error - The exception the call raised.
+            attempt (int) - The number of the retry, starting at 1.
+            delay (float) - The seconds until the retry is sent.
+        """
+        endpoint = None
+        response = getattr(error, '_response', None)
+        if response is not None:
+            endpoint = utilities.get_endpoint_name_from_url(response.url)
+        for hooks in self._hooks:
+            hooks.emit(hook_events.RETRY, endpoint=endpoint, attempt=attempt, wait=delay)
+
+    def _update_average_duration(self, duration):
+        if self._average_duration is None:
+            self._average_duration = duration
+        else:
+            self._average_duration += self._smoothing * (duration - self._average_duration)
+
+    def _has_rate_limit_to_spare(self, remaining, limit):
+        if remaining is None or not limit:
+            return True
+        return float(remaining) / limit >= self._min_rate_limit_remaining
+
+    def _increase(self):
+        self._num_successes += 1
+        if self._num_successes < self._limit or self._limit >= self.max_limit:
+            return None
+        self._num_successes = 0
+        previous_limit = self._limit
+        self._limit += 1
+        return previous_limit, 'increase'
+
+    def _decrease(self, reason, sent_at):
+        if sent_at < self._last_decrease:
+            # this request was already in flight when the limit last went down
+            return None
+        self._last_decrease = time.time()
+        self._num_successes = 0
+        previous_limit = self._limit
+        self._limit = max(self.min_limit, int(self._limit * self._backoff))
+        return previous_limit, reason
+
+    def _emit(self, change):
+        if change is None:
+            return
+        previous_limit, reason = change
+        for hooks in self._hooks:
+            hooks.emit(hook_events.CONCURRENCY_CHANGED, limit=self._limit,
+                       previous_limit=previous_limit, reason=reason)
+
+
+class Dispatcher(object):
+    """Runs a function over a stream of items on a thread pool."""
+
+    def __init__(self, max_workers=4):
+        """
+        Args:
+            max_workers - Optional. The maximum number of calls in flight at once,
+                          or an AdaptiveConcurrency that sets it. Default is 4.
+        """
+        if isinstance(max_workers, AdaptiveConcurrency):
+            self._controller = max_workers
+            self._pool_size = max_workers.max_limit
+        else:
+            self._controller = None
+            self._pool_size = max(1, int(max_workers))
+
+    @property
+    def max_workers(self):
+        """The maximum number of calls in flight at once."""
+        if self._controller is not None:
+            return self._controller.limit
+        return self._pool_size
+
+    def imap(self, func, items, ordered=True, deadline=None):
+        """Calls func on each item and yields the results.
+
+        Items are pulled from the iterable lazily, so at most max_workers
+        items are held by the dispatcher at any time. With an AdaptiveConcurrency,
+        its current limit is checked each time a call completes, and throttled
+        calls are retried after the delay it returns.
+
+        Args:
+            func - A callable taking a single item.
+            items - Any iterable of items.
+            ordered - Optional. If True (default), results are yielded in the order of
+                      items. Otherwise results are yielded as they complete.
+            deadline - Optional. A Deadline or a number of seconds for the whole run.
+                       The deadline is applied to the threads running func.
+
+        Returns:
+            A generator of func results.
+
+        Raises:
+            DeadlineExceededException when the deadline passes. Calls that were not
+            started are cancelled, and calls in flight are left to finish in the
+            background. partial_result is the list of results that completed but were
+            not yielded yet, in the order of items.
+        """
+        deadline = Deadline.create(deadline)
+        if deadline is not None:
+            func = _with_deadline(func, deadline)
+
+        iterator = iter(items)
+        executor = ThreadPoolExecutor(max_workers=self._pool_size)
+        in_flight = collections.deque()
+        # the item and retry count of each future
+        submitted = {}
+        expired = False
+
+        def submit(item, attempt=0, delay=0):
+            future = executor.submit(_call_later, func, item, delay, deadline)
+            submitted[future] = (item, attempt)
+            return future
+
+        def submit_next():
+            for item in iterator:
+                in_flight.append(submit(item))
+                return True
+            return False
+
+        def fill():
+            while len(in_flight) < self.max_workers and submit_next():
+                pass
+
+        if self._controller is not None:
+            self._controller.start()
+
+        try:
+            fill()
+
+            while in_flight:
+                timeout = deadline.remaining() if deadline is not None else None
+                if ordered:
+                    done, _ = wait([in_flight[0]], timeout=timeout)
+                    future = in_flight.popleft() if done else None
+                else:
+                    done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                    future = done.pop() if done else None
+                    if future is not None:
+                        in_flight.remove(future)
+
+                # a call that started after the deadline raises it from its thread
+                if future is None or isinstance(future.exception(), DeadlineExceededException):
+                    expired = True
+                    raise DeadlineExceededException(
+                        "Deadline exceeded with {} calls in flight".format(len(in_flight)),
+                        [f.result() for f in in_flight if f.done() and not f.exception()])
+
+                item, attempt = submitted.pop(future)
+                error = future.exception()
+                if self._controller is not None and error is not None:
+                    self._controller.on_error(error)
+                    delay = self._controller.get_retry_delay(error, attempt)
+                    if delay is not None:
+                        self._controller.on_retry(error, attempt + 1, delay)
+                        retry = submit(item, attempt + 1, delay)
+                        if ordered:
+                            # keep the retry in the place of the call
+                            in_flight.appendleft(retry)
+                        else:
+                            in_flight.append(retry)
+                        continue
+                result = future.result()
+                fill()
+                yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
+            # don't wait for calls that are still running after the deadline
+            executor.shutdown(wait=not expired)
+
+    def map(self, func, items, deadline=None):
+        """Calls func on each item and returns a list of results in the order of items.
+
+        Raises:
+            DeadlineExceededException when the deadline passes, with partial_result
+            set to the list of results that completed, in the order of items.
+        """
+        results = []
+        try:
+            for result in self.imap(func, items, deadline=deadline):
+                results.append(result)
+        except DeadlineExceededException as e:
+            e.partial_result = results + e.partial_result
+            raise
+        return results
+
+
+def _call_later(func, item, delay, deadline):
+    """Calls func(item) after delay seconds, or at the deadline if it comes first."""
+    if delay:
+        if deadline is not None:
+            delay = min(delay, deadline.remaining())
+        time.sleep(delay)
+    return func(item)
+
+
+def _with_deadline(func, deadline):
+    def run(item):
+        with deadline.applied():
+            return func(item)
+    return run
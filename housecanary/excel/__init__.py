@@ -3,6 +3,7 @@
 from __future__ import print_function
 import os
 import csv
+import datetime
 import time
 import io
 import sys
@@ -14,6 +15,9 @@ from . import utilities
 from .. import ApiClient
 from .. import exceptions
 
+# the number format openpyxl gives cells of datetime.date values
+DATE_FORMAT = 'yyyy-mm-dd'
+
 
 def export_analytics_data_to_excel(data, output_file_name, result_info_key, identifier_keys):
     """Creates an Excel file containing data returned by the Analytics API
@@ -55,11 +59,19 @@ def export_analytics_data_to_csv(data, output_folder, result_info_key, identifie
         with io.open(file_path, mode) as output_file:
             csv_writer = csv.writer(output_file)
             for row in worksheet.rows:
-                csv_writer.writerow([cell.value for cell in row])
+                csv_writer.writerow([_get_csv_value(cell) for cell in row])
 
     print('Saved CSV files to {}'.format(output_folder))
 
 
+def _get_csv_value(cell):
+    """Returns the value of a cell to write to a CSV file. openpyxl keeps dates as
+    datetimes, which are written as ISO dates, like "2016-01-01", as the API returns them."""
+    if isinstance(cell.value, datetime.datetime) and cell.number_format == DATE_FORMAT:
+        return cell.value.date().isoformat()
+    return cell.value
+
+
 def concat_excel_reports(addresses, output_file_name, endpoint, report_type,
                          retry, api_key, api_secret, files_path):
     """Creates an Excel file made up of combining the Value Report or Rental Report Excel
@@ -235,10 +247,10 @@ def _save_individual_file(workbook, files_path, addr):
 
 
 def create_excel_workbook(data, result_info_key, identifier_keys):
-    """Calls the analytics_data_excel module to create the Workbook"""
-    workbook = analytics_data_excel.get_excel_workbook(data, result_info_key, identifier_keys)
-    adjust_column_width_workbook(workbook)
-    return workbook
+    """Calls the analytics_data_excel module to create the Workbook.
+       Column widths are set as the worksheets are written.
+    """
+    return analytics_data_excel.get_excel_workbook(data, result_info_key, identifier_keys)
 
 
 def adjust_column_width_workbook(workbook):
@@ -1,28 +1,16 @@
 import copy
 import openpyxl
 
+from housecanary import schemas
 from . import utilities
+from .rows import RowAssembler, set_column_widths
 
 
 KEY_TO_WORKSHEET_MAP = {
     'Msa Details': 'MSA Details'
 }
 
-LEADING_COLUMNS = (
-    'address',
-    'unit',
-    'city',
-    'state',
-    'zipcode',
-    'slug',
-    'block_id',
-    'msa',
-    'num_bins',
-    'property_type',
-    'client_value',
-    'client_value_sqft',
-    'meta'
-)
+LEADING_COLUMNS = schemas.IDENTIFIER_COLUMNS
 
 LEADING_WORKSHEETS = ()
 
@@ -40,6 +28,25 @@ def get_excel_workbook(api_data, result_info_key, identifier_keys):
         raw excel file data
     """
 
+    data_list = copy.deepcopy(get_cleaned_data(api_data, result_info_key))
+
+    workbook = openpyxl.Workbook()
+
+    write_worksheets(workbook, data_list, result_info_key, identifier_keys)
+
+    return workbook
+
+
+def get_cleaned_data(api_data, result_info_key):
+    """Replaces each component's response with just its result
+
+    Args:
+        api_data: Analytics API data as a list of dicts (one per identifier)
+        result_info_key: the key in api_data dicts that contains the data results
+
+    Returns:
+        A list of dicts of endpoint name to result, with the result_info_key and meta
+    """
     cleaned_data = []
 
     for item_data in api_data:
@@ -58,13 +65,7 @@ def get_excel_workbook(api_data, result_info_key, identifier_keys):
 
         cleaned_data.append(cleaned_item_data)
 
-    data_list = copy.deepcopy(cleaned_data)
-
-    workbook = openpyxl.Workbook()
-
-    write_worksheets(workbook, data_list, result_info_key, identifier_keys)
-
-    return workbook
+    return cleaned_data
 
 
 def write_worksheets(workbook, data_list, result_info_key, identifier_keys):
@@ -100,7 +101,7 @@ def write_worksheets(workbook, data_list, result_info_key, identifier_keys):
 
             processed_data = process_data(key, data_list, result_info_key, identifier_keys)
 
-            write_data(worksheet, processed_data)
+            write_data(worksheet, processed_data, schemas.get_schema(key), identifier_keys)
 
     # remove the first, unused empty sheet
     workbook.remove_sheet(workbook.active)
@@ -118,6 +119,27 @@ def create_property_nod_worksheets(workbook, data_list, result_info_key, identif
             identifier_keys: the list of keys used as requested identifiers
                             (address, zipcode, city, state, etc)
     """
+    nod_details_list, nod_default_history_list = process_property_nod_data(
+        data_list, result_info_key, identifier_keys)
+
+    worksheet = workbook.create_sheet(title='NOD Details')
+    write_data(worksheet, nod_details_list)
+
+    worksheet = workbook.create_sheet(title='NOD Default History')
+    write_data(worksheet, nod_default_history_list)
+
+
+def process_property_nod_data(data_list, result_info_key, identifier_keys):
+    """Splits the property/nod data into the details and the default history rows.
+
+       Args:
+            data_list: the main list of data
+            result_info_key: the key in api_data dicts that contains the data results
+            identifier_keys: the list of keys used as requested identifiers
+
+       Returns:
+            A tuple of (details rows, default history rows)
+    """
     nod_details_list = []
     nod_default_history_list = []
 
@@ -137,11 +159,7 @@ def create_property_nod_worksheets(workbook, data_list, result_info_key, identif
             _set_identifier_fields(item, prop_data, result_info_key, identifier_keys)
             nod_default_history_list.append(item)
 
-    worksheet = workbook.create_sheet(title='NOD Details')
-    write_data(worksheet, nod_details_list)
-
-    worksheet = workbook.create_sheet(title='NOD Default History')
-    write_data(worksheet, nod_default_history_list)
+    return nod_details_list, nod_default_history_list
 
 
 def get_worksheet_keys(data_dict, result_info_key):
@@ -182,12 +200,17 @@ def get_keys(data_list, leading_columns=LEADING_COLUMNS):
     return leading_keys + sorted(all_keys)
 
 
-def write_data(worksheet, data):
-    """Writes data into worksheet.
+def write_data(worksheet, data, schema=None, identifier_keys=()):
+    """Writes data into worksheet and sets its column widths.
+
+    Rows of dicts are assembled in a single pass, see rows.RowAssembler.
 
     Args:
         worksheet: worksheet to write into
         data: data to be written
+        schema: Optional. The endpoint's ResultSchema. If given, the schema's columns
+                that any row has come first and values are written with the schema's types.
+        identifier_keys: the list of keys used as requested identifiers, used with schema
     """
     if not data:
         return
@@ -198,25 +221,28 @@ def write_data(worksheet, data):
         rows = [data]
 
     if isinstance(rows[0], dict):
-        keys = get_keys(rows)
-        worksheet.append([utilities.convert_snake_to_title_case(key) for key in keys])
-        for row in rows:
-            values = [get_value_from_row(row, key) for key in keys]
-            worksheet.append(values)
-    elif isinstance(rows[0], list):
-        for row in rows:
-            values = [utilities.normalize_cell_value(value) for value in row]
-            worksheet.append(values)
-    else:
+        if schema is not None:
+            assembler = RowAssembler(leading_columns=schema.get_columns(identifier_keys),
+                                     convert_value=schema.convert_value)
+        else:
+            assembler = RowAssembler(leading_columns=LEADING_COLUMNS)
         for row in rows:
-            worksheet.append([utilities.normalize_cell_value(row)])
-
+            assembler.add(row)
+        assembler.write(worksheet)
+        return
 
-def get_value_from_row(row, key):
-    """Gets a value and normalizes it's value"""
-    if key in row:
-        return utilities.normalize_cell_value(row[key])
-    return ''
+    widths = []
+    for row in rows:
+        if not isinstance(row, list):
+            row = [row]
+        values = [utilities.normalize_cell_value(value) for value in row]
+        worksheet.append(values)
+        for position, value in enumerate(values):
+            if position == len(widths):
+                widths.append(0)
+            if value:
+                widths[position] = max(widths[position], len(str(value)))
+    set_column_widths(worksheet, widths)
 
 
 def process_data(key, data_list, result_info_key, identifier_keys):
@@ -304,7 +330,7 @@ def _set_identifier_fields(item, item_data, result_info_key, identifier_keys):
             item['meta'] = item_data['meta']
 
         # skip the special query param keys since they are not always returned in the result info
-        elif k not in ['client_value', 'client_value_sqft', 'num_bins', 'property_type']:
+        elif k not in schemas.QUERY_PARAM_KEYS:
             item[k] = result_info[k]
 
 
@@ -0,0 +1,110 @@
+"""Assembles worksheet rows from dicts in a single pass.
+
+Column keys, column widths and cell values are collected while the rows are
+added. The header can only be written once every key is known, so assembled
+rows are kept until then as sparse (column, value) pairs, which are smaller
+than the cells openpyxl creates for them.
+"""
+
+from openpyxl.utils import get_column_letter
+
+from . import utilities
+
+COLUMN_PADDING = 1
+
+
+class RowAssembler(object):
+    """Builds the rows of a worksheet from dicts of column key to value."""
+
+    def __init__(self, leading_columns=(), convert_value=None):
+        """
+        Args:
+            leading_columns - Optional. Column keys that are written first, in order,
+                              if any row has them. Other keys follow, sorted.
+            convert_value - Optional. A function of (key, value) that returns the value to
+                            write. Default is to serialize lists and dicts to json.
+        """
+        self._leading_columns = leading_columns
+        self._convert_value = convert_value or _normalize_cell_value
+
+        self._keys = []
+        self._indexes = {}
+        self._widths = []
+
+        self._rows = []
+        self.num_rows = 0
+
+    def _add_key(self, key):
+        index = len(self._keys)
+        self._indexes[key] = index
+        self._keys.append(key)
+        self._widths.append(0)
+        return index
+
+    def add(self, row):
+        """Adds a row dict, converting and measuring each value once."""
+        indexes = self._indexes
+        widths = self._widths
+        convert_value = self._convert_value
+
+        cells = []
+        for key, value in row.items():
+            index = indexes.get(key)
+            if index is None:
+                index = self._add_key(key)
+            value = convert_value(key, value)
+            if value:
+                width = len(str(value))
+                if width > widths[index]:
+                    widths[index] = width
+            cells.append((index, value))
+
+        self._rows.append(cells)
+        self.num_rows += 1
+
+    def get_columns(self):
+        """Returns the column keys in the order they are written."""
+        columns = [key for key in self._leading_columns if key in self._indexes]
+        written = set(columns)
+        columns.extend(sorted(key for key in self._keys if key not in written))
+        return columns
+
+    def write(self, worksheet):
+        """Appends the header and the rows to worksheet and sets the column widths."""
+        columns = self.get_columns()
+        positions = [0] * len(self._keys)
+        for position, key in enumerate(columns):
+            positions[self._indexes[key]] = position
+
+        header = [utilities.convert_snake_to_title_case(key) for key in columns]
+        worksheet.append(header)
+
+        num_columns = len(columns)
+        for cells in self._rows:
+            values = [''] * num_columns
+            for index, value in cells:
+                values[positions[index]] = value
+            worksheet.append(values)
+
+        widths = [max(len(title), self._widths[self._indexes[key]])
+                  for key, title in zip(columns, header)]
+        set_column_widths(worksheet, widths)
+
+        self._rows = []
+
+
+def _normalize_cell_value(key, value):
+    return utilities.normalize_cell_value(value)
+
+
+def set_column_widths(worksheet, widths):
+    """Sets the widths of the worksheet's columns, skipping empty (0) columns.
+
+    Args:
+        worksheet: worksheet to be adjusted
+        widths: list of the longest value length in each column
+    """
+    for position, width in enumerate(widths):
+        if width:
+            worksheet.column_dimensions[get_column_letter(position + 1)].width = \
+                width + COLUMN_PADDING
@@ -45,3 +45,56 @@ class UnauthorizedException(RequestException):
 class InvalidInputException(Exception):
     """Exception representing invalid input passed to the API Client."""
     pass
+
+
+class CassetteMissException(Exception):
+    """Exception for a request that has no recorded response in a replayed cassette."""
+    pass
+
+
+class DeadlineExceededException(Exception):
+    """Exception for a job that did not finish before its deadline.
+
+    The results that completed in time are available as partial_result.
+    """
+
+    def __init__(self, message, partial_result=None):
+        Exception.__init__(self, message)
+        self.partial_result = partial_result
+
+
+class IncompleteResultException(Exception):
+    """Exception for a batch whose result does not have one item per identifier.
+
+    The identifiers of the batch are available as identifiers.
+    """
+
+    def __init__(self, endpoint_name, identifiers, num_results):
+        Exception.__init__(self, "{} returned {} results for {} identifiers".format(
+            endpoint_name, num_results, len(identifiers)))
+        self.identifiers = identifiers
+
+
+class CircuitOpenException(Exception):
+    """Exception for a request that was not sent because the circuit of its
+    endpoint family is open.
+
+    retry_after is the number of seconds until requests are let through again.
+    """
+
+    def __init__(self, family, retry_after):
+        Exception.__init__(self, "The circuit for {} endpoints is open, retry in {:.1f} "
+                                 "seconds".format(family, retry_after))
+        self.family = family
+        self.retry_after = retry_after
+
+
+class CacheBackendException(Exception):
+    """Exception for an error reply or a protocol error from a cache server."""
+    pass
+
+
+class ResultStoreException(Exception):
+    """Exception for a ResultStore whose data file can't be opened as a store,
+    like one whose index file is missing."""
+    pass
@@ -77,6 +77,7 @@ import time
 from builtins import str
 from docopt import docopt
 import housecanary
+from housecanary.planner import MgetPlanner
 
 
 def hc_api_export(docopt_args):
@@ -162,8 +163,9 @@ def _get_results_from_api(identifiers, endpoints, api_key, api_secret):
     wrapper = getattr(client, endpoints[0].split('/')[0])
 
     if len(endpoints) > 1:
-        # use component_mget to request multiple endpoints in one call
-        return wrapper.component_mget(identifiers, endpoints)
+        # use component_mget to request multiple endpoints,
+        # letting the planner split large jobs into several smaller calls
+        return wrapper.component_mget(identifiers, endpoints, planner=MgetPlanner())
     else:
         return wrapper.fetch_identifier_component(endpoints[0], identifiers)
 
@@ -0,0 +1,190 @@
+"""hc_api_prefetch - Takes a CSV file containing rows of property, zipcode, block or MSA identifiers
+                    and fills a shared Redis response cache with the results of the specified
+                    HouseCanary API endpoints, so they are served from the cache later.
+
+                    Run it off-peak, before the identifiers are queried. Results that are
+                    still fresh in the cache are not requested again. Requests are paced so
+                    a share of the rate limit is left for other clients: once only that share
+                    of the requests remains, the command waits for the rate limit to reset.
+
+                    The input CSV file has the same format as for hc_api_export.
+
+Usage:
+    hc_api_prefetch (<input> <endpoints>) [-c ADDRESS] [-d DB] [-t TTL] [-z COMPRESSION]
+                    [-f SHARE] [-u TIME] [-n NUMBER] [-b SIZE] [-k KEY] [-s SECRET] [-h?]
+
+Examples:
+    hc_api_prefetch sample_input/sample-input.csv property/value,property/details \
+        -c cache.internal:6379
+
+    hc_api_prefetch sample_input/sample-input.csv property/* -c cache.internal -t 86400 \
+        -f 0.3 -u 07:00
+
+    hc_api_prefetch sample_input/sample-input-zipcodes.csv zip/* -c cache.internal -z zlib
+
+Options:
+    input                           Required. An input CSV file containing identifiers
+
+    endpoints                       Required. A comma separated list of endpoints to prefetch like:
+                                      'property/value,property/school'
+                                    To prefetch all endpoints,
+                                      use 'property/*', 'block/*', 'zip/*' or 'msa/*'.
+
+    -c ADDRESS --cache=ADDRESS      Optional. The host and port of the Redis compatible cache
+                                    server, like 'cache.internal:6379'. Default is 'localhost:6379'.
+                                    The password can be set in the HC_REDIS_PASSWORD environment
+                                    variable.
+
+    -d DB --db=DB                   Optional. The Redis database number. Default is 0.
+
+    -t TTL --ttl=TTL                Optional. Seconds a cached result is fresh for. Results
+                                    cached more recently are not requested again. Use the ttl
+                                    of the clients that read the cache. The cache server keeps
+                                    results for a day, so they can be served while the API is
+                                    unavailable. Default is 3600.
+
+    -z COMPRESSION --compression=COMPRESSION
+                                    Optional. Compress cached results with 'zlib' or 'zstd'.
+
+    -f SHARE --free=SHARE           Optional. The share of the rate limit to leave free for
+                                    other clients. Default is 0.2.
+
+    -u TIME --until=TIME            Optional. A time of day like '07:00' to stop prefetching at,
+                                    so the peak hours are left alone.
+
+    -n NUMBER --concurrency=NUMBER  Optional. Requests in flight at once. Default is 4.
+
+    -b SIZE --batch-size=SIZE       Optional. Identifiers per request. Default is 100.
+
+    -k KEY --key=KEY                Optional API Key. Alternatively, you can use the HC_API_KEY
+                                    environment variable
+
+    -s SECRET --secret=SECRET       Optional API Secret. Alternatively, you can use the
+                                    HC_API_SECRET environment variable
+
+    -h -? --help                    Show usage
+"""
+
+
+from __future__ import print_function
+import datetime
+import os
+import sys
+from builtins import str
+from docopt import docopt
+import housecanary
+import housecanary.hooks
+from housecanary.cache import ResponseCache
+from housecanary.dispatch import Deadline
+from housecanary.output import JsonOutputGenerator
+from housecanary.redis_cache import RedisCacheBackend
+from housecanary.scheduler import PriorityClass, PriorityScheduler
+from housecanary.serialization import EntryCodec
+
+PREFETCH = 'prefetch'
+
+
+def hc_api_prefetch(docopt_args):
+    input_file_name = docopt_args['<input>']
+    endpoints = docopt_args['<endpoints>']
+    api_key = docopt_args['--key'] or None
+    api_secret = docopt_args['--secret'] or None
+
+    try:
+        identifiers = housecanary.excel_utilities.get_identifiers_from_input_file(input_file_name)
+    except Exception as ex:
+        print(str(ex))
+        sys.exit(2)
+
+    if len(identifiers) == 0:
+        print('No identifiers were found in the input file')
+        sys.exit(2)
+
+    if ',' in endpoints:
+        endpoints = endpoints.split(',')
+    elif '*' in endpoints:
+        endpoints = housecanary.excel_utilities.get_all_endpoints(endpoints.split('/')[0])
+    else:
+        endpoints = [endpoints]
+
+    # the reports are not returned per identifier, so they can't be cached
+    endpoints = [endpoint for endpoint in endpoints
+                 if endpoint not in ('property/value_report', 'property/rental_report')]
+
+    deadline = None
+    if docopt_args['--until']:
+        deadline = Deadline(_get_seconds_until(docopt_args['--until']))
+
+    try:
+        client = _get_client(docopt_args, api_key, api_secret)
+    except ValueError as ex:
+        print(str(ex))
+        sys.exit(2)
+    # appended to from the request threads
+    responses = []
+    client.hooks.register(housecanary.hooks.RESPONSE_RECEIVED,
+                          lambda **kwargs: responses.append(kwargs.get('endpoint')))
+
+    try:
+        for endpoint in endpoints:
+            num_results = _prefetch_endpoint(client, endpoint, identifiers, docopt_args, deadline)
+            print('{}: {} results cached'.format(endpoint, num_results))
+    except housecanary.exceptions.DeadlineExceededException:
+        print('Stopped prefetching at {}'.format(docopt_args['--until']))
+    except housecanary.exceptions.RateLimitException as e:
+        housecanary.excel_utilities.print_rate_limit_error(e.rate_limits[0])
+        sys.exit(2)
+    finally:
+        client.cache.backend.close()
+
+    print('{} requests sent'.format(len(responses)))
+
+
+def _prefetch_endpoint(client, endpoint, identifiers, docopt_args, deadline):
+    """Fetches an endpoint for the identifiers that have no fresh result in the cache,
+    which stores their results, and returns the number of results."""
+    num_results = 0
+    for _ in client.iter_fetch(endpoint, identifiers,
+                               batch_size=int(docopt_args['--batch-size'] or 100),
+                               concurrency=int(docopt_args['--concurrency'] or 4),
+                               ordered=False, priority=PREFETCH, deadline=deadline):
+        num_results += 1
+    return num_results
+
+
+def _get_client(docopt_args, api_key, api_secret):
+    host, _, port = (docopt_args['--cache'] or 'localhost').partition(':')
+    codec = EntryCodec(compression=docopt_args['--compression'] or None)
+    backend = RedisCacheBackend(host=host, port=int(port or 6379),
+                                db=int(docopt_args['--db'] or 0),
+                                password=os.getenv('HC_REDIS_PASSWORD'), codec=codec)
+
+    # without a max_age, results that are not fresh are fetched in the foreground,
+    # within the deadline, rather than refreshed in the background
+    cache = ResponseCache(ttl=float(docopt_args['--ttl'] or 3600), backend=backend)
+
+    # the free share of the rate limit is reserved for a class that prefetching never
+    # uses, while all of the requests in flight are left to prefetching
+    free = float(docopt_args['--free'] or 0.2)
+    scheduler = PriorityScheduler(
+        max_in_flight=int(docopt_args['--concurrency'] or 4),
+        classes=(PriorityClass('free', free), PriorityClass(PREFETCH, 0.0)),
+        default_class=PREFETCH, reserve_slots=False)
+
+    return housecanary.ApiClient(api_key, api_secret, output_generator=JsonOutputGenerator(),
+                                 cache=cache, scheduler=scheduler)
+
+
+def _get_seconds_until(time_of_day, now=None):
+    """Returns the seconds from now until the next time a time of day like '07:00' comes."""
+    now = now or datetime.datetime.now()
+    hour, minute = [int(part) for part in time_of_day.split(':')]
+    until = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if until <= now:
+        until += datetime.timedelta(days=1)
+    return (until - now).total_seconds()
+
+
+def main():
+    args = docopt(__doc__)
+    hc_api_prefetch(args)
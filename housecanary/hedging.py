@@ -0,0 +1,162 @@
+"""
+Provides a HedgingPolicy which cuts the tail latency of single identifier
+lookups by sending a duplicate of a GET request that is slower than usual
+and taking whichever response arrives first.
+"""
+
+import collections
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from housecanary import hooks as hook_events
+from housecanary import utilities
+from housecanary.circuitbreaker import get_current_probe, probe_applied
+from housecanary.dispatch import get_current_deadline
+
+
+class HedgingPolicy(object):
+    """Decides when to hedge a request and runs the hedged requests.
+
+    A request is hedged when it has not answered after the `percentile` latency of
+    the recent requests. Hedges are limited to a `budget` fraction of the recent
+    requests, so they use a bounded share of the rate limit.
+
+    Pass it as the hedging of an ApiClient. It emits request_hedged events to the
+    client's hooks.
+    """
+
+    def __init__(self, percentile=0.95, budget=0.05, window=200, min_samples=20,
+                 min_delay=0.05, max_workers=32):
+        """
+        Args:
+            percentile (float) - Optional. A request is hedged after this percentile of
+                                 the recent latencies. Default is 0.95.
+            budget (float) - Optional. The highest fraction of the recent requests that
+                             may be hedged. Default is 0.05.
+            window (int) - Optional. The number of recent requests to keep latencies
+                           of. Default is 200.
+            min_samples (int) - Optional. Requests are not hedged until this many
+                                latencies are known. Default is 20.
+            min_delay (float) - Optional. The shortest wait before hedging, in seconds.
+                                Default is 0.05.
+            max_workers (int) - Optional. The number of threads sending hedged requests.
+                                Default is 32.
+        """
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self._percentile = percentile
+        self._budget = budget
+        self._min_samples = max(1, int(min_samples))
+        self._min_delay = min_delay
+        self._max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self._hedged = collections.deque(maxlen=window)
+        self._executor = None
+        self._hooks = []
+
+        self.num_hedged = 0
+        self.num_hedges_won = 0
+
+    def attach(self, hooks):
+        """Emits request_hedged events to a client's hooks.
+        Attaching the same hooks again does nothing."""
+        if not any(attached is hooks for attached in self._hooks):
+            self._hooks.append(hooks)
+
+    def get_delay(self):
+        """Returns the seconds to wait before hedging a request,
+        or None if it may not be hedged."""
+        with self._lock:
+            if len(self._latencies) < self._min_samples:
+                return None
+            if sum(self._hedged) >= self._budget * len(self._hedged):
+                return None
+            latencies = sorted(self._latencies)
+        rank = int(math.ceil(self._percentile * len(latencies))) - 1
+        return max(latencies[max(rank, 0)], self._min_delay)
+
+    def _record_hedged(self, hedged):
+        with self._lock:
+            self._hedged.append(hedged)
+            if hedged:
+                self.num_hedged += 1
+
+    def _record_latency(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+            return self._executor
+
+    def _submit(self, send, args):
+        deadline = get_current_deadline()
+        probe = get_current_probe()
+        start = time.time()
+
+        def run():
+            # the thread sending the request keeps the caller's deadline and circuit probe
+            with probe_applied(probe):
+                if deadline is None:
+                    result = send(*args)
+                else:
+                    with deadline.applied():
+                        result = send(*args)
+            self._record_latency(time.time() - start)
+            return result
+
+        return self._get_executor().submit(run)
+
+    def call(self, send, url, *args):
+        """Calls send(url, *args), and sends it again if it is slower than the
+        hedging delay. Returns the first result, or raises the error of the
+        first request if both fail.
+
+        The slower request can't be interrupted once it is sent, so it is
+        left to finish in the background and its result is dropped.
+        """
+        delay = self.get_delay()
+        if delay is None:
+            self._record_hedged(False)
+            return self._record_call(send, url, *args)
+
+        primary = self._submit(send, (url,) + args)
+        done, _ = wait([primary], timeout=delay)
+        if done or self.get_delay() is None:
+            self._record_hedged(False)
+            return primary.result()
+
+        self._record_hedged(True)
+        for hooks in self._hooks:
+            hooks.emit(hook_events.REQUEST_HEDGED,
+                       endpoint=utilities.get_endpoint_name_from_url(url), delay=delay)
+
+        hedge = self._submit(send, (url,) + args)
+        done, pending = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        successful = [future for future in (primary, hedge)
+                      if future in done and future.exception() is None]
+        if not successful and pending:
+            # the other request may still succeed
+            wait(pending)
+            successful = [future for future in pending if future.exception() is None]
+        for future in pending:
+            future.cancel()
+
+        if not successful:
+            return primary.result()
+        if successful[0] is hedge:
+            with self._lock:
+                self.num_hedges_won += 1
+        return successful[0].result()
+
+    def _record_call(self, send, *args):
+        start = time.time()
+        result = send(*args)
+        self._record_latency(time.time() - start)
+        return result
@@ -0,0 +1,99 @@
+"""
+Provides Hooks, a registry of callbacks for events emitted while making API requests.
+
+Events and the keyword arguments passed to their callbacks:
+
+    request_start - endpoint, method, batch_size
+    response_received - endpoint, method, batch_size, status_code, duration, server_time,
+                        download_time, request_bytes, response_bytes, rate_limit_remaining,
+                        rate_limit_limit, rate_limit_reset
+    parse_done - endpoint, method, batch_size, parse_time
+    retry - endpoint, attempt, wait, emitted by dispatch.AdaptiveConcurrency for each
+            throttled call that a Dispatcher retries
+    throttled - endpoint, method, batch_size, rate_limit_reset
+    request_compressed - endpoint, method, batch_size, encoding, original_bytes,
+                         compressed_bytes
+    concurrency_changed - limit, previous_limit, reason (one of "start", "increase",
+                          "throttled", "latency" or "timeout"), emitted by
+                          dispatch.AdaptiveConcurrency when a run starts, with a
+                          previous_limit of None, and each time the limit changes
+    request_hedged - endpoint, delay, emitted by hedging.HedgingPolicy when it sends a
+                     duplicate of a request that has not answered after delay seconds
+    circuit_state_changed - family, state, previous_state (each one of "closed", "open"
+                            or "half_open"), emitted by circuitbreaker.CircuitBreaker
+    request_rejected - endpoint, family, emitted by circuitbreaker.CircuitBreaker for a
+                       request that was not sent because its circuit is open
+
+batch_size is the number of identifiers in the request. It is None for a body of
+json bytes that was posted without giving its batch_size to RequestClient.post.
+
+Times are in seconds. server_time is the time from sending the request until the
+response headers were parsed, which includes connection setup (the requests library
+does not report DNS, connect and TLS times separately). download_time is the time
+spent reading the response body after that.
+
+With a streaming output generator the body is read while the results are iterated,
+so duration and download_time end when the response headers are read, response_bytes
+is the Content-Length header, and parse_done is not emitted.
+"""
+
+REQUEST_START = 'request_start'
+RESPONSE_RECEIVED = 'response_received'
+PARSE_DONE = 'parse_done'
+RETRY = 'retry'
+THROTTLED = 'throttled'
+REQUEST_COMPRESSED = 'request_compressed'
+CONCURRENCY_CHANGED = 'concurrency_changed'
+REQUEST_HEDGED = 'request_hedged'
+CIRCUIT_STATE_CHANGED = 'circuit_state_changed'
+REQUEST_REJECTED = 'request_rejected'
+
+EVENTS = (REQUEST_START, RESPONSE_RECEIVED, PARSE_DONE, RETRY, THROTTLED, REQUEST_COMPRESSED,
+          CONCURRENCY_CHANGED, REQUEST_HEDGED, CIRCUIT_STATE_CHANGED, REQUEST_REJECTED)
+
+
+class Hooks(object):
+    """A registry of callbacks for client events."""
+
+    def __init__(self):
+        self._callbacks = {}
+
+    def register(self, event, callback):
+        """Registers a callback for an event.
+
+        Args:
+            event (str) - One of the event names, like "request_start".
+            callback - A callable that accepts the event's keyword arguments.
+        """
+        self._callbacks.setdefault(event, []).append(callback)
+
+    def unregister(self, event, callback):
+        """Removes a callback previously registered for an event."""
+        callbacks = self._callbacks.get(event, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def add_listener(self, listener):
+        """Registers every `on_<event>` method of listener for its event.
+
+        Args:
+            listener - An object with methods like `on_request_start`.
+        """
+        for event in EVENTS:
+            callback = getattr(listener, 'on_' + event, None)
+            if callback is not None:
+                self.register(event, callback)
+        return listener
+
+    def __len__(self):
+        """The total number of registered callbacks."""
+        return sum(len(callbacks) for callbacks in self._callbacks.values())
+
+    def has_callbacks(self, event):
+        """Returns whether any callbacks are registered for an event."""
+        return bool(self._callbacks.get(event))
+
+    def emit(self, event, **data):
+        """Calls every callback registered for an event with the given data."""
+        for callback in self._callbacks.get(event, ()):
+            callback(**data)
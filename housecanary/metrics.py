@@ -0,0 +1,246 @@
+"""
+Provides listeners that turn client events into metrics and export them
+in Prometheus or StatsD formats.
+
+Example:
+    client = housecanary.ApiClient()
+    prometheus = client.hooks.add_listener(PrometheusExporter())
+    ...
+    print(prometheus.render())
+"""
+
+import socket
+import threading
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_PREFIX = 'housecanary_client'
+
+# values of the circuit_state gauge
+CIRCUIT_STATE_VALUES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+def batch_size_label(batch_size):
+    """Returns a low cardinality label for a batch size."""
+    if batch_size <= 1:
+        return '1'
+    if batch_size <= 10:
+        return '2-10'
+    if batch_size <= 100:
+        return '11-100'
+    if batch_size <= 1000:
+        return '101-1000'
+    return '1000+'
+
+
+class MetricsListener(object):
+    """Base class mapping client events to counters, histograms and gauges.
+
+    Subclasses implement `increment`, `observe` and `gauge`.
+    """
+
+    def increment(self, name, tags, value=1):
+        """Override in subclasses"""
+        raise NotImplementedError()
+
+    def observe(self, name, value, tags):
+        """Override in subclasses"""
+        raise NotImplementedError()
+
+    def gauge(self, name, value, tags):
+        """Override in subclasses"""
+        raise NotImplementedError()
+
+    @staticmethod
+    def _tags(endpoint, batch_size=None, **extra):
+        tags = [('endpoint', endpoint)]
+        if batch_size is not None:
+            tags.append(('batch_size', batch_size_label(batch_size)))
+        tags.extend(sorted(extra.items()))
+        return tuple(tags)
+
+    def on_request_start(self, endpoint, method, batch_size, **kwargs):
+        self.increment('requests_total', self._tags(endpoint, batch_size))
+
+    def on_response_received(self, endpoint, method, batch_size, status_code, duration,
+                             server_time, download_time, response_bytes, request_bytes=0,
+                             rate_limit_remaining=None, rate_limit_limit=None, **kwargs):
+        tags = self._tags(endpoint, batch_size)
+        self.increment('responses_total', self._tags(endpoint, batch_size,
+                                                     status=str(status_code)))
+        self.observe('request_duration_seconds', duration, tags)
+        self.observe('server_time_seconds', server_time, tags)
+        self.observe('download_time_seconds', download_time, tags)
+        self.increment('response_bytes_total', tags, response_bytes)
+        if request_bytes:
+            self.increment('request_bytes_total', tags, request_bytes)
+        if rate_limit_remaining is not None:
+            self.gauge('rate_limit_remaining', rate_limit_remaining, ())
+        if rate_limit_limit is not None:
+            self.gauge('rate_limit_limit', rate_limit_limit, ())
+
+    def on_parse_done(self, endpoint, method, batch_size, parse_time, **kwargs):
+        self.observe('parse_time_seconds', parse_time, self._tags(endpoint, batch_size))
+
+    def on_retry(self, endpoint, **kwargs):
+        self.increment('retries_total', self._tags(endpoint))
+
+    def on_throttled(self, endpoint, method, batch_size, **kwargs):
+        self.increment('throttled_total', self._tags(endpoint, batch_size))
+
+    def on_request_compressed(self, endpoint, method, batch_size, encoding, original_bytes,
+                              compressed_bytes, **kwargs):
+        self.increment('request_bytes_saved_total', self._tags(endpoint, batch_size,
+                                                               encoding=encoding),
+                       original_bytes - compressed_bytes)
+
+    def on_concurrency_changed(self, limit, reason, **kwargs):
+        self.gauge('concurrency_limit', limit, ())
+        if reason not in ('start', 'increase'):
+            self.increment('concurrency_backoffs_total', (('reason', reason),))
+
+    def on_request_hedged(self, endpoint, **kwargs):
+        self.increment('requests_hedged_total', self._tags(endpoint))
+
+    def on_circuit_state_changed(self, family, state, **kwargs):
+        tags = (('family', family),)
+        self.gauge('circuit_state', CIRCUIT_STATE_VALUES[state], tags)
+        if state == 'open':
+            self.increment('circuit_opened_total', tags)
+
+    def on_request_rejected(self, family, **kwargs):
+        self.increment('requests_rejected_total', (('family', family),))
+
+
+class PrometheusExporter(MetricsListener):
+    """Aggregates metrics in memory and renders them in the Prometheus text format."""
+
+    def __init__(self, prefix=METRIC_PREFIX, buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            prefix (str) - Optional. Prefix of every metric name.
+            buckets - Optional. Upper bounds of the histogram buckets in seconds.
+        """
+        self._prefix = prefix
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def increment(self, name, tags, value=1):
+        with self._lock:
+            key = (name, tags)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name, value, tags):
+        with self._lock:
+            self._gauges[(name, tags)] = value
+
+    def observe(self, name, value, tags):
+        with self._lock:
+            key = (name, tags)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(self._buckets), 0.0, 0]
+            for idx, upper_bound in enumerate(self._buckets):
+                if value <= upper_bound:
+                    histogram[0][idx] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def get_counter(self, name, tags=()):
+        """Returns the current value of a counter."""
+        return self._counters.get((name, tuple(tags)), 0)
+
+    def get_gauge(self, name, tags=()):
+        """Returns the current value of a gauge, or None if it was never set."""
+        return self._gauges.get((name, tuple(tags)))
+
+    @staticmethod
+    def _format_labels(tags):
+        if not tags:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(k, str(v).replace('"', '\\"'))
+                              for k, v in tags) + '}'
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            self._render_simple(lines, self._counters, 'counter')
+            self._render_simple(lines, self._gauges, 'gauge')
+
+            for name in sorted(set(name for name, _ in self._histograms)):
+                full_name = '{}_{}'.format(self._prefix, name)
+                lines.append('# TYPE {} histogram'.format(full_name))
+                for (metric, tags), (counts, total, count) in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    for upper_bound, bucket_count in zip(self._buckets, counts):
+                        labels = self._format_labels(tags + (('le', repr(upper_bound)),))
+                        lines.append('{}_bucket{} {}'.format(full_name, labels, bucket_count))
+                    labels = self._format_labels(tags + (('le', '+Inf'),))
+                    lines.append('{}_bucket{} {}'.format(full_name, labels, count))
+                    lines.append('{}_sum{} {}'.format(full_name, self._format_labels(tags),
+                                                      repr(total)))
+                    lines.append('{}_count{} {}'.format(full_name, self._format_labels(tags),
+                                                        count))
+
+        return '\n'.join(lines) + '\n'
+
+    def _render_simple(self, lines, metrics, metric_type):
+        for name in sorted(set(name for name, _ in metrics)):
+            full_name = '{}_{}'.format(self._prefix, name)
+            lines.append('# TYPE {} {}'.format(full_name, metric_type))
+            for (metric, tags), value in sorted(metrics.items()):
+                if metric == name:
+                    lines.append('{}{} {}'.format(full_name, self._format_labels(tags), value))
+
+
+class StatsdExporter(MetricsListener):
+    """Sends metrics to a StatsD server over UDP as they happen.
+
+    Tags are sent in the DogStatsD `|#key:value` format, which is also understood
+    by Telegraf and the StatsD exporter for Prometheus.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix=METRIC_PREFIX, tags=True):
+        """
+        Args:
+            host (str) - Optional. The StatsD host. Default is "127.0.0.1".
+            port (int) - Optional. The StatsD port. Default is 8125.
+            prefix (str) - Optional. Prefix of every metric name.
+            tags (bool) - Optional. Whether to send tags. Default is True.
+        """
+        self._address = (host, port)
+        self._prefix = prefix
+        self._send_tags = tags
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def increment(self, name, tags, value=1):
+        self._send(name, value, 'c', tags)
+
+    def gauge(self, name, value, tags):
+        self._send(name, value, 'g', tags)
+
+    def observe(self, name, value, tags):
+        # StatsD timers are in milliseconds
+        if name.endswith('_seconds'):
+            name = name[:-len('_seconds')] + '_ms'
+            value = value * 1000
+        self._send(name, round(value, 3), 'ms', tags)
+
+    def _send(self, name, value, metric_type, tags):
+        line = '{}.{}:{}|{}'.format(self._prefix, name, value, metric_type)
+        if self._send_tags and tags:
+            line += '|#' + ','.join('{}:{}'.format(k, v) for k, v in tags)
+        try:
+            self._socket.sendto(line.encode('utf-8'), self._address)
+        except (socket.error, OSError):
+            # metrics must never break API requests
+            pass
+
+    def close(self):
+        self._socket.close()
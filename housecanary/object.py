@@ -4,17 +4,15 @@ an object and its associated data.
 Currently, only the Property subclass is implemented.
 """
 
-from builtins import str
-from builtins import next
-from builtins import object
 import housecanary.constants as constants
+from housecanary.compat import text_type
 
 
 def _create_component_results(json_data, result_key):
     """ Returns a list of ComponentResult from the json_data"""
     component_results = []
-    for key, value in list(json_data.items()):
-        if key not in [result_key, "meta"]:
+    for key, value in json_data.items():
+        if key != result_key and key != "meta":
             component_result = ComponentResult(
                 key,
                 value["result"],
@@ -83,8 +81,8 @@ class Property(HouseCanaryObject):
         """
         super(Property, self).__init__()
 
-        self.address = str(address)
-        self.zipcode = str(zipcode)
+        self.address = text_type(address)
+        self.zipcode = text_type(zipcode)
         self.block_id = None
         self.zipcode_plus4 = None
         self.address_full = None
@@ -151,7 +149,7 @@ class Block(HouseCanaryObject):
         """
         super(Block, self).__init__()
 
-        self.block_id = str(block_id)
+        self.block_id = text_type(block_id)
         self.num_bins = None
         self.property_type = None
         self.meta = None
@@ -196,7 +194,7 @@ class ZipCode(HouseCanaryObject):
         """
         super(ZipCode, self).__init__()
 
-        self.zipcode = str(zipcode)
+        self.zipcode = text_type(zipcode)
         self.meta = None
 
     @classmethod
@@ -236,7 +234,7 @@ class Msa(HouseCanaryObject):
         """
         super(Msa, self).__init__()
 
-        self.msa = str(msa)
+        self.msa = text_type(msa)
         self.meta = None
 
     @classmethod
@@ -1,5 +1,5 @@
 """
-This module provides a base class and two implementations of OutputGenerator,
+This module provides a base class and implementations of OutputGenerator,
 which is responsible for processing a response before returning a result to the caller.
 
 An OutputGenerator must implement a `process_response` method
@@ -8,14 +8,12 @@ and returns something useful to the caller. This is a good place to do
 custom serialization of an API response.
 """
 
-try:
-    # Python 3
-    from urllib.parse import urlparse
-except ImportError:
-    # Python 2
-    from urlparse import urlparse
+import itertools
+import json
 
 from housecanary.response import Response
+from housecanary import streaming
+from housecanary import utilities
 import housecanary.exceptions
 import housecanary.constants as constants
 
@@ -64,9 +62,20 @@ class ResponseOutputGenerator(OutputGenerator):
 
         response_json = response.json()
 
-        # handle errors
+        self._raise_for_error(response_json, response)
+
+        request_url = response.request.url
+
+        endpoint_name = self._parse_endpoint_name_from_url(request_url)
+
+        return Response.create(endpoint_name, response_json, response)
+
+    @staticmethod
+    def _raise_for_error(response_json, response):
+        """Raises an exception if the json body is an error message."""
         code_key = "code"
-        if code_key in response_json and response_json[code_key] != constants.HTTP_CODE_OK:
+        if (isinstance(response_json, dict) and code_key in response_json and
+                response_json[code_key] != constants.HTTP_CODE_OK):
             code = response_json[code_key]
 
             message = response_json
@@ -82,12 +91,6 @@ class ResponseOutputGenerator(OutputGenerator):
             else:
                 raise housecanary.exceptions.RequestException(code, message)
 
-        request_url = response.request.url
-
-        endpoint_name = self._parse_endpoint_name_from_url(request_url)
-
-        return Response.create(endpoint_name, response_json, response)
-
     def process_pdf_response(self, response):
         return response.text
 
@@ -96,16 +99,52 @@ class ResponseOutputGenerator(OutputGenerator):
 
     @staticmethod
     def _parse_endpoint_name_from_url(request_url):
-        # get the path from the url
-        path = urlparse(request_url).path
+        return utilities.get_endpoint_name_from_url(request_url)
+
+
+class StreamingOutputGenerator(ResponseOutputGenerator):
+    """Returns a housecanary.streaming.StreamingResponse for json responses,
+    which yields the items of the response as they are downloaded instead of
+    loading the whole body first.
 
-        # path is like "/v2/property/value"
+    The request client reads the `stream` attribute to request an unbuffered response.
+    """
+
+    stream = True
+
+    def __init__(self, objects=True, chunk_size=streaming.CHUNK_SIZE):
+        """
+        Args:
+            objects (bool) - Optional. Yield Property, Block, ZipCode or Msa objects.
+                             If False, yield the json dicts. Default is True.
+            chunk_size (int) - Optional. Bytes to read from the socket at a time.
+        """
+        self._objects = objects
+        self._chunk_size = chunk_size
 
-        # strip off the leading "/"
-        path = path[1:]
+    def process_json_response(self, response):
+        """For a json array response, returns a StreamingResponse over its items.
+        Error responses are read in full and raise an exception."""
+        chunks = response.iter_content(self._chunk_size)
+        first_chunks = []
+        for chunk in chunks:
+            first_chunks.append(chunk)
+            if chunk.strip():
+                break
+
+        endpoint_name = self._parse_endpoint_name_from_url(response.request.url)
+        body_start = b"".join(first_chunks)
+
+        if not body_start.lstrip().startswith(b"["):
+            # an error message or a single report, so not worth streaming
+            response_json = json.loads((body_start + b"".join(chunks)).decode("utf-8"))
+            self._raise_for_error(response_json, response)
+            items = iter([response_json])
+        else:
+            items = streaming.iter_json_array(itertools.chain([body_start], chunks))
 
-        # keep only the part after the version and "/"
-        path = path[path.find("/")+1:]
+        object_type = None
+        if self._objects and not endpoint_name.endswith("_report"):
+            object_type = streaming.OBJECT_TYPES.get(endpoint_name.split("/")[0])
 
-        # path is now like "property/value"
-        return path
+        return streaming.StreamingResponse(endpoint_name, items, response, object_type)
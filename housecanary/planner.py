@@ -0,0 +1,264 @@
+"""
+Provides an MgetPlanner which splits a large component_mget job
+(identifiers x components) into several smaller component_mget calls,
+runs them concurrently and merges the results back together.
+"""
+
+import collections
+from housecanary.dispatch import AdaptiveConcurrency, Dispatcher, Deadline
+from housecanary.exceptions import DeadlineExceededException
+from housecanary.response import Response
+
+
+# Rough size in bytes of a single component result for one identifier.
+# Time series endpoints return hundreds of monthly data points, so they are
+# by far the largest.
+COMPONENT_SIZE_ESTIMATES = {
+    'property/block_histogram_baths': 1200,
+    'property/block_histogram_beds': 1200,
+    'property/block_histogram_building_area': 1200,
+    'property/block_histogram_value': 1200,
+    'property/block_histogram_value_sqft': 1200,
+    'property/block_rental_value_distribution': 900,
+    'property/block_value_distribution': 900,
+    'property/block_value_ts': 40000,
+    'property/block_value_ts_historical': 30000,
+    'property/block_value_ts_forecast': 10000,
+    'property/census': 300,
+    'property/details': 2500,
+    'property/flood': 300,
+    'property/ltv': 300,
+    'property/ltv_details': 1000,
+    'property/mortgage_lien': 2000,
+    'property/msa_details': 500,
+    'property/msa_hpi_ts': 40000,
+    'property/msa_hpi_ts_forecast': 10000,
+    'property/msa_hpi_ts_historical': 30000,
+    'property/nod': 1500,
+    'property/owner_occupied': 200,
+    'property/rental_value': 250,
+    'property/rental_value_within_block': 700,
+    'property/sales_history': 2500,
+    'property/school': 5000,
+    'property/value': 250,
+    'property/value_forecast': 1500,
+    'property/value_within_block': 700,
+    'property/zip_details': 900,
+    'property/zip_hpi_forecast': 1500,
+    'property/zip_hpi_historical': 1500,
+    'property/zip_hpi_ts': 40000,
+    'property/zip_hpi_ts_forecast': 10000,
+    'property/zip_hpi_ts_historical': 30000,
+    'property/zip_volatility': 500,
+    'block/histogram_baths': 1200,
+    'block/histogram_beds': 1200,
+    'block/histogram_building_area': 1200,
+    'block/histogram_value': 1200,
+    'block/histogram_value_sqft': 1200,
+    'block/rental_value_distribution': 900,
+    'block/value_distribution': 900,
+    'block/value_ts': 40000,
+    'block/value_ts_forecast': 10000,
+    'block/value_ts_historical': 30000,
+    'zip/details': 900,
+    'zip/hpi_forecast': 1500,
+    'zip/hpi_historical': 1500,
+    'zip/hpi_ts': 40000,
+    'zip/hpi_ts_forecast': 10000,
+    'zip/hpi_ts_historical': 30000,
+    'zip/volatility': 500,
+    'msa/details': 500,
+    'msa/hpi_ts': 40000,
+    'msa/hpi_ts_forecast': 10000,
+    'msa/hpi_ts_historical': 30000,
+}
+
+DEFAULT_COMPONENT_SIZE = 2000
+
+# Size in bytes of the per identifier info returned with every result,
+# such as "address_info" or "block_info".
+IDENTIFIER_INFO_SIZE = 600
+
+
+MgetCall = collections.namedtuple('MgetCall', ['offset', 'identifiers', 'components'])
+
+
+class MgetPlanner(object):
+    """Plans and executes component_mget calls under a response size budget."""
+
+    def __init__(self, max_response_bytes=4 * 1024 * 1024, latency_budget=None,
+                 base_latency=0.25, bytes_per_second=2 * 1024 * 1024,
+                 min_identifiers_per_call=10, max_identifiers_per_call=None,
+                 concurrency=4, size_estimates=None, deadline=None):
+        """
+        Args:
+            max_response_bytes - Optional. The estimated maximum response size of a single call.
+                                 Default is 4 MB.
+            latency_budget (float) - Optional. The target number of seconds for a single call.
+                                     If specified, the response size budget is lowered to what
+                                     can be downloaded in that time.
+            base_latency (float) - Optional. Estimated fixed seconds of overhead per call.
+                                   Only used with latency_budget. Default is 0.25.
+            bytes_per_second - Optional. Estimated response throughput.
+                               Only used with latency_budget. Default is 2 MB/s.
+            min_identifiers_per_call - Optional. Components are grouped so that each call
+                                       can hold at least this many identifiers. Default is 10.
+            max_identifiers_per_call - Optional. Hard cap on the identifiers in a single call.
+            concurrency - Optional. The number of calls to run at once, or a
+                          housecanary.dispatch.AdaptiveConcurrency to adjust it. Default is 4.
+            size_estimates (dict) - Optional. Per component size estimates in bytes that
+                                    override COMPONENT_SIZE_ESTIMATES.
+            deadline (float) - Optional. The seconds each execute may take over all its calls.
+                               Calls are not sent after the deadline and their timeouts are
+                               capped at the time remaining.
+        """
+        self._max_response_bytes = max_response_bytes
+        self._latency_budget = latency_budget
+        self._base_latency = base_latency
+        self._bytes_per_second = bytes_per_second
+        self._min_identifiers_per_call = max(1, min_identifiers_per_call)
+        self._max_identifiers_per_call = max_identifiers_per_call
+        self._concurrency = concurrency
+        self._deadline = deadline
+        self._size_estimates = dict(COMPONENT_SIZE_ESTIMATES)
+        if size_estimates:
+            self._size_estimates.update(size_estimates)
+
+    @property
+    def response_budget(self):
+        """The estimated maximum number of response bytes for a single call."""
+        budget = self._max_response_bytes
+        if self._latency_budget is not None:
+            transfer_seconds = max(self._latency_budget - self._base_latency, 0)
+            budget = min(budget, int(transfer_seconds * self._bytes_per_second))
+        return max(budget, 1)
+
+    def estimate_size(self, component):
+        """Returns the estimated response size of a component for one identifier."""
+        return self._size_estimates.get(component, DEFAULT_COMPONENT_SIZE)
+
+    def group_components(self, components):
+        """Packs components into groups that fit the response budget
+        for min_identifiers_per_call identifiers, using first fit decreasing.
+
+        Returns:
+            A list of lists of components.
+        """
+        group_budget = self.response_budget // self._min_identifiers_per_call
+
+        groups = []
+        group_sizes = []
+
+        for component in sorted(components, key=self.estimate_size, reverse=True):
+            size = self.estimate_size(component)
+            for idx, group_size in enumerate(group_sizes):
+                if group_size + size <= group_budget:
+                    groups[idx].append(component)
+                    group_sizes[idx] += size
+                    break
+            else:
+                groups.append([component])
+                group_sizes.append(IDENTIFIER_INFO_SIZE + size)
+
+        # keep the requested order of components within each group
+        order = {component: idx for idx, component in enumerate(components)}
+        return [sorted(group, key=order.get) for group in groups]
+
+    def plan(self, identifier_input, components):
+        """Splits the job into a list of MgetCall.
+
+        Args:
+            identifier_input - A list of identifier dicts.
+            components - A list of component names.
+
+        Returns:
+            A list of MgetCall namedtuples of (offset, identifiers, components)
+            where offset is the position of the first identifier in identifier_input.
+        """
+        calls = []
+
+        for group in self.group_components(components):
+            group_size = IDENTIFIER_INFO_SIZE + sum(self.estimate_size(c) for c in group)
+            batch_size = max(1, self.response_budget // group_size)
+            if self._max_identifiers_per_call is not None:
+                batch_size = min(batch_size, self._max_identifiers_per_call)
+
+            for offset in range(0, len(identifier_input), batch_size):
+                calls.append(MgetCall(offset, identifier_input[offset:offset + batch_size], group))
+
+        return calls
+
+    def execute(self, api_client, endpoint_name, identifier_input, components, query_params=None):
+        """Runs the planned calls concurrently and merges the results.
+
+        Args:
+            api_client - An instance of ApiClient.
+            endpoint_name (str) - The component_mget endpoint, like "property/component_mget".
+            identifier_input - A list of identifier dicts.
+            components - A list of component names.
+            query_params (dict) - Optional. Extra query params to send with every call.
+
+        Returns:
+            The result of a single call if the job fits in one call. An empty result
+            per identifier, without any call, if there are no identifiers or components.
+            Otherwise a Response containing the merged results,
+            or the merged json list if a custom OutputGenerator is used.
+
+        Raises:
+            DeadlineExceededException when the deadline passes. Its partial_result is
+            the merge of the calls that completed, or None if none did. Identifiers
+            and components of the calls that did not complete are missing from it.
+        """
+        calls = self.plan(identifier_input, components)
+        if not calls:
+            # no identifiers or no components, so there is nothing to fetch
+            return api_client.create_result(endpoint_name, [{} for _ in identifier_input])
+
+        # the calls are sent from the dispatcher's threads
+        priority = api_client.current_priority()
+        deadline = Deadline.create(self._deadline)
+
+        def run(call):
+            params = dict(query_params or {})
+            params["components"] = ",".join(call.components)
+            return call, api_client.fetch(endpoint_name, call.identifiers, params, priority)
+
+        if len(calls) == 1:
+            if deadline is None:
+                return run(calls[0])[1]
+            with deadline.applied():
+                return run(calls[0])[1]
+
+        if isinstance(self._concurrency, AdaptiveConcurrency):
+            self._concurrency.attach(api_client.hooks)
+        dispatcher = Dispatcher(self._concurrency)
+        try:
+            completed = dispatcher.map(run, calls, deadline=deadline)
+        except DeadlineExceededException as e:
+            completed = e.partial_result
+            e.partial_result = None
+            if completed:
+                e.partial_result = merge_results(endpoint_name, len(identifier_input),
+                                                 *zip(*completed))
+            raise
+
+        return merge_results(endpoint_name, len(identifier_input), *zip(*completed))
+
+
+def merge_results(endpoint_name, num_identifiers, calls, results):
+    """Merges the results of planned calls into a single result
+    with one item per identifier.
+
+    Identifiers without any results are left as empty dicts."""
+
+    merged = [{} for _ in range(num_identifiers)]
+
+    for call, result in zip(calls, results):
+        items = result.json() if isinstance(result, Response) else result
+        for idx, item in enumerate(items):
+            merged[call.offset + idx].update(item)
+
+    if isinstance(results[0], Response):
+        return Response.create(endpoint_name, merged, results[0].response)
+
+    return merged
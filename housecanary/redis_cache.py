@@ -0,0 +1,232 @@
+"""
+Provides a RedisCacheBackend that keeps the entries of a ResponseCache
+in a Redis compatible server, so a fleet of clients shares one cache.
+
+It speaks the Redis protocol (RESP) over plain sockets, so no Redis client
+library is needed. A batch of keys is read with a single MGET and written
+with a single MSET, followed by PEXPIRE commands in the same round trip.
+"""
+
+import socket
+import threading
+
+from housecanary.compat import text_type
+from housecanary.exceptions import CacheBackendException
+from housecanary.serialization import EntryCodec
+
+DEFAULT_PREFIX = "hc:"
+
+
+def encode_command(*args):
+    """Returns a command in the Redis protocol, like encode_command("GET", "key")."""
+    parts = [b"*" + str(len(args)).encode("ascii") + b"\r\n"]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = text_type(arg).encode("utf-8")
+        parts.append(b"$" + str(len(arg)).encode("ascii") + b"\r\n" + arg + b"\r\n")
+    return b"".join(parts)
+
+
+def read_reply(reader):
+    """Reads a reply in the Redis protocol from a file object.
+
+    Returns:
+        bytes for simple and bulk strings, an int, None for a null reply,
+        a CacheBackendException for an error reply, or a list of replies.
+
+    Raises:
+        CacheBackendException if the connection was closed.
+    """
+    line = reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise CacheBackendException("Connection closed by the server")
+    kind, data = line[:1], line[1:-2]
+    if kind == b"+":
+        return data
+    if kind == b"-":
+        return CacheBackendException(data.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(data)
+    if kind == b"$":
+        length = int(data)
+        if length < 0:
+            return None
+        value = reader.read(length + 2)
+        if len(value) != length + 2:
+            raise CacheBackendException("Connection closed by the server")
+        return value[:-2]
+    if kind == b"*":
+        length = int(data)
+        if length < 0:
+            return None
+        return [read_reply(reader) for _ in range(length)]
+    raise CacheBackendException("Invalid reply: {!r}".format(line))
+
+
+class RedisConnection(object):
+    """A connection to a Redis compatible server that sends pipelined commands."""
+
+    def __init__(self, host, port, timeout):
+        self._socket = socket.create_connection((host, port), timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile("rb")
+
+    def execute(self, *commands):
+        """Sends commands, each a tuple of arguments, in one write and returns
+        their replies. An error reply is raised after every reply is read."""
+        self._socket.sendall(b"".join(encode_command(*command) for command in commands))
+        replies = [read_reply(self._reader) for _ in commands]
+        for reply in replies:
+            if isinstance(reply, CacheBackendException):
+                raise reply
+        return replies
+
+    def close(self):
+        """Closes the connection."""
+        try:
+            self._reader.close()
+        finally:
+            self._socket.close()
+
+
+class RedisCacheBackend(object):
+    """Keeps cache entries in a Redis compatible server.
+
+    Entries are stored as the bytes of an EntryCodec under the cache key with a
+    prefix, and expire after the stale_if_error or max_age of the ResponseCache,
+    whichever is longer. Server and connection errors, and entries that can not
+    be decoded, are counted in num_errors and treated as cache misses, so the
+    client keeps working from the API while the server is unavailable.
+    """
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, prefix=DEFAULT_PREFIX,
+                 timeout=1.0, max_connections=8, codec=None):
+        """
+        Args:
+            host (str) - Optional. The server host. Default is "localhost".
+            port (int) - Optional. The server port. Default is 6379.
+            db (int) - Optional. The database number. Default is 0.
+            password (str) - Optional. The password to AUTH with.
+            prefix (str) - Optional. Prepended to every key. Default is "hc:".
+            timeout (float) - Optional. Seconds to wait for the server. Default is 1.
+            max_connections (int) - Optional. The most idle connections to keep open.
+                                    Default is 8.
+            codec (EntryCodec) - Optional. Encodes the entries. Default is an EntryCodec
+                                 with the default format and no compression.
+        """
+        self._host = host
+        self._port = port
+        self._db = db
+        self._password = password
+        self._prefix = prefix
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self.codec = codec or EntryCodec()
+
+        self._lock = threading.Lock()
+        self._idle = []
+        self.num_errors = 0
+
+    def _connect(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        connection = RedisConnection(self._host, self._port, self._timeout)
+        setup = []
+        if self._password is not None:
+            setup.append(("AUTH", self._password))
+        if self._db:
+            setup.append(("SELECT", self._db))
+        if setup:
+            try:
+                connection.execute(*setup)
+            except (socket.error, CacheBackendException):
+                connection.close()
+                raise
+        return connection
+
+    def _release(self, connection):
+        with self._lock:
+            if len(self._idle) < self._max_connections:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def execute(self, *commands):
+        """Sends commands in one round trip on a pooled connection and returns
+        their replies."""
+        connection = self._connect()
+        try:
+            replies = connection.execute(*commands)
+        except (socket.error, CacheBackendException):
+            # the connection may have unread replies
+            connection.close()
+            raise
+        self._release(connection)
+        return replies
+
+    def _execute_or_count(self, *commands):
+        try:
+            return self.execute(*commands)
+        except (socket.error, CacheBackendException):
+            self._count_error()
+            return None
+
+    def close(self):
+        """Closes the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _get_redis_key(self, key):
+        return self._prefix + key
+
+    def _count_error(self):
+        with self._lock:
+            self.num_errors += 1
+
+    def get_many(self, keys):
+        """Returns a dict of key to CacheEntry for the keys that have an entry,
+        read with a single MGET."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        replies = self._execute_or_count(("MGET",) + tuple(self._get_redis_key(key)
+                                                           for key in keys))
+        if replies is None:
+            return {}
+        entries = {}
+        for key, data in zip(keys, replies[0]):
+            if data is None:
+                continue
+            try:
+                entries[key] = self.codec.decode(data)
+            except CacheBackendException:
+                self._count_error()
+        return entries
+
+    def set_many(self, entries, ttl=None):
+        """Stores a dict of key to CacheEntry with a single MSET.
+
+        Args:
+            entries (dict) - The entries to store.
+            ttl (float) - Optional. Seconds after which the server drops the entries.
+        """
+        if not entries:
+            return
+        mset = ["MSET"]
+        for key, entry in entries.items():
+            mset.extend((self._get_redis_key(key), self.codec.encode(entry)))
+        commands = [tuple(mset)]
+        if ttl is not None:
+            milliseconds = max(1, int(ttl * 1000))
+            commands.extend(("PEXPIRE", self._get_redis_key(key), milliseconds)
+                            for key in entries)
+        self._execute_or_count(*commands)
+
+    def delete_many(self, keys):
+        """Removes the entries of keys."""
+        keys = list(keys)
+        if keys:
+            self._execute_or_count(("DEL",) + tuple(self._get_redis_key(key) for key in keys))
@@ -2,10 +2,18 @@
 Provides a base client for making API requests.
 """
 
-from builtins import object
+import json
+import time
 import requests
 
 import housecanary
+from housecanary import hooks as hook_events
+from housecanary import utilities
+from housecanary.authentication import HCAuthV1
+from housecanary.dispatch import get_current_deadline
+from housecanary.exceptions import DeadlineExceededException
+import housecanary.constants as constants
+from housecanary.compat import string_types
 
 USER_AGENT = 'hc-client-python/%s %s' % (
     housecanary.__version__, requests.utils.default_user_agent()
@@ -15,7 +23,9 @@ USER_AGENT = 'hc-client-python/%s %s' % (
 class RequestClient(object):
     """Base class for making http requests with the 'requests' lib."""
 
-    def __init__(self, output_generator=None, authenticator=None):
+    def __init__(self, output_generator=None, authenticator=None, hooks=None,
+                 compression=None, compression_threshold=constants.DEFAULT_COMPRESSION_THRESHOLD,
+                 timeout=constants.DEFAULT_TIMEOUT):
         """
         Args:
             output_generator - Optional. An instance of an OutputGenerator that implements
@@ -25,11 +35,35 @@ class RequestClient(object):
                                response from the requests lib unchanged.
             authenticator - Optional. An instance of a requests.auth.AuthBase implementation
                             for providing authentication to the request.
+            hooks - Optional. An instance of housecanary.hooks.Hooks to emit
+                    request_start, response_received, parse_done, throttled and
+                    request_compressed events to.
+            compression (str) - Optional. Compress request bodies with "gzip", "deflate"
+                                or "br" (requires the brotli package). Default is None.
+            compression_threshold (int) - Optional. Only compress bodies of at least
+                                          this many bytes. Default is 1024.
+            timeout - Optional. Seconds to wait for the server, as a number or a
+                      (connect timeout, read timeout) tuple. None waits forever.
+                      Default is (10, 300).
         """
+        if compression is not None and compression not in constants.COMPRESSION_ENCODINGS:
+            raise ValueError("compression must be one of {}".format(
+                ", ".join(constants.COMPRESSION_ENCODINGS)))
+        if compression == "br" and "br" not in utilities.get_accept_encoding():
+            raise ValueError("brotli compression requires the brotli package")
+
         self._output_generator = output_generator
+        # output generators that parse the body incrementally ask for an unbuffered response
+        self._stream = getattr(output_generator, 'stream', False)
         self._auth = authenticator
+        self._hooks = hooks
+        self._compression = compression
+        self._compression_threshold = compression_threshold
+        self._timeout = timeout
+        self._headers = {'User-Agent': USER_AGENT,
+                         'Accept-Encoding': utilities.get_accept_encoding()}
 
-    def execute_request(self, url, http_method, query_params, post_data):
+    def execute_request(self, url, http_method, query_params, post_data, batch_size=None):
         """Makes a request to the specified url endpoint with the
         specified http method, params and post data.
 
@@ -38,7 +72,11 @@ class RequestClient(object):
                           Example: "https://api.housecanary.com/v2/property/value"
             http_method (string): The http method to use for the request.
             query_params (dict): Dictionary of query params to add to the request.
-            post_data: Json post data to send in the body of the request.
+            post_data: Json post data to send in the body of the request,
+                       or bytes that are already serialized json.
+            batch_size (int): Optional. The number of items in post_data, reported in events.
+                              Default is the length of a json list, 1 without post data,
+                              and None for bytes.
 
         Returns:
             The result of calling this instance's OutputGenerator process_response method
@@ -46,11 +84,137 @@ class RequestClient(object):
             If no OutputGenerator is specified for this instance, returns the requests.Response.
         """
 
-        response = requests.request(http_method, url, params=query_params,
-                                    auth=self._auth, json=post_data,
-                                    headers={'User-Agent': USER_AGENT})
+        if not self._hooks:
+            response = self._send_request(url, http_method, query_params, post_data)
+            return self._process_response(response)
+
+        event = self._get_event_data(url, http_method, post_data, batch_size)
+        self._hooks.emit(hook_events.REQUEST_START, **event)
+
+        start = time.time()
+        response = self._send_request(url, http_method, query_params, post_data, batch_size)
+        duration = time.time() - start
+
+        server_time = response.elapsed.total_seconds()
+        self._hooks.emit(
+            hook_events.RESPONSE_RECEIVED,
+            status_code=response.status_code,
+            duration=duration,
+            server_time=server_time,
+            download_time=max(duration - server_time, 0.0),
+            request_bytes=self._get_request_bytes(response),
+            response_bytes=self._get_response_bytes(response),
+            rate_limit_remaining=utilities.get_rate_limit_remaining(response.headers),
+            rate_limit_limit=utilities.get_rate_limit_limit(response.headers),
+            rate_limit_reset=utilities.get_rate_limit_reset(response.headers),
+            **event)
+
+        if response.status_code == constants.HTTP_TOO_MANY_REQUESTS:
+            self._hooks.emit(hook_events.THROTTLED,
+                             rate_limit_reset=response.headers.get("X-RateLimit-Reset"),
+                             **event)
+
+        if self._stream:
+            # the body is parsed as the caller iterates over it, so there is no parse time
+            return self._process_response(response)
+
+        start = time.time()
+        try:
+            return self._process_response(response)
+        finally:
+            self._hooks.emit(hook_events.PARSE_DONE, parse_time=time.time() - start, **event)
+
+    def _send_request(self, url, http_method, query_params, post_data, batch_size=None):
+        """Sends the http request and returns the requests.Response."""
+        headers = self._headers.copy()
+        body = None
+        if post_data is not None:
+            # serialize once, the same bytes are signed and sent
+            body = self._serialize_body(post_data)
+            headers['Content-Type'] = 'application/json'
+
+            if self._compression is not None and len(body) >= self._compression_threshold:
+                compressed = utilities.compress_body(body, self._compression,
+                                                     constants.COMPRESSION_LEVEL)
+                if len(compressed) < len(body):
+                    if self._hooks:
+                        self._hooks.emit(hook_events.REQUEST_COMPRESSED,
+                                         encoding=self._compression,
+                                         original_bytes=len(body),
+                                         compressed_bytes=len(compressed),
+                                         **self._get_event_data(url, http_method, post_data,
+                                                                batch_size))
+                    # the signature covers the bytes that go over the wire
+                    body = compressed
+                    headers['Content-Encoding'] = self._compression
+
+        timeout = self._get_timeout()
+
+        if isinstance(self._auth, HCAuthV1):
+            # sign with the known url and params instead of re-parsing the prepared url
+            signed_url, signature = self._auth.sign_url(http_method, url, query_params, body)
+            headers['X-Auth-Signature'] = signature
+            return requests.request(http_method, signed_url, data=body, headers=headers,
+                                    stream=self._stream, timeout=timeout)
+
+        return requests.request(http_method, url, params=query_params,
+                                auth=self._auth, data=body, headers=headers,
+                                stream=self._stream, timeout=timeout)
+
+    def _get_timeout(self):
+        """Returns the timeout of a request, capped at the time left until the
+        deadline applied to this thread, if any."""
+        deadline = get_current_deadline()
+        if deadline is None:
+            return self._timeout
+
+        remaining = deadline.remaining()
+        if not remaining:
+            raise DeadlineExceededException("Deadline exceeded before the request was sent")
+        if self._timeout is None:
+            return remaining
+        if isinstance(self._timeout, tuple):
+            connect_timeout, read_timeout = self._timeout
+            return min(connect_timeout, remaining), min(read_timeout, remaining)
+        return min(self._timeout, remaining)
+
+    @staticmethod
+    def _get_request_bytes(response):
+        """Returns the size of the request body as sent, after any compression."""
+        body = response.request.body if response.request is not None else None
+        return len(body) if body else 0
+
+    def _get_response_bytes(self, response):
+        """Returns the size of the response body without reading a streamed body."""
+        if self._stream:
+            return int(response.headers.get('Content-Length') or 0)
+        return len(response.content or b"")
+
+    @staticmethod
+    def _get_event_data(url, http_method, post_data, batch_size=None):
+        """Returns the data common to all events of a request."""
+        if batch_size is None:
+            if isinstance(post_data, list):
+                batch_size = len(post_data)
+            elif post_data is None:
+                batch_size = 1
+        return {
+            "endpoint": utilities.get_endpoint_name_from_url(url),
+            "method": http_method,
+            "batch_size": batch_size
+        }
+
+    @staticmethod
+    def _serialize_body(post_data):
+        """Returns post_data as compact json bytes. Bytes are passed through unchanged."""
+        if isinstance(post_data, bytes):
+            return post_data
+        return json.dumps(post_data, separators=(',', ':'), allow_nan=False).encode('utf-8')
 
-        if isinstance(self._output_generator, str) and self._output_generator.lower() == "json":
+    def _process_response(self, response):
+        """Passes the requests.Response through this instance's OutputGenerator."""
+        if (isinstance(self._output_generator, string_types) and
+                self._output_generator.lower() == "json"):
             # shortcut for just getting json back
             return response.json()
         elif self._output_generator is not None:
@@ -73,14 +237,17 @@ class RequestClient(object):
         """
         return self.execute_request(url, "GET", query_params, None)
 
-    def post(self, url, post_data, query_params=None):
+    def post(self, url, post_data, query_params=None, batch_size=None):
         """Makes a POST request to the specified url endpoint.
 
         Args:
             url (string): The url to the API without query params.
                           Example: "https://api.housecanary.com/v2/property/value"
-            post_data: Json post data to send in the body of the request.
+            post_data: Json post data to send in the body of the request,
+                       or bytes that are already serialized json.
             query_params (dict): Optional. Dictionary of query params to add to the request.
+            batch_size (int): Optional. The number of items in post_data, reported in events.
+                              Give it for bytes, whose items are not counted.
 
         Returns:
             The result of calling this instance's OutputGenerator process_response method
@@ -90,4 +257,4 @@ class RequestClient(object):
         if query_params is None:
             query_params = {}
 
-        return self.execute_request(url, "POST", query_params, post_data)
+        return self.execute_request(url, "POST", query_params, post_data, batch_size)
@@ -2,14 +2,12 @@
 Provides Response to encapsulate API responses.
 """
 
-from builtins import next
-from builtins import str
-from builtins import object
 from housecanary.object import Property
 from housecanary.object import Block
 from housecanary.object import ZipCode
 from housecanary.object import Msa
 from . import utilities
+from .compat import text_type
 
 
 class Response(object):
@@ -93,7 +91,7 @@ class Response(object):
             List of strings
         """
         if self._object_errors is None:
-            self._object_errors = [{str(o): o.get_errors()}
+            self._object_errors = [{text_type(o): o.get_errors()}
                                    for o in self.objects()
                                    if o.has_error()]
 
@@ -0,0 +1,181 @@
+"""
+Provides a PriorityScheduler that orders the requests of an ApiClient by
+priority class, so latency sensitive lookups can share an API key with bulk jobs.
+
+Each class has a share of the in-flight requests and of the rate limit that is
+reserved for it, which lower classes can't use. Waiting requests of a higher
+class are sent before waiting requests of lower classes.
+"""
+
+import collections
+import contextlib
+import heapq
+import itertools
+import math
+import threading
+import time
+
+from housecanary import hooks as hook_events
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+PriorityClass = collections.namedtuple('PriorityClass', ['name', 'share'])
+
+DEFAULT_CLASSES = (PriorityClass(INTERACTIVE, 0.2), PriorityClass(BULK, 0.0))
+
+
+class PriorityScheduler(object):
+    """Limits and orders the requests in flight by priority class."""
+
+    def __init__(self, max_in_flight=8, classes=DEFAULT_CLASSES, default_class=None,
+                 reserve_slots=True):
+        """
+        Args:
+            max_in_flight (int) - Optional. The maximum number of requests in flight
+                                  over all classes. Default is 8.
+            classes - Optional. A list of PriorityClass(name, share) from highest to lowest
+                      priority. share is the fraction of the in-flight requests and of the
+                      rate limit reserved for the class. Default is "interactive" with a
+                      share of 0.2, then "bulk".
+            default_class (str) - Optional. The class of requests made without a priority.
+                                  Default is the first class.
+            reserve_slots (bool) - Optional. If False, shares only reserve the rate limit,
+                                   and every class may use all max_in_flight requests.
+                                   Default is True.
+        """
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.reserve_slots = reserve_slots
+        self.default_class = default_class or classes[0].name
+
+        self._ranks = {}
+        self._reserved_shares = {}
+        reserved_share = 0.0
+        for rank, priority_class in enumerate(classes):
+            self._ranks[priority_class.name] = rank
+            # lower classes can't use the shares of the classes before them
+            self._reserved_shares[priority_class.name] = reserved_share
+            reserved_share += priority_class.share
+        if reserved_share >= 1:
+            raise ValueError("The shares of all classes must add up to less than 1")
+        if self.default_class not in self._ranks:
+            raise ValueError("Unknown default class: {}".format(self.default_class))
+
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._local = threading.local()
+
+        self._rate_limit_remaining = None
+        self._rate_limit_limit = None
+        self._rate_limit_reset = None
+
+    @property
+    def in_flight(self):
+        """The number of requests in flight."""
+        return self._in_flight
+
+    def attach(self, hooks):
+        """Listens to the response events of a client's hooks to track the rate limit."""
+        hooks.register(hook_events.RESPONSE_RECEIVED, self.on_response_received)
+
+    def on_response_received(self, rate_limit_remaining=None, rate_limit_limit=None,
+                             rate_limit_reset=None, **kwargs):
+        """Updates the rate limit from a response."""
+        if rate_limit_remaining is None:
+            return
+        with self._condition:
+            self._rate_limit_remaining = rate_limit_remaining
+            self._rate_limit_limit = rate_limit_limit
+            self._rate_limit_reset = rate_limit_reset
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def priority(self, name):
+        """Sets the class of requests made in this thread without a priority.
+
+        Example:
+            with scheduler.priority("bulk"):
+                client.property.component_mget(addresses, endpoints)
+        """
+        self._get_rank(name)
+        previous = getattr(self._local, 'priority', None)
+        self._local.priority = name
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def current_priority(self, name=None):
+        """Returns name, or the class set for this thread, or the default class."""
+        return name or getattr(self._local, 'priority', None) or self.default_class
+
+    def _get_rank(self, name):
+        try:
+            return self._ranks[name]
+        except KeyError:
+            raise ValueError("Unknown priority class: {}".format(name))
+
+    def _get_slots(self, name):
+        if not self.reserve_slots:
+            return self.max_in_flight
+        reserved = int(math.ceil(self._reserved_shares[name] * self.max_in_flight))
+        return max(1, self.max_in_flight - reserved)
+
+    def _get_quota_wait(self, name):
+        """Returns the seconds until the class may use the rate limit again, or 0."""
+        reserved_share = self._reserved_shares[name]
+        if (not reserved_share or self._rate_limit_remaining is None or
+                not self._rate_limit_limit or self._rate_limit_reset is None):
+            return 0
+        wait = self._rate_limit_reset - time.time()
+        if wait <= 0:
+            return 0
+        if self._rate_limit_remaining > reserved_share * self._rate_limit_limit:
+            return 0
+        return wait
+
+    def acquire(self, name=None):
+        """Waits until a request of a class may be sent and counts it as in flight.
+
+        Call release when the request is done.
+        """
+        name = self.current_priority(name)
+        ticket = (self._get_rank(name), next(self._sequence))
+
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == ticket and self._in_flight < self._get_slots(name):
+                        timeout = self._get_quota_wait(name)
+                        if not timeout:
+                            heapq.heappop(self._waiting)
+                            self._in_flight += 1
+                            # the next waiting request may be able to go too
+                            self._condition.notify_all()
+                            return
+                    self._condition.wait(timeout)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                raise
+
+    def release(self):
+        """Marks a request as done."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, name=None):
+        """A context manager that acquires and releases a request slot."""
+        self.acquire(name)
+        try:
+            yield
+        finally:
+            self.release()
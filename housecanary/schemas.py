@@ -0,0 +1,189 @@
+"""
+Provides a registry of result schemas for the Analytics API endpoints.
+
+A schema lists the known columns of an endpoint's flattened result rows (as
+produced by the Excel export's process_data) with their types. Exporters write
+those columns first, in a fixed order, and write numbers and dates as typed
+values instead of strings. Keys that are not in the schema are picked up while
+the rows are written, in the same pass, so no data is lost when the API adds a
+field.
+
+Schemas are registered for the value, histogram and time series endpoints.
+Other endpoints discover all of their columns from the rows. Use
+`register_schema` to add or replace a schema.
+"""
+
+import datetime
+import json
+from collections import namedtuple
+
+from housecanary.compat import string_types
+
+STRING = 'string'
+NUMBER = 'number'
+INTEGER = 'integer'
+BOOLEAN = 'boolean'
+DATE = 'date'
+JSON = 'json'
+
+# columns of the identifier fields, in the order they lead every row
+IDENTIFIER_COLUMNS = (
+    'address',
+    'unit',
+    'city',
+    'state',
+    'zipcode',
+    'slug',
+    'block_id',
+    'msa',
+    'num_bins',
+    'property_type',
+    'client_value',
+    'client_value_sqft',
+    'meta'
+)
+
+# identifier keys that are query params, they are not always returned in the result info
+QUERY_PARAM_KEYS = ('client_value', 'client_value_sqft', 'num_bins', 'property_type')
+
+IDENTIFIER_TYPES = {
+    'num_bins': INTEGER,
+    'client_value': NUMBER,
+    'client_value_sqft': NUMBER,
+}
+
+
+Field = namedtuple('Field', ['name', 'type'])
+
+
+def _to_number(value):
+    if isinstance(value, string_types):
+        try:
+            return int(value)
+        except ValueError:
+            return float(value)
+    return value
+
+
+def _to_integer(value):
+    return int(value)
+
+
+def _to_boolean(value):
+    if isinstance(value, string_types):
+        return value.lower() in ('true', '1', 'yes')
+    return bool(value)
+
+
+def _to_date(value):
+    if isinstance(value, string_types):
+        return datetime.datetime.strptime(value[:10], '%Y-%m-%d').date()
+    return value
+
+
+def _to_json(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+_CONVERTERS = {
+    NUMBER: _to_number,
+    INTEGER: _to_integer,
+    BOOLEAN: _to_boolean,
+    DATE: _to_date,
+    JSON: _to_json,
+}
+
+
+class ResultSchema(object):
+    """The columns and types of an endpoint's flattened result rows."""
+
+    def __init__(self, endpoint, fields):
+        """
+        Args:
+            endpoint (str) - The endpoint name, like "property/value".
+            fields - A list of (name, type) tuples in column order.
+                     The type is one of STRING, NUMBER, INTEGER, BOOLEAN, DATE or JSON.
+        """
+        self.endpoint = endpoint
+        self.fields = tuple(Field(name, field_type) for name, field_type in fields)
+        self._types = dict(IDENTIFIER_TYPES)
+        self._types.update((field.name, field.type) for field in self.fields)
+
+    def get_columns(self, identifier_keys):
+        """Returns the known column names for rows of this endpoint.
+
+        Args:
+            identifier_keys - The keys used as requested identifiers (address, zipcode, etc).
+
+        Returns:
+            A list of column names, the identifier columns first.
+        """
+        identifier_keys = set(identifier_keys).difference(QUERY_PARAM_KEYS)
+        columns = [key for key in IDENTIFIER_COLUMNS if key in identifier_keys]
+        columns.extend(field.name for field in self.fields)
+        return columns
+
+    def convert_value(self, key, value):
+        """Returns the value converted to the type of the key's column.
+
+        Values that cannot be converted are returned unchanged. Nested values
+        in untyped columns are serialized to json.
+        """
+        if value is None:
+            return None
+        converter = _CONVERTERS.get(self._types.get(key, JSON))
+        if converter is None:
+            return value
+        try:
+            return converter(value)
+        except (TypeError, ValueError):
+            return value
+
+    def convert_row(self, row, columns):
+        """Returns the typed values of a row dict for the given columns."""
+        return [self.convert_value(key, row.get(key)) for key in columns]
+
+
+_SCHEMAS = {}
+
+
+def register_schema(schema):
+    """Adds a ResultSchema to the registry, replacing any schema for the same endpoint."""
+    _SCHEMAS[schema.endpoint] = schema
+    return schema
+
+
+def get_schema(endpoint):
+    """Returns the registered ResultSchema of an endpoint, or None."""
+    return _SCHEMAS.get(endpoint)
+
+
+_VALUE_FIELDS = [('price_upr', NUMBER), ('price_lwr', NUMBER), ('price_mean', NUMBER),
+                 ('fsd', NUMBER)]
+
+_HISTOGRAM_FIELDS = [('bin_min', NUMBER), ('bin_max', NUMBER), ('count', INTEGER)]
+
+# the other fields of a time series vary by endpoint and are discovered from the rows
+_TIME_SERIES_FIELDS = [('month', DATE)]
+
+for _endpoint in ('property/value', 'property/rental_value'):
+    register_schema(ResultSchema(_endpoint, _VALUE_FIELDS))
+
+for _endpoint in ('property/block_histogram_baths', 'property/block_histogram_beds',
+                  'property/block_histogram_building_area', 'property/block_histogram_value',
+                  'property/block_histogram_value_sqft', 'block/histogram_baths',
+                  'block/histogram_beds', 'block/histogram_building_area',
+                  'block/histogram_value', 'block/histogram_value_sqft'):
+    register_schema(ResultSchema(_endpoint, _HISTOGRAM_FIELDS))
+
+for _endpoint in ('property/block_value_ts', 'property/block_value_ts_historical',
+                  'property/block_value_ts_forecast', 'property/msa_hpi_ts',
+                  'property/msa_hpi_ts_forecast', 'property/msa_hpi_ts_historical',
+                  'property/zip_hpi_ts', 'property/zip_hpi_ts_forecast',
+                  'property/zip_hpi_ts_historical', 'block/value_ts', 'block/value_ts_forecast',
+                  'block/value_ts_historical', 'zip/hpi_ts', 'zip/hpi_ts_forecast',
+                  'zip/hpi_ts_historical', 'msa/hpi_ts', 'msa/hpi_ts_forecast',
+                  'msa/hpi_ts_historical'):
+    register_schema(ResultSchema(_endpoint, _TIME_SERIES_FIELDS))
@@ -0,0 +1,158 @@
+"""
+Provides EntryCodec, which turns cache entries into compact bytes for cache
+servers and back.
+
+Entries are msgpack encoded if the msgpack package is installed, which decodes
+straight into the dicts that Response and Property objects are built from,
+without parsing json text. Otherwise they fall back to compact json. Either can
+be compressed with zlib, or zstd if the zstandard package is installed.
+
+Each entry starts with a header of the schema version, the format and the
+compression, so entries written by a client with other packages installed are
+still read correctly, and entries of another schema version are misses.
+"""
+
+import json
+import struct
+import zlib
+
+from housecanary.cache import CacheEntry
+from housecanary.exceptions import CacheBackendException
+
+SCHEMA_VERSION = 1
+
+JSON = "json"
+MSGPACK = "msgpack"
+FORMATS = (JSON, MSGPACK)
+
+ZLIB = "zlib"
+ZSTD = "zstd"
+COMPRESSIONS = (None, ZLIB, ZSTD)
+
+_FORMAT_IDS = {JSON: 0, MSGPACK: 1}
+_COMPRESSION_IDS = {None: 0, ZLIB: 1, ZSTD: 2}
+_HEADER = struct.Struct("!BBBd")
+
+
+def _import_msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def _import_zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def get_default_format():
+    """Returns "msgpack" if the msgpack package is installed, otherwise "json"."""
+    if _import_msgpack() is not None:
+        return MSGPACK
+    return JSON
+
+
+class EntryCodec(object):
+    """Encodes CacheEntry objects to bytes and decodes them."""
+
+    def __init__(self, format=None, compression=None, compression_level=None,
+                 compression_threshold=512):
+        """
+        Args:
+            format (str) - Optional. "msgpack" or "json". Default is "msgpack" if the
+                           msgpack package is installed, otherwise "json".
+            compression (str) - Optional. Compress entries with "zlib" or "zstd" (requires
+                                the zstandard package). Default is None.
+            compression_level (int) - Optional. Default is 6 for zlib and 3 for zstd.
+            compression_threshold (int) - Optional. Only compress entries of at least
+                                          this many bytes. Default is 512.
+        """
+        # pylint: disable=redefined-builtin
+        self.format = format or get_default_format()
+        if self.format not in FORMATS:
+            raise ValueError("format must be one of {}".format(", ".join(FORMATS)))
+        if self.format == MSGPACK and _import_msgpack() is None:
+            raise ValueError("msgpack serialization requires the msgpack package")
+        if compression not in COMPRESSIONS:
+            raise ValueError("compression must be zlib or zstd")
+        if compression == ZSTD and _import_zstandard() is None:
+            raise ValueError("zstd compression requires the zstandard package")
+
+        self.compression = compression
+        self._compression_threshold = compression_threshold
+        self._compressor = None
+        if compression == ZLIB:
+            level = 6 if compression_level is None else compression_level
+            self._compressor = lambda data: zlib.compress(data, level)
+        elif compression == ZSTD:
+            level = 3 if compression_level is None else compression_level
+            self._compressor = _import_zstandard().ZstdCompressor(level=level).compress
+
+    def encode(self, entry):
+        """Returns the bytes of a CacheEntry."""
+        if self.format == MSGPACK:
+            data = _import_msgpack().packb(entry.value, use_bin_type=True)
+        else:
+            data = json.dumps(entry.value, separators=(",", ":")).encode("utf-8")
+
+        compression = None
+        if self._compressor is not None and len(data) >= self._compression_threshold:
+            compressed = self._compressor(data)
+            if len(compressed) < len(data):
+                compression = self.compression
+                data = compressed
+
+        return _HEADER.pack(SCHEMA_VERSION, _FORMAT_IDS[self.format],
+                            _COMPRESSION_IDS[compression], entry.stored_at) + data
+
+    @staticmethod
+    def decode(data):
+        """Returns the CacheEntry of bytes written by any EntryCodec.
+
+        Raises:
+            CacheBackendException if the entry is invalid, has another schema version,
+            or its format or compression needs a package that is not installed.
+        """
+        if len(data) < _HEADER.size:
+            raise CacheBackendException("Invalid cache entry")
+        version, format_id, compression_id, stored_at = _HEADER.unpack_from(data)
+        if version != SCHEMA_VERSION:
+            raise CacheBackendException("Cache entry has schema version {}".format(version))
+        body = data[_HEADER.size:]
+        try:
+            return CacheEntry(_load(format_id, _decompress(compression_id, body)), stored_at)
+        except (ValueError, zlib.error) as e:
+            # msgpack and json errors derive from ValueError
+            raise CacheBackendException("Invalid cache entry: {}".format(e))
+
+
+def _decompress(compression_id, body):
+    if compression_id == _COMPRESSION_IDS[None]:
+        return body
+    if compression_id == _COMPRESSION_IDS[ZLIB]:
+        return zlib.decompress(body)
+    if compression_id == _COMPRESSION_IDS[ZSTD]:
+        zstandard = _import_zstandard()
+        if zstandard is None:
+            raise CacheBackendException("Cache entry requires the zstandard package")
+        try:
+            return zstandard.ZstdDecompressor().decompress(body)
+        except zstandard.ZstdError as e:
+            raise CacheBackendException("Invalid cache entry: {}".format(e))
+    raise CacheBackendException("Unknown cache entry compression")
+
+
+def _load(format_id, body):
+    if format_id == _FORMAT_IDS[MSGPACK]:
+        msgpack = _import_msgpack()
+        if msgpack is None:
+            raise CacheBackendException("Cache entry requires the msgpack package")
+        return msgpack.unpackb(body, raw=False)
+    if format_id == _FORMAT_IDS[JSON]:
+        return json.loads(body.decode("utf-8"))
+    raise CacheBackendException("Unknown cache entry format")
@@ -0,0 +1,263 @@
+"""
+Provides an on-disk store of per identifier API results, for jobs with more
+results than fit in memory.
+
+Records are appended to a data file as compact JSON lines and read back through
+a memory map, so only the records that are used are loaded. An index file next
+to the data file maps (endpoint name, identifier) to each record's offset, and
+is loaded into memory when the store is opened.
+"""
+
+import json
+import mmap
+import os
+import threading
+import warnings
+
+from housecanary import streaming
+from housecanary.exceptions import ResultStoreException
+from housecanary.compat import string_types
+from housecanary.response import Response
+
+INDEX_SUFFIX = ".idx"
+
+_NEWLINE = b"\n"
+
+
+def get_identifier_key(identifier):
+    """Returns the string that identifies an identifier in a ResultStore.
+
+    Strings (slugs, block ids, zipcodes, msas) are used as is, and so is the only
+    value of a dict with a single key, so {"slug": slug} and slug are the same
+    identifier. Other dicts, like the ones returned by a wrapper's convert_identifier,
+    are serialized with sorted keys.
+    """
+    if isinstance(identifier, dict) and len(identifier) == 1:
+        identifier = next(iter(identifier.values()))
+    if isinstance(identifier, string_types):
+        return identifier
+    return json.dumps(identifier, sort_keys=True, separators=(",", ":"))
+
+
+def _get_index_key(endpoint_name, identifier_key):
+    return endpoint_name + "\x00" + identifier_key
+
+
+class ResultStore(object):
+    """An append-only, memory-mapped file of JSON records, indexed by endpoint and identifier.
+
+    Writing a record for an endpoint and identifier that is already in the store
+    appends a new record, which replaces the old one in the index.
+
+    Use as a context manager, or call close when done.
+    """
+
+    def __init__(self, path, readonly=False):
+        """
+        Args:
+            path (str) - The data file path. The index is kept in path + ".idx".
+                         Both files are created if they don't exist.
+            readonly (bool) - Optional. Open the store for reading only. Default is False.
+
+        Raises:
+            ResultStoreException if the data file has records but the index file is missing,
+            since the records can't be found without it.
+        """
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.readonly = readonly
+
+        self._index = {}
+        self._lock = threading.Lock()
+        self._map = None
+        self._map_size = 0
+        self._data_file = None
+        self._index_file = None
+        # index lines of records that are not synced to disk yet
+        self._pending_index = []
+
+        self._size, index_size = self._load_index()
+
+        if not readonly:
+            self._data_file = open(path, "ab")
+            data_size = os.fstat(self._data_file.fileno()).st_size
+            if data_size > self._size:
+                # drop the records of an interrupted write that were never indexed
+                warnings.warn("Dropping {} bytes of unindexed records from the end of {}".format(
+                    data_size - self._size, path), RuntimeWarning)
+                self._data_file.truncate(self._size)
+            self._index_file = open(self.index_path, "ab")
+            # and a partial index line, so the next line starts on its own
+            self._index_file.truncate(index_size)
+
+        self._reader = open(path, "rb") if os.path.exists(path) else None
+        self._dirty = False
+
+    def _load_index(self):
+        """Reads the index file and returns the size of the indexed data and
+        the size of the complete index lines."""
+        size = 0
+        index_size = 0
+        if not os.path.exists(self.index_path):
+            if os.path.exists(self.path) and os.path.getsize(self.path):
+                raise ResultStoreException(
+                    "{} has records but its index {} is missing".format(self.path,
+                                                                        self.index_path))
+            return size, index_size
+
+        with open(self.index_path, "rb") as index_file:
+            for line in index_file:
+                if not line.endswith(_NEWLINE):
+                    # the last line of an interrupted write
+                    break
+                offset, endpoint_name, identifier_key, length = json.loads(line.decode("utf-8"))
+                self._index[_get_index_key(endpoint_name, identifier_key)] = (offset, length)
+                size = max(size, offset + length + 1)
+                index_size += len(line)
+        return size, index_size
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, endpoint_identifier):
+        endpoint_name, identifier = endpoint_identifier
+        return _get_index_key(endpoint_name, get_identifier_key(identifier)) in self._index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, endpoint_name, identifier, record):
+        """Appends the json record of an identifier's result.
+
+        Args:
+            endpoint_name (str) - The endpoint name, like "property/value".
+            identifier - The identifier as a string or a dict.
+            record - The json serializable result of the identifier.
+        """
+        data = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        self.write_raw(endpoint_name, identifier, data)
+
+    def write_raw(self, endpoint_name, identifier, data):
+        """Appends a record that is already serialized to json bytes without newlines."""
+        if self.readonly:
+            raise ValueError("ResultStore was opened read only")
+
+        identifier_key = get_identifier_key(identifier)
+        with self._lock:
+            offset = self._size
+            self._data_file.write(data)
+            self._data_file.write(_NEWLINE)
+            self._size = offset + len(data) + 1
+            self._dirty = True
+
+            line = json.dumps([offset, endpoint_name, identifier_key, len(data)],
+                              separators=(",", ":"))
+            self._pending_index.append(line.encode("utf-8") + _NEWLINE)
+            self._index[_get_index_key(endpoint_name, identifier_key)] = (offset, len(data))
+
+    def flush(self):
+        """Flushes written records to disk, then writes their index lines."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._dirty:
+            # the records reach the disk before the index lines that point to them
+            self._data_file.flush()
+            os.fsync(self._data_file.fileno())
+            self._index_file.write(b"".join(self._pending_index))
+            self._index_file.flush()
+            self._pending_index = []
+            self._dirty = False
+
+    def _get_map(self, end):
+        """Returns a memory map of the data file that covers at least `end` bytes."""
+        if self._map is not None and self._map_size >= end:
+            return self._map
+
+        with self._lock:
+            self._flush()
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            if self._map is not None:
+                self._map.close()
+            self._map_size = os.fstat(self._reader.fileno()).st_size
+            self._map = mmap.mmap(self._reader.fileno(), self._map_size,
+                                  access=mmap.ACCESS_READ)
+            return self._map
+
+    def _read(self, offset, length):
+        return self._get_map(offset + length)[offset:offset + length]
+
+    def get_raw(self, endpoint_name, identifier):
+        """Returns the json bytes of an identifier's record, or None if it is not stored."""
+        location = self._index.get(_get_index_key(endpoint_name, get_identifier_key(identifier)))
+        if location is None:
+            return None
+        return self._read(*location)
+
+    def get(self, endpoint_name, identifier, default=None):
+        """Returns the record of an identifier, or default if it is not stored."""
+        data = self.get_raw(endpoint_name, identifier)
+        if data is None:
+            return default
+        return json.loads(data.decode("utf-8"))
+
+    def keys(self, endpoint_name=None):
+        """Returns a list of the (endpoint name, identifier key) tuples in the store."""
+        keys = (tuple(key.split("\x00", 1)) for key in self._index)
+        if endpoint_name is None:
+            return list(keys)
+        return [key for key in keys if key[0] == endpoint_name]
+
+    def iter_records(self, endpoint_name):
+        """Yields the (identifier key, record) tuples of an endpoint, in the order written.
+
+        Only the current record of each identifier is yielded.
+        """
+        prefix = endpoint_name + "\x00"
+        locations = sorted((location, key[len(prefix):]) for key, location in self._index.items()
+                           if key.startswith(prefix))
+        for (offset, length), identifier_key in locations:
+            yield identifier_key, json.loads(self._read(offset, length).decode("utf-8"))
+
+    def iter_objects(self, endpoint_name):
+        """Yields the Property, Block, ZipCode or Msa object of each record of an endpoint."""
+        object_type = streaming.OBJECT_TYPES[endpoint_name.split("/")[0]]
+        for _, record in self.iter_records(endpoint_name):
+            yield object_type.create_from_json(record)
+
+    def get_response(self, endpoint_name, identifiers):
+        """Returns a Response of the stored records of some identifiers.
+
+        Identifiers that are not in the store are skipped.
+
+        Args:
+            endpoint_name (str) - The endpoint name, like "property/value".
+            identifiers - An iterable of identifiers, as strings or dicts.
+        """
+        records = []
+        for identifier in identifiers:
+            record = self.get(endpoint_name, identifier)
+            if record is not None:
+                records.append(record)
+        return Response.create(endpoint_name, records, None)
+
+    def close(self):
+        """Flushes and closes the store's files."""
+        with self._lock:
+            if self._data_file is not None:
+                self._flush()
+                self._data_file.close()
+                self._index_file.close()
+                self._data_file = None
+                self._index_file = None
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
@@ -0,0 +1,201 @@
+"""
+Provides incremental parsing of JSON array response bodies, so the items of
+a large batch response can be used while the rest is still downloading.
+"""
+
+import codecs
+import json
+import numbers
+
+from housecanary.object import Property
+from housecanary.object import Block
+from housecanary.object import ZipCode
+from housecanary.object import Msa
+from housecanary import utilities
+
+CHUNK_SIZE = 64 * 1024
+
+OBJECT_TYPES = {
+    "property": Property,
+    "block": Block,
+    "zip": ZipCode,
+    "msa": Msa,
+}
+
+_WHITESPACE = " \t\n\r"
+
+# chars that can follow the digits of a number that is not complete yet, like "1." or "1e+"
+_NUMBER_CONTINUATION = ".eE+-"
+
+
+def _skip_whitespace(buf, pos):
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _may_continue(item, buf, end):
+    """Returns whether an item decoded up to end could be part of a longer number."""
+    if end == len(buf):
+        return True
+    if isinstance(item, bool) or not isinstance(item, numbers.Number):
+        return False
+    return all(char in _NUMBER_CONTINUATION for char in buf[end:])
+
+
+class _TextStream(object):
+    """Decodes an iterable of utf-8 byte chunks into a growing text buffer."""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.eof = False
+
+    def read_more(self):
+        """Appends the next chunk to buf. Returns False at the end of the stream."""
+        while not self.eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.eof = True
+                self.buf += self._decoder.decode(b"", True)
+                return False
+            text = self._decoder.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+        return False
+
+    def compact(self, pos):
+        """Drops the consumed part of buf."""
+        self.buf = self.buf[pos:]
+
+    def next_char(self, pos):
+        """Skips whitespace from pos, reading more as needed.
+
+        Returns:
+            (char, pos) of the next non whitespace char, char is None at the end of the stream.
+        """
+        pos = _skip_whitespace(self.buf, pos)
+        while pos >= len(self.buf):
+            if not self.read_more():
+                return None, pos
+            pos = _skip_whitespace(self.buf, pos)
+        return self.buf[pos], pos
+
+
+def iter_json_array(chunks):
+    """Yields the items of a top level JSON array as each one is complete.
+
+    Args:
+        chunks - An iterable of bytes, such as `response.iter_content(CHUNK_SIZE)`.
+                 The chunks can split items, and multi-byte characters, anywhere.
+
+    Raises:
+        ValueError if the body is not a valid JSON array.
+    """
+    decoder = json.JSONDecoder()
+    stream = _TextStream(chunks)
+
+    char, pos = stream.next_char(0)
+    if char != "[":
+        raise ValueError("Expected a JSON array")
+
+    char, pos = stream.next_char(pos + 1)
+    if char == "]":
+        return
+
+    # Decoding an incomplete item fails only after parsing all of it, so an item
+    # is decoded once as much has been buffered as the previous item took, and
+    # after that only each time the buffered part of it has doubled.
+    min_size = 0
+
+    while True:
+        if char is None:
+            raise ValueError("Unterminated JSON array")
+
+        while len(stream.buf) - pos < min_size and stream.read_more():
+            pass
+
+        try:
+            item, end = decoder.raw_decode(stream.buf, pos)
+        except ValueError:
+            # the item is not complete yet
+            min_size = 2 * (len(stream.buf) - pos)
+            if not stream.read_more():
+                raise
+            continue
+
+        if _may_continue(item, stream.buf, end) and stream.read_more():
+            # a number at the end of the buffer could continue in the next chunk
+            continue
+
+        char, delimiter_pos = stream.next_char(end)
+        if char == ",":
+            yield item
+            min_size = end - pos
+            stream.compact(delimiter_pos + 1)
+            char, pos = stream.next_char(0)
+        elif char == "]":
+            yield item
+            return
+        elif char is None:
+            raise ValueError("Unterminated JSON array")
+        else:
+            raise ValueError("Expected ',' or ']' at position {}".format(delimiter_pos))
+
+
+class StreamingResponse(object):
+    """Iterates over the items of a JSON array response as they are downloaded.
+
+    Each item can only be iterated once, because items are not kept after
+    they are yielded.
+    """
+
+    def __init__(self, endpoint_name, items, original_response, object_type=None):
+        """
+        Args:
+            endpoint_name (str) - The endpoint of the request, such as "property/value"
+            items - An iterator of the decoded items of the response body.
+            original_response (response object) - server response returned from an http request.
+            object_type - Optional. A HouseCanaryObject class to create from each item.
+                          If None, the items are yielded as dicts.
+        """
+        self._endpoint_name = endpoint_name
+        self._items = items
+        self._response = original_response
+        self._object_type = object_type
+        self._rate_limits = None
+
+    @property
+    def endpoint_name(self):
+        """Get the component name of the original request."""
+        return self._endpoint_name
+
+    @property
+    def response(self):
+        """Gets the original response"""
+        return self._response
+
+    @property
+    def rate_limits(self):
+        """Returns a list of rate limit details."""
+        if not self._rate_limits:
+            self._rate_limits = utilities.get_rate_limits(self.response)
+
+        return self._rate_limits
+
+    def __iter__(self):
+        try:
+            for item in self._items:
+                if self._object_type is not None:
+                    yield self._object_type.create_from_json(item)
+                else:
+                    yield item
+        finally:
+            self.close()
+
+    def close(self):
+        """Releases the connection of the original response."""
+        if self._response is not None:
+            self._response.close()
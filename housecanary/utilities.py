@@ -1,7 +1,11 @@
 """Utility functions for hc-api-python"""
 
+import itertools
+import zlib
 from datetime import datetime
 
+from housecanary.compat import urlparse
+
 
 def get_readable_time_string(seconds):
     """Returns human readable string from number of seconds"""
@@ -71,3 +75,108 @@ def get_rate_limits(response):
         rate_limits.append(rate_limit)
 
     return rate_limits
+
+
+def get_endpoint_name_from_url(request_url):
+    """Returns the endpoint name, like "property/value", from a request url."""
+    # get the path from the url
+    path = urlparse(request_url).path
+
+    # path is like "/v2/property/value"
+
+    # strip off the leading "/"
+    path = path[1:]
+
+    # keep only the part after the version and "/"
+    path = path[path.find("/")+1:]
+
+    # path is now like "property/value"
+    return path
+
+
+def iter_batches(items, batch_size):
+    """Yields lists of up to batch_size items from any iterable, reading it lazily."""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _parse_rate_limit_header(headers, name):
+    value = headers.get(name)
+    if not value:
+        return None
+    try:
+        return min(int(v) for v in value.split(','))
+    except ValueError:
+        return None
+
+
+def get_rate_limit_remaining(headers):
+    """Returns the lowest requests remaining over all rate limit periods
+    from response headers, or None if the headers are missing."""
+    return _parse_rate_limit_header(headers, 'X-RateLimit-Remaining')
+
+
+def get_rate_limit_limit(headers):
+    """Returns the lowest request limit over all rate limit periods
+    from response headers, or None if the headers are missing."""
+    return _parse_rate_limit_header(headers, 'X-RateLimit-Limit')
+
+
+def get_rate_limit_reset(headers):
+    """Returns the reset time, in epoch seconds, of the rate limit period with the
+    fewest requests remaining, or None if the headers are missing."""
+    remaining = headers.get('X-RateLimit-Remaining')
+    reset = headers.get('X-RateLimit-Reset')
+    if not remaining or not reset:
+        return None
+    try:
+        periods = zip((int(v) for v in remaining.split(',')), (int(v) for v in reset.split(',')))
+        return min(periods)[1]
+    except ValueError:
+        return None
+
+
+def _import_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def get_accept_encoding():
+    """Returns the Accept-Encoding header value for the encodings that can be decoded.
+
+    Brotli is only included if the brotli package is installed.
+    """
+    if _import_brotli() is not None:
+        return "gzip, deflate, br"
+    return "gzip, deflate"
+
+
+def compress_body(data, encoding, level=6):
+    """Compresses request body bytes.
+
+    Args:
+        data (bytes) - The body to compress.
+        encoding (str) - One of "gzip", "deflate" or "br".
+        level (int) - Optional. The compression level. Default is 6.
+
+    Returns:
+        The compressed bytes.
+    """
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == "deflate":
+        return zlib.compress(data, level)
+    if encoding == "br":
+        brotli = _import_brotli()
+        if brotli is None:
+            raise ValueError("brotli compression requires the brotli package")
+        return brotli.compress(data, quality=level)
+    raise ValueError("Unsupported compression: {}".format(encoding))
@@ -0,0 +1,154 @@
+"""
+Provides bulk validation and conversion of column oriented identifier batches,
+such as a dict of lists or a pandas DataFrame, into the list of dicts expected
+by the ApiClient fetch method.
+"""
+
+import housecanary.exceptions
+
+# only this many row errors are listed in the report summary
+MAX_REPORTED_ERRORS = 10
+
+
+def _is_missing(value):
+    # NaN is the only value that is not equal to itself
+    return value is None or value != value
+
+
+def _get_missing_rows(values):
+    """Returns the set of row indexes of missing values in a column."""
+    # most columns have no missing values, so look for them with fast
+    # checks before comparing every value
+    if float in set(map(type, values)):
+        return set(row for row, value in enumerate(values) if _is_missing(value))
+    if None in values:
+        return set(row for row, value in enumerate(values) if value is None)
+    return set()
+
+
+def get_columns(data):
+    """Returns a dict of column name to list of values.
+
+    Args:
+        data - A dict of lists (or other sequences), or a pandas DataFrame.
+    """
+    if hasattr(data, "columns") and hasattr(data, "iloc"):
+        # a pandas DataFrame, tolist converts numpy scalars to python types
+        return {name: data[name].tolist() for name in data.columns}
+
+    if isinstance(data, dict):
+        return {name: list(values) for name, values in data.items()}
+
+    raise housecanary.exceptions.InvalidInputException(
+        "Column input must be a dict of lists or a pandas DataFrame.")
+
+
+class ValidationReport(object):
+    """The result of validating a batch of identifiers."""
+
+    def __init__(self, input_name, num_rows):
+        """
+        Args:
+            input_name (str) - The kind of identifier, like "address".
+            num_rows (int) - The number of rows in the batch.
+        """
+        self.input_name = input_name
+        self.num_rows = num_rows
+        self.unknown_keys = []
+        self.errors = []
+        self.valid_rows = []
+
+    def add_error(self, row, message):
+        """Records an error for a row index."""
+        self.errors.append((row, message))
+
+    @property
+    def num_invalid(self):
+        """The number of rows that did not pass validation."""
+        return self.num_rows - len(self.valid_rows)
+
+    def is_valid(self):
+        """Returns True if every row passed validation."""
+        return self.num_invalid == 0
+
+    def raise_for_errors(self):
+        """Raises InvalidInputException with the summary if any row is invalid."""
+        if not self.is_valid():
+            raise housecanary.exceptions.InvalidInputException(str(self))
+
+    def __str__(self):
+        if self.is_valid():
+            return "All {} {} rows are valid.".format(self.num_rows, self.input_name)
+
+        lines = ["{} of {} {} rows are invalid.".format(
+            self.num_invalid, self.num_rows, self.input_name)]
+        if self.unknown_keys:
+            lines.append("Keys in {} input not allowed: {}".format(
+                self.input_name, ", ".join(self.unknown_keys)))
+        for row, message in self.errors[:MAX_REPORTED_ERRORS]:
+            lines.append("Row {}: {}".format(row, message))
+        if len(self.errors) > MAX_REPORTED_ERRORS:
+            lines.append("... and {} more".format(len(self.errors) - MAX_REPORTED_ERRORS))
+        return "\n".join(lines)
+
+
+def convert_columns(data, allowed_keys, required_keys, input_name):
+    """Validates a column oriented batch and converts its valid rows to identifier dicts.
+
+    Keys are checked once per column instead of once per row. Missing values
+    (None or NaN) are left out of the identifier dicts.
+
+    Args:
+        data - A dict of lists, or a pandas DataFrame.
+        allowed_keys (frozenset) - The keys allowed in an identifier.
+        required_keys (tuple) - At least one of these keys must have a value in every row.
+        input_name (str) - The kind of identifier, like "address", used in error messages.
+
+    Returns:
+        A tuple of (identifier_input, ValidationReport). The report's valid_rows
+        are the row indexes of the items in identifier_input.
+    """
+    columns = get_columns(data)
+
+    lengths = set(len(values) for values in columns.values())
+    if len(lengths) > 1:
+        raise housecanary.exceptions.InvalidInputException(
+            "All columns must have the same length.")
+    num_rows = lengths.pop() if lengths else 0
+
+    report = ValidationReport(input_name, num_rows)
+
+    report.unknown_keys = sorted(key for key in columns if key not in allowed_keys)
+    if report.unknown_keys:
+        # every row would contain the unknown keys
+        return [], report
+
+    present_required = [key for key in required_keys if key in columns]
+    if not present_required:
+        for row in range(num_rows):
+            report.add_error(row, "Missing {}".format(" or ".join(required_keys)))
+        return [], report
+
+    keys = list(columns)
+    missing = {key: _get_missing_rows(values) for key, values in columns.items()}
+    invalid_rows = set.intersection(*[missing[key] for key in present_required])
+    rows_with_missing = set.union(*missing.values())
+
+    rows = zip(*[columns[key] for key in keys])
+    if not rows_with_missing:
+        report.valid_rows = list(range(num_rows))
+        return [dict(zip(keys, values)) for values in rows], report
+
+    identifier_input = []
+    for row, values in enumerate(rows):
+        if row in rows_with_missing:
+            if row in invalid_rows:
+                report.add_error(row, "Missing {}".format(" or ".join(required_keys)))
+                continue
+            identifier_input.append({key: value for key, value in zip(keys, values)
+                                     if not _is_missing(value)})
+        else:
+            identifier_input.append(dict(zip(keys, values)))
+        report.valid_rows.append(row)
+
+    return identifier_input, report
@@ -36,14 +36,22 @@ setup(name='housecanary',
       author_email='techops@housecanary.com',
       license='MIT',
       packages=find_packages(include=['housecanary', 'housecanary.*']),
-      install_requires=['requests', 'docopt', 'openpyxl', 'python-slugify', 'future'],
+      install_requires=['requests', 'docopt', 'openpyxl', 'python-slugify', 'future',
+                        'futures; python_version < "3"'],
+      extras_require={
+          'brotli': ['brotli'],
+          'msgpack': ['msgpack'],
+          'pandas': ['pandas'],
+          'zstd': ['zstandard'],
+      },
       zip_safe=False,
       test_suite='nose.collector',
       tests_require=test_requirements(),
       entry_points={
           'console_scripts': [
               'hc_api_excel_concat=housecanary.hc_api_excel_concat.hc_api_excel_concat:main',
-              'hc_api_export=housecanary.hc_api_export.hc_api_export:main'
+              'hc_api_export=housecanary.hc_api_export.hc_api_export:main',
+              'hc_api_prefetch=housecanary.hc_api_prefetch.hc_api_prefetch:main'
           ]
       },
       classifiers=[
@@ -1,6 +1,7 @@
 # pylint: disable=missing-docstring
 
 import unittest
+import itertools
 import requests_mock
 import os
 try:
@@ -740,5 +741,86 @@ class MsaComponentWrapperApiCallsTestCase(unittest.TestCase):
         self.assertEqual(response.endpoint_name, "msa/component_mget")
 
 
+class IterFetchTestCase(unittest.TestCase):
+    """Tests for ApiClient.iter_fetch"""
+
+    def setUp(self):
+        self.client = ApiClient(output_generator=JsonOutputGenerator())
+        self.requests = []
+
+    def echo(self, request, context):
+        # echo each identifier back as the result of its request
+        if request.method == "POST":
+            identifiers = request.json()
+        else:
+            identifiers = [{"zipcode": request.qs["zipcode"][0]}]
+        self.requests.append(len(identifiers))
+        return [{"zipcode_info": identifier} for identifier in identifiers]
+
+    def test_iter_fetch(self):
+        zipcodes = ("{:05d}".format(idx) for idx in range(5))
+
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, "/v2/zip/details", json=self.echo)
+            results = list(self.client.iter_fetch("zip/details", zipcodes, batch_size=2))
+
+        self.assertEqual(
+            [(zipcode, {"zipcode_info": {"zipcode": zipcode}})
+             for zipcode in ("00000", "00001", "00002", "00003", "00004")],
+            results)
+        self.assertEqual([2, 2, 1], sorted(self.requests, reverse=True))
+
+    def test_iter_fetch_unordered(self):
+        zipcodes = ["{:05d}".format(idx) for idx in range(10)]
+
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, "/v2/zip/details", json=self.echo)
+            results = list(self.client.iter_fetch("zip/details", iter(zipcodes), batch_size=3,
+                                                  ordered=False))
+
+        self.assertEqual(zipcodes, sorted(identifier for identifier, _ in results))
+
+    def test_iter_fetch_reads_lazily(self):
+        consumed = []
+
+        def zipcodes():
+            for idx in itertools.count():
+                consumed.append(idx)
+                yield "{:05d}".format(idx)
+
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, "/v2/zip/details", json=self.echo)
+            results = self.client.iter_fetch("zip/details", zipcodes(), batch_size=10,
+                                             concurrency=2)
+            first = list(itertools.islice(results, 25))
+            results.close()
+
+        self.assertEqual("00024", first[-1][0])
+        # at most the batches in flight are read ahead
+        self.assertLessEqual(len(consumed), 50)
+
+    def test_iter_fetch_objects(self):
+        client = ApiClient()
+        headers = {"content-type": "application/json"}
+
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, "/v2/zip/details", headers=headers,
+                              json=self.echo)
+            results = list(client.iter_fetch("zip/details", iter(["90274", "01960"])))
+
+        self.assertEqual(["90274", "01960"], [zipcode.zipcode for _, zipcode in results])
+
+    def test_iter_fetch_short_result(self):
+        def drop_last(request, context):
+            return self.echo(request, context)[:-1]
+
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, "/v2/zip/details", json=drop_last)
+            with self.assertRaises(housecanary.exceptions.IncompleteResultException) as context:
+                list(self.client.iter_fetch("zip/details", iter(["90274", "01960"])))
+
+        self.assertEqual(["90274", "01960"], context.exception.identifiers)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,130 @@
+# pylint: disable=missing-docstring
+
+import hashlib
+import hmac
+import unittest
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+import requests
+import requests_mock
+from housecanary.authentication import HCAuthV1
+from housecanary.compat import urlparse, parse_qsl
+from housecanary.requestclient import RequestClient
+
+URL = "https://api.housecanary.com/v2/property/value"
+TIMESTAMP = 1500000000
+
+
+def expected_signature(secret, message_parts):
+    return hmac.new(secret.encode("utf-8"), b"\n".join(message_parts),
+                    digestmod=hashlib.sha1).hexdigest()
+
+
+@patch.object(HCAuthV1, "_get_timestamp_utc", staticmethod(lambda: TIMESTAMP))
+class HCAuthV1TestCase(unittest.TestCase):
+    def setUp(self):
+        self.auth = HCAuthV1("my_key", "my_secret")
+
+    def prepare(self, method, params=None, json=None):
+        return requests.Request(method, URL, params=params, json=json, auth=self.auth).prepare()
+
+    def test_get_request(self):
+        request = self.prepare("GET", {"address": "43 Valmonte Plz", "zipcode": "90274"})
+
+        query_string = ("address=43+Valmonte+Plz&zipcode=90274&AuthKey=my_key"
+                        "&AuthProto=hc_hmac_v1&AuthTimestamp=1500000000")
+        self.assertEqual(URL + "?" + query_string, request.url)
+        self.assertEqual(
+            expected_signature("my_secret", [b"GET", b"/v2/property/value",
+                                             query_string.encode("utf-8"), b""]),
+            request.headers["X-Auth-Signature"])
+
+    def test_post_request_signs_body(self):
+        post_data = [{"address": "43 Valmonte Plz", "zipcode": "90274"}]
+        request = self.prepare("POST", json=post_data)
+
+        query_string = "AuthKey=my_key&AuthProto=hc_hmac_v1&AuthTimestamp=1500000000"
+        self.assertEqual(
+            expected_signature("my_secret", [b"POST", b"/v2/property/value",
+                                             query_string.encode("utf-8"), request.body]),
+            request.headers["X-Auth-Signature"])
+
+    def test_sign_url_matches_prepared_request(self):
+        params = {"slug": "123-Main-St-Springfield-MA-01101", "components": "property/value"}
+        request = self.prepare("GET", params)
+
+        signed_url, signature = self.auth.sign_url("GET", URL, params)
+
+        self.assertEqual(request.url, signed_url)
+        self.assertEqual(request.headers["X-Auth-Signature"], signature)
+
+    def test_sign_url_replaces_auth_params_and_drops_none(self):
+        signed_url, _ = self.auth.sign_url(
+            "GET", URL, {"AuthKey": "other", "unit": None, "zipcode": "90274"})
+
+        self.assertEqual(
+            [("zipcode", "90274"), ("AuthKey", "my_key"), ("AuthProto", "hc_hmac_v1"),
+             ("AuthTimestamp", "1500000000")],
+            parse_qsl(urlparse(signed_url).query))
+
+    def test_signing_is_repeatable(self):
+        first = self.auth.get_signature("GET", "/v2/property/value", "a=1")
+        second = self.auth.get_signature("GET", "/v2/property/value", "a=1")
+
+        self.assertEqual(first, second)
+        self.assertEqual(expected_signature("my_secret", [b"GET", b"/v2/property/value",
+                                                          b"a=1", b""]), first)
+
+
+@patch.object(HCAuthV1, "_get_timestamp_utc", staticmethod(lambda: TIMESTAMP))
+class RequestClientSigningTestCase(unittest.TestCase):
+    def test_get_request_is_signed(self):
+        auth = HCAuthV1("my_key", "my_secret")
+        client = RequestClient(authenticator=auth)
+
+        with requests_mock.Mocker() as mock:
+            mock.get(URL, json={})
+            client.get(URL, {"zipcode": "90274"})
+            request = mock.request_history[0]
+
+        query_string = "zipcode=90274&AuthKey=my_key&AuthProto=hc_hmac_v1&AuthTimestamp=1500000000"
+        self.assertEqual(URL + "?" + query_string, request.url)
+        self.assertEqual(
+            expected_signature("my_secret", [b"GET", b"/v2/property/value",
+                                             query_string.encode("utf-8"), b""]),
+            request.headers["X-Auth-Signature"])
+
+    def test_post_request_signs_the_sent_body(self):
+        auth = HCAuthV1("my_key", "my_secret")
+        client = RequestClient(authenticator=auth)
+        post_data = [{"address": "43 Valmonte Plz", "zipcode": "90274"}]
+
+        with requests_mock.Mocker() as mock:
+            mock.post(URL, json={})
+            client.post(URL, post_data)
+            request = mock.request_history[0]
+
+        query_string = "AuthKey=my_key&AuthProto=hc_hmac_v1&AuthTimestamp=1500000000"
+        self.assertEqual(b'[{"address":"43 Valmonte Plz","zipcode":"90274"}]', request.body)
+        self.assertEqual("application/json", request.headers["Content-Type"])
+        self.assertEqual(post_data, request.json())
+        self.assertEqual(
+            expected_signature("my_secret", [b"POST", b"/v2/property/value",
+                                             query_string.encode("utf-8"), request.body]),
+            request.headers["X-Auth-Signature"])
+
+    def test_post_request_with_serialized_body(self):
+        client = RequestClient(authenticator=HCAuthV1("my_key", "my_secret"))
+        body = b'[{"slug": "123-Main-St-Springfield-MA-01101"}]'
+
+        with requests_mock.Mocker() as mock:
+            mock.post(URL, json={})
+            client.post(URL, body)
+
+            self.assertIs(body, mock.request_history[0].body)
+
+
+if __name__ == "__main__":
+    unittest.main()
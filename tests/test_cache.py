@@ -0,0 +1,227 @@
+# pylint: disable=missing-docstring
+
+import threading
+import time
+import unittest
+try:
+    from urllib.parse import parse_qs, urlsplit
+except ImportError:
+    from urlparse import parse_qs, urlsplit
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.cache import CacheEntry, MemoryCacheBackend, ResponseCache, get_cache_key
+from housecanary.output import JsonOutputGenerator, StreamingOutputGenerator
+from housecanary.response import PropertyResponse
+import housecanary.exceptions
+
+
+def value_callback(request, context):
+    context.headers['content-type'] = 'application/json'
+    if request.method == 'GET':
+        # request.qs lowercases the values
+        identifiers = [{'address': parse_qs(urlsplit(request.url).query)['address'][0]}]
+    else:
+        identifiers = request.json()
+    return [{'address_info': {'address': identifier['address']},
+             'property/value': {'api_code': 0, 'result': {'value': {'price_mean': 100}}}}
+            for identifier in identifiers]
+
+
+class MemoryCacheBackendTestCase(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set_many({'a': CacheEntry(1, 0), 'b': CacheEntry(2, 0)})
+        backend.get_many(['a'])
+        backend.set_many({'c': CacheEntry(3, 0)})
+        self.assertEqual(['a', 'c'], sorted(backend.get_many(['a', 'b', 'c'])))
+
+        backend.delete_many(['a'])
+        self.assertEqual(1, len(backend))
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def test_cache_key(self):
+        key = get_cache_key('property/value', {'zipcode': '90274', 'address': '43 Valmonte Plz'})
+        self.assertEqual('property/value:{"address":"43 Valmonte Plz","zipcode":"90274"}', key)
+        self.assertEqual(key, get_cache_key('property/value', {'address': '43 Valmonte Plz',
+                                                               'zipcode': '90274'}))
+        self.assertNotEqual(key, get_cache_key('property/details', {'address': '43 Valmonte Plz',
+                                                                    'zipcode': '90274'}))
+        self.assertNotEqual(key, get_cache_key('property/value', {'address': '43 Valmonte Plz',
+                                                                  'zipcode': '90274'},
+                                               {'components': 'property/value'}))
+
+    def test_retention(self):
+        self.assertEqual(86400, ResponseCache(ttl=60).get_retention())
+        self.assertEqual(100000, ResponseCache(ttl=60, max_age=100000).get_retention())
+        self.assertEqual(60, ResponseCache(ttl=60, stale_if_error=None).get_retention())
+
+        cache = ResponseCache(ttl=60, stale_if_error=3600)
+        self.assertTrue(cache.is_usable_on_error(CacheEntry(None, time.time() - 600)))
+        self.assertFalse(cache.is_usable_on_error(CacheEntry(None, time.time() - 7200)))
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=60)
+        key = cache.get_key('zip/details', {'zipcode': '90274'})
+        cache.set_many({key: {'zipcode_info': {}}})
+        self.assertEqual({'zipcode_info': {}}, cache.get('zip/details', {'zipcode': '90274'}))
+
+        cache.ttl = 0
+        self.assertIsNone(cache.get('zip/details', {'zipcode': '90274'}))
+        self.assertIn(key, cache.get_entries([key]))
+
+
+class ApiClientCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.identifiers = [('{} Main St'.format(idx), '01960') for idx in range(3)]
+
+    def test_batch_is_served_partly_from_cache(self):
+        client = ApiClient(cache=ResponseCache())
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=value_callback)
+            first = client.property.value(self.identifiers[0])
+            result = client.property.value(self.identifiers)
+            again = client.property.value(self.identifiers)
+            self.assertEqual(2, mock.call_count)
+            self.assertEqual(['1 Main St', '2 Main St'],
+                             [item['address'] for item in mock.request_history[1].json()])
+
+        self.assertTrue(isinstance(first, PropertyResponse))
+        self.assertTrue(isinstance(result, PropertyResponse))
+        self.assertEqual(['0 Main St', '1 Main St', '2 Main St'],
+                         [item['address_info']['address'] for item in result.json()])
+        self.assertEqual(result.json(), again.json())
+        self.assertIsNone(again.response)
+        self.assertEqual('property/value', again.endpoint_name)
+
+    def test_json_output_generator(self):
+        client = ApiClient(output_generator=JsonOutputGenerator(), cache=ResponseCache())
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=value_callback)
+            result = client.property.value(self.identifiers)
+            again = client.property.value(self.identifiers)
+            self.assertEqual(1, mock.call_count)
+        self.assertEqual(result, again)
+
+    def test_changing_a_result_does_not_change_the_cache(self):
+        client = ApiClient(output_generator=JsonOutputGenerator(), cache=ResponseCache())
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=value_callback)
+            result = client.property.value(self.identifiers)
+            for item in result:
+                item.pop('address_info')
+            again = client.property.value(self.identifiers)
+            again[0]['property/value']['result'] = None
+            self.assertEqual(1, mock.call_count)
+
+        self.assertEqual(['0 Main St', '1 Main St', '2 Main St'],
+                         [item['address_info']['address']
+                          for item in client.property.value(self.identifiers)])
+        self.assertEqual({'value': {'price_mean': 100}},
+                         client.property.value(self.identifiers)[0]['property/value']['result'])
+
+    def test_incomplete_result_raises(self):
+        def missing_item_callback(request, context):
+            return value_callback(request, context)[:-1]
+
+        client = ApiClient(output_generator=JsonOutputGenerator(), cache=ResponseCache())
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=value_callback)
+            client.property.value(self.identifiers[0])
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=missing_item_callback)
+            self.assertRaises(housecanary.exceptions.IncompleteResultException,
+                              client.property.value, self.identifiers)
+
+    def test_errors_are_not_cached(self):
+        def no_content_callback(request, context):
+            items = value_callback(request, context)
+            items[-1]['property/value'] = {'api_code': 204, 'api_code_description': 'no content',
+                                           'result': None}
+            return items
+
+        client = ApiClient(output_generator=JsonOutputGenerator(), cache=ResponseCache())
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=no_content_callback)
+            result = client.property.value(self.identifiers)
+            client.property.value(self.identifiers)
+            self.assertEqual(2, mock.call_count)
+            # only the identifier without a result is requested again
+            self.assertEqual(['2 main st'], mock.request_history[1].qs['address'])
+
+        self.assertEqual(204, result[2]['property/value']['api_code'])
+
+    def test_error_body_is_returned(self):
+        client = ApiClient(output_generator=JsonOutputGenerator(), cache=ResponseCache())
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', status_code=400,
+                              json={'code': 400, 'message': 'bad request'})
+            result = client.property.value(self.identifiers)
+        self.assertEqual({'code': 400, 'message': 'bad request'}, result)
+
+    def test_stale_while_revalidate(self):
+        cache = ResponseCache(ttl=60, max_age=3600)
+        client = ApiClient(output_generator=JsonOutputGenerator(), cache=cache)
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=value_callback)
+            client.property.value(self.identifiers)
+
+            # make the first two results stale
+            keys = [cache.get_key('property/value', {'address': address, 'zipcode': zipcode})
+                    for address, zipcode in self.identifiers]
+            entries = cache.get_entries(keys)
+            cache.backend.set_many(dict((key, entries[key]._replace(stored_at=time.time() - 120))
+                                        for key in keys[:2]))
+
+            refreshed = threading.Event()
+            refresh_in_background = cache.refresh_in_background
+
+            def refresh_later(refresh_keys, refresh):
+                def run(refresh_keys):
+                    # the stale results are returned before the refresh is sent
+                    self.assertTrue(refreshed.wait(2))
+                    refresh(refresh_keys)
+                return refresh_in_background(refresh_keys, run)
+
+            futures = []
+            cache.refresh_in_background = lambda *args: futures.append(refresh_later(*args))
+            client.property.value(self.identifiers)
+            client.property.value(self.identifiers)
+            self.assertEqual(1, mock.call_count)
+
+            refreshed.set()
+            futures[0].result()
+            # concurrent refreshes of the same results are coalesced
+            self.assertIsNone(futures[1])
+            self.assertEqual(2, mock.call_count)
+            self.assertEqual(['0 Main St', '1 Main St'],
+                             [item['address'] for item in mock.request_history[1].json()])
+
+        self.assertTrue(all(cache.is_fresh(entry)
+                            for entry in cache.get_entries(keys).values()))
+
+    def test_expired_results_are_fetched(self):
+        cache = ResponseCache(ttl=60, max_age=3600)
+        client = ApiClient(output_generator=JsonOutputGenerator(), cache=cache)
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=value_callback)
+            client.property.value(self.identifiers)
+            keys = [cache.get_key('property/value', {'address': address, 'zipcode': zipcode})
+                    for address, zipcode in self.identifiers]
+            entries = cache.get_entries(keys)
+            stale_at = time.time() - 120
+            cache.backend.set_many({keys[0]: entries[keys[0]]._replace(stored_at=0),
+                                    keys[1]: entries[keys[1]]._replace(stored_at=stale_at)})
+
+            client.property.value(self.identifiers)
+            self.assertEqual(2, mock.call_count)
+            # the stale result is refreshed with the expired one
+            self.assertEqual(['0 Main St', '1 Main St'],
+                             [item['address'] for item in mock.request_history[1].json()])
+
+    def test_unsupported_output_generator(self):
+        self.assertRaises(ValueError, ApiClient, output_generator=StreamingOutputGenerator(),
+                          cache=ResponseCache())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# pylint: disable=missing-docstring
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import requests_mock
+from requests.auth import HTTPBasicAuth
+from housecanary.apiclient import ApiClient
+from housecanary.cassette import RecordingRequestClient, ReplayRequestClient
+from housecanary.output import ResponseOutputGenerator, StreamingOutputGenerator
+import housecanary.exceptions
+
+
+HEADERS = {"content-type": "application/json", "X-RateLimit-Limit": "5000",
+           "X-RateLimit-Remaining": "4999", "X-RateLimit-Period": "60",
+           "X-RateLimit-Reset": "1491920221"}
+
+
+def zip_json(zipcode):
+    return {"zipcode_info": {"zipcode": zipcode},
+            "zip/details": {"api_code": 0, "api_code_description": "ok",
+                            "result": {"zipcode": zipcode}}}
+
+
+class CassetteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "zip.cassette")
+        self.zipcodes = [{"zipcode": "01960"}, {"zipcode": "02140"}]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self):
+        recorder = RecordingRequestClient(self.path, ResponseOutputGenerator(),
+                                          HTTPBasicAuth("key", "secret"))
+        client = ApiClient(request_client=recorder)
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/zip/details", headers=HEADERS,
+                      json=[zip_json("01960"), zip_json("02140")])
+            mock.get("/v2/zip/details", headers=HEADERS, json=[zip_json("01960")])
+            mock.get("https://api.housecanary.com/v2/property/value_report",
+                     content=b"\x89PDF\xff", headers={"content-type": "application/pdf"})
+            recorded = client.zip.details(self.zipcodes)
+            client.zip.details("01960")
+            self.recorded_pdf = client.property.value_report("47 Perley Ave", "01960",
+                                                             format_type="pdf")
+        recorder.close()
+        self.assertEqual(3, recorder.num_recorded)
+        return recorded
+
+    def test_replay(self):
+        recorded = self.record()
+
+        replayer = ReplayRequestClient(self.path, ResponseOutputGenerator())
+        self.assertEqual(3, len(replayer))
+        client = ApiClient(request_client=replayer)
+
+        replayed = client.zip.details(self.zipcodes)
+        self.assertEqual(recorded.json(), replayed.json())
+        self.assertEqual(recorded.rate_limits, replayed.rate_limits)
+        self.assertEqual("01960", client.zip.details("01960").objects()[0].zipcode)
+        self.assertEqual(self.recorded_pdf, client.property.value_report(
+            "47 Perley Ave", "01960", format_type="pdf"))
+
+        # a request that was not recorded
+        self.assertRaises(housecanary.exceptions.CassetteMissException,
+                          client.zip.details, "99999")
+
+    def test_replay_streaming(self):
+        self.record()
+
+        client = ApiClient(request_client=ReplayRequestClient(
+            self.path, StreamingOutputGenerator(objects=False)))
+        self.assertEqual([zip_json("01960"), zip_json("02140")],
+                         list(client.zip.details(self.zipcodes)))
+
+    def test_replay_latency(self):
+        self.record()
+
+        client = ApiClient(request_client=ReplayRequestClient(
+            self.path, ResponseOutputGenerator(), latency=0.05))
+        start = time.time()
+        response = client.zip.details(self.zipcodes)
+        self.assertGreaterEqual(time.time() - start, 0.05)
+        self.assertEqual(0.05, response.response.elapsed.total_seconds())
+
+
+if __name__ == "__main__":
+    unittest.main()
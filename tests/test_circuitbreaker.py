@@ -0,0 +1,154 @@
+# pylint: disable=missing-docstring
+
+import threading
+import time
+import unittest
+import requests
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.cache import ResponseCache
+from housecanary.circuitbreaker import (CircuitBreaker, CLOSED, OPEN, HALF_OPEN,
+                                        get_current_probe, probe_applied)
+from housecanary.exceptions import CircuitOpenException, RequestException
+from housecanary.hooks import Hooks
+from housecanary.metrics import PrometheusExporter
+from housecanary.output import JsonOutputGenerator
+
+HEADERS = {"content-type": "application/json"}
+
+
+def fail(breaker, endpoint="property/value", count=1):
+    for _ in range(count):
+        breaker.on_response_received(endpoint=endpoint, status_code=500, duration=0.1)
+
+
+def succeed(breaker, endpoint="property/value", count=1, duration=0.1):
+    for _ in range(count):
+        breaker.on_response_received(endpoint=endpoint, status_code=200, duration=duration)
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.hooks = Hooks()
+        self.changes = []
+        self.hooks.register("circuit_state_changed",
+                            lambda **kwargs: self.changes.append(kwargs))
+        self.breaker = CircuitBreaker(failure_ratio=0.5, min_requests=4, open_seconds=0.05)
+        self.breaker.attach(self.hooks)
+
+    def test_opens_on_failures(self):
+        succeed(self.breaker, count=2)
+        fail(self.breaker)
+        self.assertEqual(CLOSED, self.breaker.get_state("property"))
+        fail(self.breaker)
+        self.assertEqual(OPEN, self.breaker.get_state("property"))
+        self.assertEqual([{"family": "property", "state": OPEN, "previous_state": CLOSED}],
+                         self.changes)
+
+        self.assertRaises(CircuitOpenException, self.breaker.before_request, "property/details")
+        # other families are not affected
+        self.breaker.before_request("zip/details")
+
+    def test_opens_on_slow_requests(self):
+        breaker = CircuitBreaker(min_requests=2, slow_call_duration=1.0)
+        succeed(breaker, count=2, duration=2.0)
+        self.assertEqual(OPEN, breaker.get_state("property"))
+
+    def test_rate_limited_requests_are_not_failures(self):
+        for _ in range(4):
+            self.breaker.on_response_received(endpoint="property/value", status_code=429,
+                                              duration=0.1)
+        self.assertEqual(CLOSED, self.breaker.get_state("property"))
+
+    def test_half_open_probe_closes(self):
+        fail(self.breaker, count=4)
+        time.sleep(0.06)
+        self.assertEqual(HALF_OPEN, self.breaker.get_state("property"))
+
+        self.breaker.before_request("property/value")
+        # only one probe at a time
+        self.assertRaises(CircuitOpenException, self.breaker.before_request, "property/value")
+        succeed(self.breaker)
+        self.assertEqual(CLOSED, self.breaker.get_state("property"))
+        self.assertEqual([OPEN, HALF_OPEN, CLOSED], [change["state"] for change in self.changes])
+
+    def test_half_open_probe_failure_reopens(self):
+        fail(self.breaker, count=4)
+        time.sleep(0.06)
+        self.breaker.before_request("property/value")
+        self.breaker.on_error("property/value")
+        self.assertEqual(OPEN, self.breaker.get_state("property"))
+
+    def test_requests_in_flight_are_not_probes(self):
+        fail(self.breaker, count=4)
+        time.sleep(0.06)
+
+        probe = []
+
+        def send_probe():
+            self.breaker.before_request("property/value")
+            probe.append(get_current_probe())
+
+        thread = threading.Thread(target=send_probe)
+        thread.start()
+        thread.join()
+
+        # a request sent before the circuit opened answers first
+        succeed(self.breaker)
+        self.assertEqual(HALF_OPEN, self.breaker.get_state("property"))
+        with probe_applied(probe[0]):
+            fail(self.breaker)
+        self.assertEqual(OPEN, self.breaker.get_state("property"))
+
+    def test_metrics(self):
+        prometheus = self.hooks.add_listener(PrometheusExporter())
+        fail(self.breaker, count=4)
+        self.assertRaises(CircuitOpenException, self.breaker.before_request, "property/value")
+        self.assertEqual(2, prometheus.get_gauge("circuit_state", [("family", "property")]))
+        self.assertEqual(1, prometheus.get_counter("circuit_opened_total",
+                                                   [("family", "property")]))
+        self.assertEqual(1, prometheus.get_counter("requests_rejected_total",
+                                                   [("family", "property")]))
+
+
+class ApiClientCircuitBreakerTestCase(unittest.TestCase):
+    def test_fails_fast_when_open(self):
+        breaker = CircuitBreaker(min_requests=2, open_seconds=60)
+        client = ApiClient(circuit_breaker=breaker)
+        with requests_mock.Mocker() as mock:
+            mock.get("/v2/property/value", status_code=500, headers=HEADERS,
+                     json={"code": 500, "message": "error"})
+            for _ in range(2):
+                self.assertRaises(RequestException, client.property.value, "some-slug")
+            self.assertRaises(CircuitOpenException, client.property.value, "some-slug")
+            self.assertEqual(2, mock.call_count)
+
+    def test_connection_errors_are_failures(self):
+        breaker = CircuitBreaker(min_requests=1, open_seconds=60)
+        client = ApiClient(circuit_breaker=breaker)
+        with requests_mock.Mocker() as mock:
+            mock.get("/v2/zip/details", exc=requests.exceptions.ConnectTimeout)
+            self.assertRaises(requests.exceptions.ConnectTimeout, client.zip.details, "90274")
+        self.assertEqual(OPEN, breaker.get_state("zip"))
+
+    def test_serves_stale_cache_entries_when_open(self):
+        breaker = CircuitBreaker(min_requests=1, open_seconds=60)
+        cache = ResponseCache(ttl=60)
+        client = ApiClient(output_generator=JsonOutputGenerator(), cache=cache,
+                           circuit_breaker=breaker)
+        with requests_mock.Mocker() as mock:
+            mock.get("/v2/zip/details", headers=HEADERS, json=[{"zipcode_info": {}}])
+            client.zip.details("90274")
+
+        cache.ttl = 0
+        breaker.record("zip/details", False)
+        self.assertEqual([{"zipcode_info": {}}], client.zip.details("90274"))
+        self.assertRaises(CircuitOpenException, client.zip.details, "90275")
+
+        # older than both max_age and stale_if_error
+        cache.max_age = cache.stale_if_error = 0
+        self.assertRaises(CircuitOpenException, client.zip.details, "90274")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+# pylint: disable=missing-docstring
+
+import unittest
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary import dataframes
+import housecanary.exceptions
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+def make_property_data(address, zipcode, meta):
+    return {
+        "address_info": {"address": address, "zipcode": zipcode, "unit": None,
+                         "city": "Peabody", "state": "MA", "slug": "slug"},
+        "meta": meta,
+        "property/value": {"api_code": 0, "api_code_description": "ok",
+                           "result": {"value": {"price_mean": 1000, "price_upr": 1100}}},
+        "property/school": {"api_code": 0, "api_code_description": "ok",
+                            "result": {"school": {"elementary": [
+                                {"name": "Center", "address": "1 School St", "zipcode": "01960"},
+                                {"name": "North", "address": "2 School St", "zipcode": "01960"}
+                            ]}}},
+        "property/nod": {"api_code": 0, "api_code_description": "ok",
+                         "result": {"last_default_date": "2010-01-01",
+                                    "default_history": [{"default_amount": 5}]}},
+    }
+
+
+ENDPOINTS = ["property/value", "property/school", "property/nod"]
+
+
+class GetEndpointColumnsTestCase(unittest.TestCase):
+    def test_get_endpoint_columns(self):
+        api_data = [make_property_data("47 Perley Ave", "01960", "a"),
+                    make_property_data("85 Clay St", "02140", "b")]
+
+        columns = dataframes.get_endpoint_columns(api_data, ENDPOINTS, "address_info",
+                                                  ["address", "zipcode", "meta"])
+
+        self.assertEqual(["property/value", "property/school", "property/nod",
+                          "property/nod/default_history"], list(columns))
+
+        keys, values = columns["property/value"]
+        self.assertEqual(["address", "zipcode", "meta", "price_upr", "price_lwr", "price_mean",
+                          "fsd"], keys)
+        self.assertEqual([None, None], values["fsd"])
+        self.assertEqual(["47 Perley Ave", "85 Clay St"], values["address"])
+        self.assertEqual(["a", "b"], values["meta"])
+        self.assertEqual([1000, 1000], values["price_mean"])
+
+        keys, values = columns["property/school"]
+        self.assertEqual(4, len(values["name"]))
+        self.assertEqual(["elementary"] * 4, values["school_type"])
+        self.assertEqual(["47 Perley Ave", "47 Perley Ave", "85 Clay St", "85 Clay St"],
+                         values["address"])
+
+        _, values = columns["property/nod"]
+        self.assertEqual(["2010-01-01", "2010-01-01"], values["last_default_date"])
+        self.assertNotIn("default_history", values)
+
+        _, values = columns["property/nod/default_history"]
+        self.assertEqual([5, 5], values["default_amount"])
+
+    def test_keys_not_in_the_schema(self):
+        api_data = [make_property_data("47 Perley Ave", "01960", "a"),
+                    make_property_data("85 Clay St", "02140", "b")]
+        api_data[1]["property/value"]["result"]["value"]["new_b"] = 1
+        api_data[1]["property/value"]["result"]["value"]["new_a"] = 2
+
+        columns = dataframes.get_endpoint_columns(api_data, ["property/value"], "address_info",
+                                                  ["address", "zipcode"])
+
+        keys, values = columns["property/value"]
+        self.assertEqual(["address", "zipcode", "price_upr", "price_lwr", "price_mean", "fsd",
+                          "new_a", "new_b"], keys)
+        self.assertEqual([None, 2], values["new_a"])
+        self.assertEqual([None, 1], values["new_b"])
+
+
+class ComponentMgetFramesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = ApiClient()
+        self.headers = {"content-type": "application/json"}
+
+    def test_invalid_rows_raise(self):
+        self.assertRaises(housecanary.exceptions.InvalidInputException,
+                          self.client.property.component_mget_frames,
+                          {"address": [None, None], "zipcode": ["01960", "02140"]}, ENDPOINTS)
+
+    @unittest.skipIf(pandas is not None, "pandas is installed")
+    def test_requires_pandas(self):
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/property/component_mget", headers=self.headers,
+                      json=[make_property_data("47 Perley Ave", "01960", None),
+                            make_property_data("85 Clay St", "02140", None)])
+            self.assertRaises(ImportError, self.client.property.component_mget_frames,
+                              {"address": ["47 Perley Ave", "85 Clay St"],
+                               "zipcode": ["01960", "02140"]}, ENDPOINTS)
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_component_mget_frames_without_identifiers(self):
+        with requests_mock.Mocker() as mock:
+            frames = self.client.property.component_mget_frames(
+                {"address": [], "zipcode": []}, ENDPOINTS)
+            self.assertFalse(mock.called)
+
+        self.assertEqual(["property/value", "property/school", "property/nod",
+                          "property/nod/default_history"], list(frames))
+        self.assertEqual(0, len(frames["property/value"]))
+        self.assertIn("price_mean", frames["property/value"].columns)
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_component_mget_frames_without_components(self):
+        with requests_mock.Mocker() as mock:
+            frames = self.client.property.component_mget_frames(
+                {"address": ["47 Perley Ave"], "zipcode": ["01960"]}, [])
+            self.assertFalse(mock.called)
+
+        self.assertEqual([], list(frames))
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_component_mget_frames(self):
+        frame = pandas.DataFrame({"address": ["47 Perley Ave", "85 Clay St"],
+                                  "zipcode": ["01960", "02140"], "meta": ["a", "b"]})
+
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/property/component_mget", headers=self.headers,
+                      json=[make_property_data("47 Perley Ave", "01960", "a"),
+                            make_property_data("85 Clay St", "02140", "b")])
+            frames = self.client.property.component_mget_frames(frame, ENDPOINTS)
+
+        self.assertEqual(["a", "b"], frames["property/value"]["meta"].tolist())
+        self.assertEqual([1000, 1000], frames["property/value"]["price_mean"].tolist())
+        self.assertEqual(4, len(frames["property/school"]))
+        self.assertEqual(2, len(frames["property/nod/default_history"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,328 @@
+# pylint: disable=missing-docstring
+
+import threading
+import time
+import unittest
+import requests
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.dispatch import AdaptiveConcurrency, Dispatcher, Deadline, get_current_deadline
+from housecanary.exceptions import DeadlineExceededException, RateLimitException
+from housecanary.hooks import Hooks
+from housecanary.metrics import PrometheusExporter
+from housecanary.output import JsonOutputGenerator
+
+
+def response(controller, duration=0.1, status_code=200, remaining=None, limit=None):
+    controller.on_response_received(duration=duration, status_code=status_code,
+                                    rate_limit_remaining=remaining, rate_limit_limit=limit)
+
+
+class AdaptiveConcurrencyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.hooks = Hooks()
+        self.changes = []
+        self.hooks.register("concurrency_changed",
+                            lambda **kwargs: self.changes.append(kwargs))
+        self.controller = AdaptiveConcurrency(initial_limit=4, max_limit=6)
+        self.controller.attach(self.hooks)
+
+    def test_additive_increase(self):
+        for _ in range(4):
+            response(self.controller)
+        self.assertEqual(5, self.controller.limit)
+        for _ in range(5 + 6 + 7):
+            response(self.controller)
+        self.assertEqual(6, self.controller.limit)
+        self.assertEqual([{"limit": 5, "previous_limit": 4, "reason": "increase"},
+                          {"limit": 6, "previous_limit": 5, "reason": "increase"}], self.changes)
+
+    def test_no_increase_when_rate_limit_is_low(self):
+        for _ in range(10):
+            response(self.controller, remaining=10, limit=1000)
+        self.assertEqual(4, self.controller.limit)
+
+    def test_backoff_on_throttle(self):
+        response(self.controller, status_code=429)
+        self.assertEqual(2, self.controller.limit)
+        self.assertEqual("throttled", self.changes[-1]["reason"])
+
+        # a request that was sent before the decrease doesn't decrease it again
+        response(self.controller, duration=10, status_code=429)
+        self.assertEqual(2, self.controller.limit)
+
+        response(self.controller, duration=0, status_code=429)
+        self.assertEqual(1, self.controller.limit)
+        response(self.controller, duration=0, status_code=429)
+        self.assertEqual(1, self.controller.limit)
+
+    def test_backoff_on_latency_spike(self):
+        for _ in range(3):
+            response(self.controller, duration=0.1)
+        response(self.controller, duration=0.5)
+        self.assertEqual(2, self.controller.limit)
+        self.assertEqual("latency", self.changes[-1]["reason"])
+
+    def test_backoff_on_timeout(self):
+        self.controller.on_error(requests.exceptions.ReadTimeout())
+        self.assertEqual(2, self.controller.limit)
+        self.controller.on_error(ValueError())
+        self.assertEqual(2, self.controller.limit)
+
+    def test_metrics(self):
+        prometheus = self.hooks.add_listener(PrometheusExporter())
+        response(self.controller, status_code=429)
+        self.assertEqual(2, prometheus.get_gauge("concurrency_limit"))
+        self.assertEqual(1, prometheus.get_counter("concurrency_backoffs_total",
+                                                   [("reason", "throttled")]))
+
+    def test_start(self):
+        prometheus = self.hooks.add_listener(PrometheusExporter())
+        self.controller.start()
+        self.assertEqual([{"limit": 4, "previous_limit": None, "reason": "start"}], self.changes)
+        self.assertEqual(4, prometheus.get_gauge("concurrency_limit"))
+        self.assertEqual(0, prometheus.get_counter("concurrency_backoffs_total",
+                                                   [("reason", "start")]))
+
+
+class DispatcherTestCase(unittest.TestCase):
+    def test_follows_controller_limit(self):
+        controller = AdaptiveConcurrency(initial_limit=2, max_limit=8)
+        dispatcher = Dispatcher(controller)
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def work(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return item
+
+        self.assertEqual(list(range(20)), dispatcher.map(work, range(20)))
+        self.assertEqual(2, peak[0])
+
+        controller._limit = 5  # pylint: disable=protected-access
+        peak[0] = 0
+        dispatcher.map(work, range(20))
+        self.assertEqual(5, peak[0])
+
+    def test_iter_fetch_with_adaptive_concurrency(self):
+        client = ApiClient(output_generator=JsonOutputGenerator())
+        # the mock's timing jitter is not a latency spike
+        controller = AdaptiveConcurrency(initial_limit=1, latency_tolerance=float("inf"))
+
+        def echo(request, context):
+            return [{"zipcode_info": identifier} for identifier in request.json()]
+
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/zip/details", json=echo,
+                      headers={"content-type": "application/json"})
+            results = list(client.iter_fetch("zip/details", ["{:05d}".format(idx)
+                                                             for idx in range(10)],
+                                             batch_size=2, concurrency=controller))
+
+        self.assertEqual(10, len(results))
+        self.assertGreater(controller.limit, 1)
+
+    def throttling_echo(self, throttled):
+        """Returns a callback that answers the calls in `throttled` with a 429."""
+        calls = [0]
+        lock = threading.Lock()
+
+        def echo(request, context):
+            with lock:
+                calls[0] += 1
+                call = calls[0]
+            context.headers["content-type"] = "application/json"
+            if call in throttled:
+                context.status_code = 429
+                context.headers.update({"X-RateLimit-Period": "60", "X-RateLimit-Limit": "100",
+                                        "X-RateLimit-Remaining": "0",
+                                        "X-RateLimit-Reset": str(int(time.time()))})
+                return {"code": 429, "message": "Too many requests"}
+            return [{"zipcode_info": identifier} for identifier in request.json()]
+        return echo
+
+    def test_throttled_calls_are_retried(self):
+        # the default output generator raises RateLimitException on a 429
+        client = ApiClient()
+        controller = AdaptiveConcurrency(initial_limit=4, retry_delay=0.01,
+                                         latency_tolerance=float("inf"))
+        changes = []
+        retries = []
+        client.hooks.register("concurrency_changed", lambda **kwargs: changes.append(kwargs))
+        client.hooks.register("retry", lambda **kwargs: retries.append(kwargs))
+        zipcodes = ["{:05d}".format(idx) for idx in range(20)]
+
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/zip/details", json=self.throttling_echo([3, 4]))
+            results = list(client.iter_fetch("zip/details", zipcodes, batch_size=2,
+                                             concurrency=controller))
+            self.assertEqual(12, mock.call_count)
+
+        # the job completes in order at the reduced limit
+        self.assertEqual(zipcodes, [identifier for identifier, _ in results])
+        self.assertEqual({"limit": 4, "previous_limit": None, "reason": "start"}, changes[0])
+        self.assertEqual("throttled", changes[1]["reason"])
+        self.assertEqual(2, changes[1]["limit"])
+        self.assertEqual([("zip/details", 1), ("zip/details", 1)],
+                         [(retry["endpoint"], retry["attempt"]) for retry in retries])
+        self.assertTrue(all(retry["wait"] >= 0.01 for retry in retries))
+
+    def test_retries_are_limited(self):
+        client = ApiClient()
+        controller = AdaptiveConcurrency(initial_limit=1, max_limit=1, retry_delay=0.01,
+                                         max_retries=2)
+
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/zip/details", json=self.throttling_echo([2, 3, 4]))
+            with self.assertRaises(RateLimitException):
+                list(client.iter_fetch("zip/details", ["{:05d}".format(idx) for idx in range(6)],
+                                       batch_size=2, concurrency=controller))
+            self.assertEqual(4, mock.call_count)
+
+    def test_retry_delay(self):
+        controller = AdaptiveConcurrency(retry_delay=1.0, max_retries=2, max_retry_delay=10)
+        self.assertIsNone(controller.get_retry_delay(ValueError(), 0))
+
+        class Throttled(RateLimitException):
+            def __init__(self, reset_in_seconds):
+                RateLimitException.__init__(self, 429, "Too many requests", None)
+                self._rate_limits = [{"reset_in_seconds": reset_in_seconds}]
+
+        self.assertEqual(1.0, controller.get_retry_delay(Throttled(0), 0))
+        self.assertEqual(2.0, controller.get_retry_delay(Throttled(0), 1))
+        self.assertEqual(5, controller.get_retry_delay(Throttled(5), 0))
+        self.assertIsNone(controller.get_retry_delay(Throttled(0), 2))
+        # not retried if the rate limit resets too late
+        self.assertIsNone(controller.get_retry_delay(Throttled(60), 0))
+
+
+class DeadlineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+    def tearDown(self):
+        self.release.set()
+
+    def work(self, item):
+        if item == 2:
+            # a call that hangs past the deadline
+            self.release.wait(2)
+        return item
+
+    def test_applied(self):
+        deadline = Deadline(10)
+        self.assertIsNone(get_current_deadline())
+        with deadline.applied():
+            self.assertIs(deadline, get_current_deadline())
+        self.assertIsNone(get_current_deadline())
+        self.assertFalse(deadline.expired())
+        self.assertTrue(Deadline(0).expired())
+        self.assertEqual(0, Deadline(-1).remaining())
+
+    def test_map_returns_partial_result(self):
+        dispatcher = Dispatcher(4)
+        start = time.time()
+        with self.assertRaises(DeadlineExceededException) as context:
+            dispatcher.map(self.work, range(4), deadline=0.2)
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual([0, 1, 3], context.exception.partial_result)
+
+    def test_imap_cancels_calls_not_started(self):
+        dispatcher = Dispatcher(1)
+        started = []
+
+        def work(item):
+            started.append(item)
+            return self.work(item)
+
+        results = []
+        with self.assertRaises(DeadlineExceededException) as context:
+            for result in dispatcher.imap(work, range(10), deadline=0.2):
+                results.append(result)
+        self.assertEqual([0, 1], results)
+        self.assertEqual([], context.exception.partial_result)
+        self.release.set()
+        time.sleep(0.05)
+        self.assertEqual([0, 1, 2], started)
+
+    def test_deadline_is_applied_to_calls(self):
+        dispatcher = Dispatcher(2)
+        deadline = Deadline(10)
+        deadlines = dispatcher.map(lambda item: get_current_deadline(), range(3),
+                                   deadline=deadline)
+        self.assertEqual([deadline] * 3, deadlines)
+
+    def test_iter_fetch_with_deadline(self):
+        client = ApiClient(output_generator=JsonOutputGenerator())
+        fetch = client.fetch
+
+        def slow_fetch(endpoint_name, identifier_input, *args):
+            # requests_mock sends one request at a time, so hang outside of it
+            if {"zipcode": "00002"} in identifier_input:
+                self.release.wait(5)
+            return fetch(endpoint_name, identifier_input, *args)
+
+        def echo(request, context):
+            return [{"zipcode_info": identifier} for identifier in request.json()]
+
+        client.fetch = slow_fetch
+        results = []
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/zip/details", json=echo,
+                      headers={"content-type": "application/json"})
+            with self.assertRaises(DeadlineExceededException) as context:
+                for result in client.iter_fetch("zip/details", ["{:05d}".format(idx)
+                                                                for idx in range(6)],
+                                                batch_size=2, deadline=0.5):
+                    results.append(result)
+
+        self.assertEqual(["00000", "00001"], [identifier for identifier, _ in results])
+        self.assertEqual(["00004", "00005"],
+                         [identifier for identifier, _ in context.exception.partial_result])
+
+    def test_call_started_after_the_deadline(self):
+        dispatcher = Dispatcher(1)
+
+        def work(item):
+            if get_current_deadline().expired():
+                raise DeadlineExceededException("Deadline exceeded before the request was sent")
+            return item
+
+        results = []
+        with self.assertRaises(DeadlineExceededException) as context:
+            for result in dispatcher.imap(work, range(10), deadline=0.05):
+                results.append(result)
+                # a slow consumer lets the deadline pass before the next call starts
+                time.sleep(0.03)
+        self.assertEqual([], context.exception.partial_result)
+        self.assertLess(len(results), 10)
+
+    def test_iter_fetch_with_slow_consumer(self):
+        client = ApiClient(output_generator=JsonOutputGenerator())
+
+        def echo(request, context):
+            return [{"zipcode_info": identifier} for identifier in request.json()]
+
+        results = []
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/zip/details", json=echo,
+                      headers={"content-type": "application/json"})
+            with self.assertRaises(DeadlineExceededException) as context:
+                for result in client.iter_fetch("zip/details", ["{:05d}".format(idx)
+                                                                for idx in range(20)],
+                                                batch_size=2, concurrency=1, deadline=0.05):
+                    results.append(result)
+                    time.sleep(0.03)
+
+        self.assertLess(len(results), 20)
+        self.assertTrue(isinstance(context.exception.partial_result, list))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# pylint: disable=missing-docstring
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import openpyxl
+from housecanary.excel import export_analytics_data_to_csv
+from housecanary.excel.rows import RowAssembler
+
+
+def _values(worksheet):
+    return [[cell.value for cell in row] for row in worksheet.rows]
+
+
+class RowAssemblerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.worksheet = openpyxl.Workbook().active
+
+    def test_write(self):
+        assembler = RowAssembler(leading_columns=("address", "zipcode"))
+        assembler.add({"b": 1, "zipcode": "01960", "nested": {"a": 1}})
+        assembler.add({"a": "long value", "address": "47 Perley Ave"})
+        assembler.write(self.worksheet)
+
+        self.assertEqual([["Address", "Zipcode", "A", "B", "Nested"],
+                          ["", "01960", "", 1, '{"a": 1}'],
+                          ["47 Perley Ave", "", "long value", "", ""]], _values(self.worksheet))
+
+        self.assertEqual(14, self.worksheet.column_dimensions["A"].width)
+        self.assertEqual(11, self.worksheet.column_dimensions["C"].width)
+        self.assertEqual(9, self.worksheet.column_dimensions["E"].width)
+
+    def test_convert_value(self):
+        assembler = RowAssembler(leading_columns=["zipcode", "price"],
+                                 convert_value=lambda key, value: value * 2)
+        assembler.add({"extra": 1, "zipcode": "1"})
+        assembler.write(self.worksheet)
+
+        # columns that no row has are not written
+        self.assertEqual([["Zipcode", "Extra"], ["11", 2]], _values(self.worksheet))
+
+    def test_sparse_rows(self):
+        assembler = RowAssembler()
+        for idx in range(10):
+            assembler.add({"key_{}".format(idx % 4): idx})
+
+        self.assertEqual(10, assembler.num_rows)
+
+        assembler.write(self.worksheet)
+        values = _values(self.worksheet)
+
+        self.assertEqual(["Key 0", "Key 1", "Key 2", "Key 3"], values[0])
+        self.assertEqual(list(range(10)), [v for row in values[1:] for v in row if v != ""])
+
+
+class ExportCsvTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _read(self, file_name):
+        with io.open(os.path.join(self.directory, file_name)) as csv_file:
+            return csv_file.read().splitlines()
+
+    def test_schema_columns(self):
+        data = [{"address_info": {"address": "47 Perley Ave", "zipcode": "01960"},
+                 "property/value": {"api_code": 0, "api_code_description": "ok",
+                                    "result": {"value": {"price_mean": 1000}}},
+                 "property/zip_hpi_ts": {"api_code": 0, "api_code_description": "ok",
+                                         "result": [{"month": "2016-01-01", "value": 1.5}]}}]
+        export_analytics_data_to_csv(data, self.directory, "address_info", ["address", "zipcode"])
+
+        # schema columns that no row has, like price_upr, are not written
+        self.assertEqual(["Address,Zipcode,Price Mean", "47 Perley Ave,01960,1000"],
+                         self._read("value.csv"))
+        # dates are written as the API returns them
+        self.assertEqual(["Address,Zipcode,Month,Value", "47 Perley Ave,01960,2016-01-01,1.5"],
+                         self._read("zip_hpi_ts.csv"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+# pylint: disable=missing-docstring
+
+import datetime
+import time
+import unittest
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.cache import ResponseCache
+from housecanary.hc_api_prefetch import hc_api_prefetch
+from housecanary.output import JsonOutputGenerator
+from housecanary.redis_cache import RedisCacheBackend
+from tests.test_cache import value_callback
+from tests.test_redis_cache import FakeRedisServer
+
+INPUT_FILE = './tests/test_files/test_input.csv'
+
+
+class HcApiPrefetchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def get_docopt_args(self, endpoints, **options):
+        args = {
+            '--batch-size': None,
+            '--cache': '127.0.0.1:{}'.format(self.server.port),
+            '--compression': None,
+            '--concurrency': None,
+            '--db': None,
+            '--free': None,
+            '--help': False,
+            '--key': 'test_key',
+            '--secret': 'test_secret',
+            '--ttl': None,
+            '--until': None,
+            '-h': False,
+            '<endpoints>': endpoints,
+            '<input>': INPUT_FILE
+        }
+        args.update(options)
+        return args
+
+    def test_fills_the_cache(self):
+        with requests_mock.Mocker() as mock:
+            mock.register_uri(requests_mock.ANY, '/v2/property/value', json=value_callback)
+            mock.register_uri(requests_mock.ANY, '/v2/property/details', json=value_callback)
+            hc_api_prefetch.hc_api_prefetch(self.get_docopt_args(
+                'property/value,property/details', **{'--batch-size': '1',
+                                                      '--compression': 'zlib'}))
+            self.assertEqual(4, mock.call_count)
+
+            # fresh results are not fetched again
+            hc_api_prefetch.hc_api_prefetch(self.get_docopt_args('property/value'))
+            self.assertEqual(4, mock.call_count)
+
+            backend = RedisCacheBackend(port=self.server.port)
+            client = ApiClient('test_key', 'test_secret', output_generator=JsonOutputGenerator(),
+                               cache=ResponseCache(backend=backend))
+            # the input file's other columns are not part of the identifiers
+            result = client.property.value([{'address': '43 Valmonte Plaza', 'zipcode': '90274'}])
+            self.assertEqual(4, mock.call_count)
+        self.assertEqual('43 Valmonte Plaza', result[0]['address_info']['address'])
+
+    def test_leaves_a_share_of_the_rate_limit_free(self):
+        client = hc_api_prefetch._get_client(self.get_docopt_args('property/value',
+                                                                  **{'--free': '0.3'}),
+                                             'test_key', 'test_secret')
+        scheduler = client.scheduler
+        reset = time.time() + 60
+        scheduler.on_response_received(rate_limit_remaining=31, rate_limit_limit=100,
+                                       rate_limit_reset=reset)
+        self.assertEqual(0, scheduler._get_quota_wait(hc_api_prefetch.PREFETCH))
+        scheduler.on_response_received(rate_limit_remaining=30, rate_limit_limit=100,
+                                       rate_limit_reset=reset)
+        self.assertGreater(scheduler._get_quota_wait(hc_api_prefetch.PREFETCH), 0)
+        client.cache.backend.close()
+
+    def test_concurrency_is_not_reserved(self):
+        client = hc_api_prefetch._get_client(self.get_docopt_args('property/value',
+                                                                  **{'--concurrency': '4',
+                                                                     '--free': '0.2'}),
+                                             'test_key', 'test_secret')
+        scheduler = client.scheduler
+        # the free share only reserves the rate limit, so -n requests can be in flight
+        self.assertEqual(4, scheduler._get_slots(hc_api_prefetch.PREFETCH))
+        for _ in range(4):
+            scheduler.acquire(hc_api_prefetch.PREFETCH)
+        self.assertEqual(4, scheduler.in_flight)
+        client.cache.backend.close()
+
+    def test_seconds_until(self):
+        now = datetime.datetime(2017, 4, 11, 5, 30)
+        self.assertEqual(5400, hc_api_prefetch._get_seconds_until('07:00', now))
+        self.assertEqual(23 * 3600, hc_api_prefetch._get_seconds_until('04:30', now))
+
+
+if __name__ == "__main__":
+    unittest.main()
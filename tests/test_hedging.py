@@ -0,0 +1,127 @@
+# pylint: disable=missing-docstring
+
+import threading
+import time
+import unittest
+from housecanary.apiclient import ApiClient
+from housecanary.hedging import HedgingPolicy
+from housecanary.hooks import Hooks
+from housecanary.metrics import PrometheusExporter
+
+URL = "https://api.housecanary.com/v2/property/value"
+
+
+def warm_up(policy, count=20, latency=0.01):
+    for _ in range(count):
+        policy._record_latency(latency)  # pylint: disable=protected-access
+        policy._record_hedged(False)  # pylint: disable=protected-access
+
+
+class SlowSender(object):
+    """Answers the first call after `delay` seconds and the others at once."""
+
+    def __init__(self, delay=2.0, error=None):
+        self.delay = delay
+        self.error = error
+        self.calls = []
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, url, query_params):
+        with self._lock:
+            attempt = len(self.calls)
+            self.calls.append(url)
+        if attempt == 0:
+            self.release.wait(self.delay)
+        if self.error is not None:
+            raise self.error
+        return attempt
+
+
+class HedgingPolicyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.hooks = Hooks()
+        self.hedged = []
+        self.hooks.register("request_hedged", lambda **kwargs: self.hedged.append(kwargs))
+        self.policy = HedgingPolicy(percentile=0.9, min_samples=20, min_delay=0.01)
+        self.policy.attach(self.hooks)
+
+    def test_no_hedging_without_samples(self):
+        self.assertIsNone(self.policy.get_delay())
+        sender = SlowSender(delay=0.05)
+        self.assertEqual(0, self.policy.call(sender, URL, {}))
+        self.assertEqual(1, len(sender.calls))
+        self.assertEqual([], self.hedged)
+
+    def test_delay_is_percentile_of_latencies(self):
+        for idx in range(1, 21):
+            self.policy._record_latency(idx * 0.01)  # pylint: disable=protected-access
+            self.policy._record_hedged(False)  # pylint: disable=protected-access
+        self.assertAlmostEqual(0.18, self.policy.get_delay())
+
+    def test_slow_request_is_hedged(self):
+        warm_up(self.policy)
+        sender = SlowSender()
+        start = time.time()
+        self.assertEqual(1, self.policy.call(sender, URL, {}))
+        sender.release.set()
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual(2, len(sender.calls))
+        self.assertEqual([{"endpoint": "property/value", "delay": 0.01}], self.hedged)
+        self.assertEqual(1, self.policy.num_hedged)
+        self.assertEqual(1, self.policy.num_hedges_won)
+
+    def test_fast_request_is_not_hedged(self):
+        warm_up(self.policy, latency=0.5)
+        sender = SlowSender(delay=0.01)
+        self.assertEqual(0, self.policy.call(sender, URL, {}))
+        self.assertEqual(1, len(sender.calls))
+        self.assertEqual(0, self.policy.num_hedged)
+
+    def test_budget(self):
+        policy = HedgingPolicy(budget=0.1, window=20, min_samples=20, min_delay=0.01)
+        warm_up(policy)
+        for _ in range(3):
+            sender = SlowSender(delay=0.1)
+            policy.call(sender, URL, {})
+            sender.release.set()
+        # 2 hedges are allowed in the last 20 requests
+        self.assertEqual(2, policy.num_hedged)
+
+    def test_errors(self):
+        warm_up(self.policy)
+        sender = SlowSender(delay=0.05, error=ValueError("failed"))
+        self.assertRaises(ValueError, self.policy.call, sender, URL, {})
+        self.assertEqual(2, len(sender.calls))
+
+    def test_metrics(self):
+        prometheus = self.hooks.add_listener(PrometheusExporter())
+        warm_up(self.policy)
+        sender = SlowSender()
+        self.policy.call(sender, URL, {})
+        sender.release.set()
+        self.assertEqual(1, prometheus.get_counter("requests_hedged_total",
+                                                   [("endpoint", "property/value")]))
+
+
+class ApiClientHedgingTestCase(unittest.TestCase):
+    def test_single_lookup_is_hedged(self):
+        sender = SlowSender()
+
+        class RequestClient(object):
+            def get(self, url, query_params):
+                return sender(url, query_params)
+
+            def post(self, url, post_data, query_params=None):
+                raise AssertionError("POST requests are not hedged")
+
+        policy = HedgingPolicy(min_delay=0.01)
+        warm_up(policy)
+        client = ApiClient(request_client=RequestClient(), hedging=policy)
+        self.assertEqual(1, client.property.value(("10216 N Willow Ave", "64157")))
+        sender.release.set()
+        self.assertEqual(1, policy.num_hedged)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# pylint: disable=missing-docstring
+
+import unittest
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.hooks import Hooks
+from housecanary import hooks
+import housecanary.exceptions
+
+
+class EventRecorder(object):
+    def __init__(self):
+        self.events = []
+
+    def on_request_start(self, **kwargs):
+        self.events.append((hooks.REQUEST_START, kwargs))
+
+    def on_response_received(self, **kwargs):
+        self.events.append((hooks.RESPONSE_RECEIVED, kwargs))
+
+    def on_parse_done(self, **kwargs):
+        self.events.append((hooks.PARSE_DONE, kwargs))
+
+    def on_throttled(self, **kwargs):
+        self.events.append((hooks.THROTTLED, kwargs))
+
+    def names(self):
+        return [name for name, _ in self.events]
+
+
+class HooksTestCase(unittest.TestCase):
+    def test_register_and_emit(self):
+        received = []
+        registry = Hooks()
+        registry.register(hooks.RETRY, lambda **kwargs: received.append(kwargs))
+        registry.emit(hooks.RETRY, endpoint='property/value', attempt=1, wait=5)
+        self.assertEqual(received, [{'endpoint': 'property/value', 'attempt': 1, 'wait': 5}])
+
+    def test_unregister(self):
+        received = []
+        registry = Hooks()
+        callback = lambda **kwargs: received.append(kwargs)  # noqa: E731
+        registry.register(hooks.RETRY, callback)
+        registry.unregister(hooks.RETRY, callback)
+        registry.emit(hooks.RETRY, endpoint='property/value', attempt=1, wait=5)
+        self.assertEqual(received, [])
+        self.assertEqual(len(registry), 0)
+
+    def test_add_listener(self):
+        registry = Hooks()
+        registry.add_listener(EventRecorder())
+        self.assertEqual(len(registry), 4)
+        self.assertFalse(registry.has_callbacks(hooks.RETRY))
+
+
+@requests_mock.Mocker()
+class RequestClientHooksTestCase(unittest.TestCase):
+    def setUp(self):
+        self.recorder = EventRecorder()
+        self.client = ApiClient()
+        self.client.hooks.add_listener(self.recorder)
+        self.headers = {'content-type': 'application/json', 'X-RateLimit-Limit': '5000,100',
+                        'X-RateLimit-Remaining': '4999,42', 'X-RateLimit-Period': '60,1',
+                        'X-RateLimit-Reset': '1491920221,1491920221'}
+
+    def test_events_for_get(self, mock):
+        mock.get('/v2/property/value', headers=self.headers, json=[])
+        self.client.property.value(('47 Perley Ave', '01960'))
+
+        self.assertEqual(self.recorder.names(), [hooks.REQUEST_START, hooks.RESPONSE_RECEIVED,
+                                                 hooks.PARSE_DONE])
+        start = self.recorder.events[0][1]
+        self.assertEqual(start, {'endpoint': 'property/value', 'method': 'GET', 'batch_size': 1})
+
+        received = self.recorder.events[1][1]
+        self.assertEqual(received['status_code'], 200)
+        self.assertEqual(received['rate_limit_remaining'], 42)
+        self.assertEqual(received['rate_limit_limit'], 100)
+        self.assertEqual(received['response_bytes'], 2)
+        self.assertTrue(received['duration'] >= 0)
+
+        self.assertTrue(self.recorder.events[2][1]['parse_time'] >= 0)
+
+    def test_events_for_post_batch(self, mock):
+        mock.post('/v2/property/value', headers=self.headers, json=[])
+        self.client.property.value([('47 Perley Ave', '01960'), ('85 Clay St', '02140')])
+        self.assertEqual(self.recorder.events[0][1]['batch_size'], 2)
+        self.assertEqual(self.recorder.events[0][1]['method'], 'POST')
+
+    def test_events_for_serialized_post(self, mock):
+        mock.post('/v2/property/value', headers=self.headers, json=[])
+        url = 'https://api.housecanary.com/v2/property/value'
+        body = b'[{"address":"47 Perley Ave","zipcode":"01960"},{"address":"85 Clay St"}]'
+        request_client = self.client._request_client  # pylint: disable=protected-access
+        request_client.post(url, body, batch_size=2)
+        request_client.post(url, body)
+        self.assertEqual(2, self.recorder.events[0][1]['batch_size'])
+        # the items of bytes are not counted
+        self.assertIsNone(self.recorder.events[3][1]['batch_size'])
+
+    def test_throttled_event(self, mock):
+        mock.get('/v2/property/value', headers=self.headers, status_code=429,
+                 json={'code': 429, 'message': 'Too many requests'})
+        with self.assertRaises(housecanary.exceptions.RateLimitException):
+            self.client.property.value(('47 Perley Ave', '01960'))
+
+        self.assertEqual(self.recorder.names(), [hooks.REQUEST_START, hooks.RESPONSE_RECEIVED,
+                                                 hooks.THROTTLED, hooks.PARSE_DONE])
+        self.assertEqual(self.recorder.events[2][1]['rate_limit_reset'], '1491920221,1491920221')
+
+
+if __name__ == "__main__":
+    unittest.main()
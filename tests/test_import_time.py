@@ -0,0 +1,48 @@
+# pylint: disable=missing-docstring
+
+import json
+import subprocess
+import sys
+import unittest
+
+
+HEAVY_MODULES = ['openpyxl', 'slugify', 'docopt', 'housecanary.excel']
+
+
+def _modules_loaded_after(code):
+    script = code + '; import sys, json; print(json.dumps([m for m in {!r} if m in sys.modules]))'
+    output = subprocess.check_output([sys.executable, '-c', script.format(HEAVY_MODULES)])
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'lazy imports require module __getattr__')
+class ImportTimeTestCase(unittest.TestCase):
+    """Guards against import time regressions of the top level package."""
+
+    def test_import_does_not_load_excel_dependencies(self):
+        self.assertEqual(_modules_loaded_after('import housecanary'), [])
+
+    def test_api_client_import_does_not_load_excel_dependencies(self):
+        self.assertEqual(_modules_loaded_after('from housecanary import ApiClient'), [])
+
+    def test_excel_attributes_load_on_first_use(self):
+        loaded = _modules_loaded_after(
+            'import housecanary; housecanary.export_analytics_data_to_excel')
+        self.assertIn('openpyxl', loaded)
+        self.assertIn('housecanary.excel', loaded)
+
+    def test_lazy_attributes_are_listed(self):
+        import housecanary
+        for name in ('export_analytics_data_to_excel', 'export_analytics_data_to_csv',
+                     'concat_excel_reports', 'excel_utilities'):
+            self.assertIn(name, dir(housecanary))
+            self.assertIsNotNone(getattr(housecanary, name))
+
+    def test_unknown_attribute(self):
+        import housecanary
+        with self.assertRaises(AttributeError):
+            housecanary.does_not_exist  # pylint: disable=pointless-statement
+
+
+if __name__ == "__main__":
+    unittest.main()
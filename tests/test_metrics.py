@@ -0,0 +1,86 @@
+# pylint: disable=missing-docstring
+
+import socket
+import unittest
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.metrics import PrometheusExporter, StatsdExporter, batch_size_label
+
+
+class BatchSizeLabelTestCase(unittest.TestCase):
+    def test_batch_size_label(self):
+        self.assertEqual(batch_size_label(1), '1')
+        self.assertEqual(batch_size_label(10), '2-10')
+        self.assertEqual(batch_size_label(11), '11-100')
+        self.assertEqual(batch_size_label(1000), '101-1000')
+        self.assertEqual(batch_size_label(5000), '1000+')
+
+
+class PrometheusExporterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.headers = {'content-type': 'application/json', 'X-RateLimit-Limit': '5000',
+                        'X-RateLimit-Remaining': '4999', 'X-RateLimit-Period': '60',
+                        'X-RateLimit-Reset': '1491920221'}
+
+    def test_counters_and_histograms(self):
+        client = ApiClient()
+        exporter = client.hooks.add_listener(PrometheusExporter(buckets=(0.5, 60)))
+        with requests_mock.Mocker() as m:
+            m.get('/v2/property/value', headers=self.headers, json=[])
+            client.property.value(('47 Perley Ave', '01960'))
+            client.property.value(('85 Clay St', '02140'))
+
+        tags = (('endpoint', 'property/value'), ('batch_size', '1'))
+        self.assertEqual(exporter.get_counter('requests_total', tags), 2)
+        self.assertEqual(exporter.get_gauge('rate_limit_remaining'), 4999)
+
+        output = exporter.render()
+        self.assertIn('# TYPE housecanary_client_requests_total counter', output)
+        self.assertIn('housecanary_client_requests_total'
+                      '{endpoint="property/value",batch_size="1"} 2', output)
+        self.assertIn('housecanary_client_responses_total'
+                      '{endpoint="property/value",batch_size="1",status="200"} 2', output)
+        self.assertIn('# TYPE housecanary_client_request_duration_seconds histogram', output)
+        self.assertIn('housecanary_client_request_duration_seconds_bucket'
+                      '{endpoint="property/value",batch_size="1",le="60"} 2', output)
+        self.assertIn('housecanary_client_request_duration_seconds_count'
+                      '{endpoint="property/value",batch_size="1"} 2', output)
+        self.assertIn('housecanary_client_rate_limit_remaining 4999', output)
+
+    def test_observe_buckets(self):
+        exporter = PrometheusExporter(buckets=(1, 2))
+        exporter.observe('parse_time_seconds', 1.5, ())
+        output = exporter.render()
+        self.assertIn('housecanary_client_parse_time_seconds_bucket{le="1"} 0', output)
+        self.assertIn('housecanary_client_parse_time_seconds_bucket{le="2"} 1', output)
+        self.assertIn('housecanary_client_parse_time_seconds_bucket{le="+Inf"} 1', output)
+
+
+class StatsdExporterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.settimeout(2)
+        self.exporter = StatsdExporter(port=self.server.getsockname()[1])
+
+    def tearDown(self):
+        self.exporter.close()
+        self.server.close()
+
+    def _receive(self):
+        return self.server.recv(4096).decode('utf-8')
+
+    def test_increment(self):
+        self.exporter.on_request_start(endpoint='property/value', method='POST', batch_size=50)
+        self.assertEqual(self._receive(), 'housecanary_client.requests_total:1|c'
+                                          '|#endpoint:property/value,batch_size:11-100')
+
+    def test_timer_in_milliseconds(self):
+        self.exporter.on_parse_done(endpoint='zip/details', method='GET', batch_size=1,
+                                    parse_time=0.25)
+        self.assertEqual(self._receive(), 'housecanary_client.parse_time_ms:250.0|ms'
+                                          '|#endpoint:zip/details,batch_size:1')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+# pylint: disable=missing-docstring
+
+import threading
+import unittest
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.exceptions import DeadlineExceededException
+from housecanary.planner import MgetPlanner
+from housecanary.response import PropertyResponse
+from housecanary.output import JsonOutputGenerator
+
+
+def component_mget_callback(request, context):
+    components = request.qs['components'][0].split(',')
+    if request.method == 'GET':
+        identifiers = [{'address': request.qs['address'][0]}]
+    else:
+        identifiers = request.json()
+    context.headers['content-type'] = 'application/json'
+    return [dict([('address_info', {'address': identifier['address']})] +
+                 [(c, {'api_code': 0, 'api_code_description': 'ok', 'result': c})
+                  for c in components])
+            for identifier in identifiers]
+
+
+class MgetPlannerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.identifiers = [{'address': str(i), 'zipcode': '01960'} for i in range(25)]
+
+    def test_group_components_fits_budget(self):
+        planner = MgetPlanner(max_response_bytes=60000, min_identifiers_per_call=1)
+        groups = planner.group_components(
+            ['property/value', 'property/block_value_ts', 'property/msa_hpi_ts'])
+        self.assertEqual(len(groups), 2)
+        self.assertIn(['property/value', 'property/block_value_ts'], groups)
+
+    def test_group_components_keeps_requested_order(self):
+        planner = MgetPlanner()
+        groups = planner.group_components(['property/value', 'property/census'])
+        self.assertEqual(groups, [['property/value', 'property/census']])
+
+    def test_plan_covers_every_identifier_and_component(self):
+        planner = MgetPlanner(max_response_bytes=50000, min_identifiers_per_call=1)
+        components = ['property/value', 'property/block_value_ts', 'property/school']
+        calls = planner.plan(self.identifiers, components)
+        self.assertTrue(len(calls) > 1)
+        covered = set()
+        for call in calls:
+            for idx in range(len(call.identifiers)):
+                for component in call.components:
+                    covered.add((call.offset + idx, component))
+        self.assertEqual(len(covered), len(self.identifiers) * len(components))
+
+    def test_latency_budget_lowers_response_budget(self):
+        planner = MgetPlanner(latency_budget=1.25, base_latency=0.25, bytes_per_second=1000)
+        self.assertEqual(planner.response_budget, 1000)
+
+    def test_max_identifiers_per_call(self):
+        planner = MgetPlanner(max_identifiers_per_call=10)
+        calls = planner.plan(self.identifiers, ['property/value'])
+        self.assertEqual([len(call.identifiers) for call in calls], [10, 10, 5])
+
+    def test_execute_merges_results(self):
+        planner = MgetPlanner(max_response_bytes=50000, min_identifiers_per_call=1)
+        components = ['property/value', 'property/block_value_ts', 'property/school']
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.ANY, '/v2/property/component_mget',
+                           json=component_mget_callback)
+            response = ApiClient().property.component_mget(
+                self.identifiers, components, planner=planner)
+            self.assertTrue(m.call_count > 1)
+
+        self.assertTrue(isinstance(response, PropertyResponse))
+        self.assertEqual(response.endpoint_name, 'property/component_mget')
+        body = response.json()
+        self.assertEqual(len(body), len(self.identifiers))
+        for idx, item in enumerate(body):
+            self.assertEqual(item['address_info']['address'], str(idx))
+            for component in components:
+                self.assertEqual(item[component]['result'], component)
+
+    def test_execute_with_json_output_generator(self):
+        planner = MgetPlanner(max_identifiers_per_call=10)
+        with requests_mock.Mocker() as m:
+            m.register_uri(requests_mock.ANY, '/v2/property/component_mget',
+                           json=component_mget_callback)
+            client = ApiClient(output_generator=JsonOutputGenerator())
+            body = client.property.component_mget(
+                self.identifiers, ['property/value'], planner=planner)
+            self.assertEqual(m.call_count, 3)
+
+        self.assertEqual([item['address_info']['address'] for item in body],
+                         [str(i) for i in range(25)])
+
+    def test_execute_without_identifiers_or_components(self):
+        planner = MgetPlanner()
+        with requests_mock.Mocker() as m:
+            response = planner.execute(ApiClient(), 'property/component_mget', [],
+                                       ['property/value'])
+            self.assertEqual([], response.json())
+
+            client = ApiClient(output_generator=JsonOutputGenerator())
+            body = client.property.component_mget(self.identifiers[:2], [], planner=planner)
+            self.assertEqual([{}, {}], body)
+            self.assertEqual(0, m.call_count)
+
+    def test_execute_with_deadline(self):
+        planner = MgetPlanner(max_identifiers_per_call=10, deadline=0.5)
+        client = ApiClient(output_generator=JsonOutputGenerator())
+        release = threading.Event()
+        fetch = client.fetch
+
+        def slow_fetch(endpoint_name, identifier_input, *args):
+            # requests_mock sends one request at a time, so hang outside of it
+            if identifier_input[0]['address'] == '10':
+                release.wait(5)
+            return fetch(endpoint_name, identifier_input, *args)
+
+        client.fetch = slow_fetch
+        try:
+            with requests_mock.Mocker() as m:
+                m.register_uri(requests_mock.ANY, '/v2/property/component_mget',
+                               json=component_mget_callback)
+                with self.assertRaises(DeadlineExceededException) as context:
+                    client.property.component_mget(
+                        self.identifiers, ['property/value'], planner=planner)
+        finally:
+            release.set()
+
+        body = context.exception.partial_result
+        self.assertEqual(len(body), 25)
+        self.assertEqual([item['address_info']['address'] for item in body[:10]],
+                         [str(i) for i in range(10)])
+        self.assertEqual(body[10:20], [{}] * 10)
+        self.assertEqual(body[20]['address_info']['address'], '20')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+# pylint: disable=missing-docstring
+
+import socket
+import threading
+import time
+import unittest
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.cache import CacheEntry, ResponseCache
+from housecanary.output import JsonOutputGenerator
+from housecanary.redis_cache import RedisCacheBackend, encode_command, read_reply
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+
+def encode_reply(reply):
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":" + str(reply).encode("ascii") + b"\r\n"
+    if isinstance(reply, list):
+        return (b"*" + str(len(reply)).encode("ascii") + b"\r\n" +
+                b"".join(encode_reply(item) for item in reply))
+    if isinstance(reply, Exception):
+        return b"-" + str(reply).encode("utf-8") + b"\r\n"
+    return b"$" + str(len(reply)).encode("ascii") + b"\r\n" + reply + b"\r\n"
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """An in-process stand-in for a Redis server with the commands the cache uses."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        socketserver.ThreadingTCPServer.__init__(self, ("127.0.0.1", 0), FakeRedisHandler)
+        self.password = password
+        self.data = {}
+        self.expires = {}
+        self.commands = []
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.05,))
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def execute(self, command, authenticated):
+        name = command[0].upper()
+        args = command[1:]
+        self.commands.append(name)
+        if name == b"AUTH":
+            return b"OK" if args[0].decode() == self.password else Exception("ERR invalid password")
+        if self.password is not None and not authenticated:
+            return Exception("NOAUTH Authentication required.")
+        if name == b"PING":
+            return b"PONG"
+        if name == b"SELECT":
+            return b"OK"
+        if name == b"MGET":
+            return [self._get(key) for key in args]
+        if name == b"MSET":
+            for idx in range(0, len(args), 2):
+                self.data[args[idx]] = args[idx + 1]
+                self.expires.pop(args[idx], None)
+            return b"OK"
+        if name == b"PEXPIRE":
+            if args[0] not in self.data:
+                return 0
+            self.expires[args[0]] = time.time() + int(args[1]) / 1000.0
+            return 1
+        if name == b"DEL":
+            return sum(1 for key in args if self.data.pop(key, None) is not None)
+        return Exception("ERR unknown command")
+
+    def _get(self, key):
+        if key in self.expires and self.expires[key] <= time.time():
+            del self.data[key]
+            del self.expires[key]
+        return self.data.get(key)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        authenticated = False
+        while True:
+            try:
+                command = read_reply(self.rfile)
+            except Exception:  # pylint: disable=broad-except
+                return
+            with self.server.lock:
+                reply = self.server.execute(command, authenticated)
+            if command[0].upper() == b"AUTH" and reply == b"OK":
+                authenticated = True
+            if isinstance(reply, bytes) and reply in (b"OK", b"PONG"):
+                self.wfile.write(b"+" + reply + b"\r\n")
+            else:
+                self.wfile.write(encode_reply(reply))
+
+
+class RespTestCase(unittest.TestCase):
+    def test_encode_command(self):
+        self.assertEqual(b"*2\r\n$3\r\nGET\r\n$3\r\nkey\r\n", encode_command("GET", "key"))
+        self.assertEqual(b"*2\r\n$3\r\nSET\r\n$2\r\n\xc3\xa9\r\n", encode_command("SET", u"\xe9"))
+
+
+class RedisCacheBackendTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer()
+        self.backend = RedisCacheBackend(port=self.server.port)
+
+    def tearDown(self):
+        self.backend.close()
+        self.server.stop()
+
+    def test_get_and_set_many(self):
+        entries = {"zip/details:a": CacheEntry({"zipcode_info": {"zipcode": "a"}}, 100.5),
+                   "zip/details:b": CacheEntry([1, 2], 200.0)}
+        self.backend.set_many(entries)
+        self.assertEqual(entries, self.backend.get_many(["zip/details:a", "zip/details:b",
+                                                         "zip/details:c"]))
+        self.assertIn(b"hc:zip/details:a", self.server.data)
+        self.assertEqual([b"MSET", b"MGET"], self.server.commands)
+
+        self.backend.delete_many(["zip/details:a"])
+        self.assertEqual(["zip/details:b"], list(self.backend.get_many(["zip/details:a",
+                                                                        "zip/details:b"])))
+        self.assertEqual(0, self.backend.num_errors)
+
+    def test_invalid_entries_are_misses(self):
+        self.server.data[b"hc:a"] = b"not an entry"
+        self.assertEqual({}, self.backend.get_many(["a"]))
+        self.assertEqual(1, self.backend.num_errors)
+
+    def test_ttl(self):
+        self.backend.set_many({"a": CacheEntry(1, 0), "b": CacheEntry(2, 0)}, ttl=0.05)
+        self.assertEqual([b"MSET", b"PEXPIRE", b"PEXPIRE"], self.server.commands)
+        self.assertEqual(2, len(self.backend.get_many(["a", "b"])))
+        time.sleep(0.06)
+        self.assertEqual({}, self.backend.get_many(["a", "b"]))
+
+    def test_reuses_connections(self):
+        for _ in range(3):
+            self.backend.get_many(["a"])
+        self.assertEqual(1, len(self.backend._idle))  # pylint: disable=protected-access
+
+    def test_password(self):
+        server = FakeRedisServer(password="secret")
+        try:
+            backend = RedisCacheBackend(port=server.port, password="secret", db=1)
+            backend.set_many({"a": CacheEntry(1, 0)})
+            self.assertEqual({"a": CacheEntry(1, 0)}, backend.get_many(["a"]))
+            self.assertEqual(0, backend.num_errors)
+
+            unauthenticated = RedisCacheBackend(port=server.port)
+            self.assertEqual({}, unauthenticated.get_many(["a"]))
+            self.assertEqual(1, unauthenticated.num_errors)
+        finally:
+            server.stop()
+
+    def test_unavailable_server_is_a_miss(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        backend = RedisCacheBackend(port=port)
+        self.assertEqual({}, backend.get_many(["a"]))
+        backend.set_many({"a": CacheEntry(1, 0)})
+        self.assertEqual(2, backend.num_errors)
+
+
+class ApiClientRedisCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_clients_share_the_cache(self):
+        def echo(request, context):
+            return [{"zipcode_info": identifier} for identifier in request.json()]
+
+        clients = [ApiClient(output_generator=JsonOutputGenerator(),
+                             cache=ResponseCache(backend=RedisCacheBackend(port=self.server.port)))
+                   for _ in range(2)]
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/zip/details", json=echo, headers={"content-type": "application/json"})
+            first = clients[0].zip.details(["90274", "01960"])
+            second = clients[1].zip.details(["90274", "01960"])
+            self.assertEqual(1, mock.call_count)
+
+        self.assertEqual(first, second)
+        self.assertEqual([b"MGET", b"MSET", b"PEXPIRE", b"PEXPIRE", b"MGET"],
+                         self.server.commands)
+        self.assertIn(b'hc:zip/details:{"zipcode":"90274"}', self.server.data)
+
+    def test_entries_outlive_max_age(self):
+        cache = ResponseCache(ttl=60, backend=RedisCacheBackend(port=self.server.port))
+        cache.set_many({"a": 1})
+        # kept for stale_if_error, so they can be served while the circuit is open
+        self.assertGreater(self.server.expires[b"hc:a"], time.time() + 86000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+# pylint: disable=missing-docstring
+
+import hashlib
+import hmac
+import json
+import unittest
+import zlib
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.authentication import HCAuthV1
+from housecanary.dispatch import Deadline
+from housecanary.exceptions import DeadlineExceededException
+from housecanary.metrics import PrometheusExporter
+from housecanary.requestclient import RequestClient
+
+URL = "https://api.housecanary.com/v2/property/value"
+
+
+def make_post_data(count):
+    return [{"address": "{} Main St".format(idx), "zipcode": "01960"} for idx in range(count)]
+
+
+class RequestCompressionTestCase(unittest.TestCase):
+    def post(self, client, post_data):
+        with requests_mock.Mocker() as mock:
+            mock.post(URL, json={})
+            client.post(URL, post_data)
+            return mock.request_history[0]
+
+    def test_gzip_compression(self):
+        post_data = make_post_data(100)
+        request = self.post(RequestClient(compression="gzip"), post_data)
+
+        self.assertEqual("gzip", request.headers["Content-Encoding"])
+        self.assertEqual(post_data, json.loads(
+            zlib.decompress(request.body, 16 + zlib.MAX_WBITS).decode("utf-8")))
+
+    def test_deflate_compression(self):
+        post_data = make_post_data(100)
+        request = self.post(RequestClient(compression="deflate"), post_data)
+
+        self.assertEqual("deflate", request.headers["Content-Encoding"])
+        self.assertEqual(post_data, json.loads(zlib.decompress(request.body).decode("utf-8")))
+
+    def test_small_body_is_not_compressed(self):
+        post_data = make_post_data(1)
+        request = self.post(RequestClient(compression="gzip"), post_data)
+
+        self.assertNotIn("Content-Encoding", request.headers)
+        self.assertEqual(post_data, request.json())
+
+    def test_no_compression_by_default(self):
+        request = self.post(RequestClient(), make_post_data(100))
+
+        self.assertNotIn("Content-Encoding", request.headers)
+        self.assertIn("gzip", request.headers["Accept-Encoding"])
+
+    @patch.object(HCAuthV1, "_get_timestamp_utc", staticmethod(lambda: 1500000000))
+    def test_signature_covers_compressed_body(self):
+        client = RequestClient(authenticator=HCAuthV1("my_key", "my_secret"), compression="gzip")
+        request = self.post(client, make_post_data(100))
+
+        message = b"\n".join([b"POST", b"/v2/property/value",
+                              b"AuthKey=my_key&AuthProto=hc_hmac_v1&AuthTimestamp=1500000000",
+                              request.body])
+        self.assertEqual(hmac.new(b"my_secret", message, digestmod=hashlib.sha1).hexdigest(),
+                         request.headers["X-Auth-Signature"])
+
+    def test_invalid_compression(self):
+        self.assertRaises(ValueError, RequestClient, compression="lzma")
+
+    def test_bytes_saved_metric(self):
+        client = ApiClient(compression="gzip")
+        exporter = client.hooks.add_listener(PrometheusExporter())
+
+        with requests_mock.Mocker() as mock:
+            mock.post(URL, headers={"content-type": "application/json"}, json=[])
+            client.property.value(make_post_data(100))
+            sent_bytes = len(mock.request_history[0].body)
+
+        tags = (("endpoint", "property/value"), ("batch_size", "11-100"))
+        original_bytes = len(json.dumps(make_post_data(100), separators=(",", ":")))
+        self.assertEqual(sent_bytes, exporter.get_counter("request_bytes_total", tags))
+        self.assertEqual(original_bytes - sent_bytes,
+                         exporter.get_counter("request_bytes_saved_total",
+                                              tags + (("encoding", "gzip"),)))
+
+    def test_uncompressed_request_bytes_metric(self):
+        client = ApiClient()
+        exporter = client.hooks.add_listener(PrometheusExporter())
+
+        with requests_mock.Mocker() as mock:
+            mock.post(URL, headers={"content-type": "application/json"}, json=[])
+            client.property.value(make_post_data(100))
+            sent_bytes = len(mock.request_history[0].body)
+
+        tags = (("endpoint", "property/value"), ("batch_size", "11-100"))
+        self.assertEqual(sent_bytes, exporter.get_counter("request_bytes_total", tags))
+
+
+class RequestTimeoutTestCase(unittest.TestCase):
+    def get_timeout(self, client):
+        with requests_mock.Mocker() as mock:
+            mock.get(URL, json={}, headers={"content-type": "application/json"})
+            client.get(URL, {})
+            return mock.request_history[0].timeout
+
+    def test_default_timeout(self):
+        self.assertEqual((10.0, 300.0), self.get_timeout(RequestClient()))
+        self.assertEqual(5, self.get_timeout(RequestClient(timeout=5)))
+
+    def test_deadline_caps_timeout(self):
+        with Deadline(2).applied():
+            connect_timeout, read_timeout = self.get_timeout(RequestClient())
+        self.assertLessEqual(connect_timeout, 2)
+        self.assertLessEqual(read_timeout, 2)
+        with Deadline(2).applied():
+            self.assertLessEqual(self.get_timeout(RequestClient(timeout=None)), 2)
+
+    def test_expired_deadline(self):
+        with requests_mock.Mocker() as mock:
+            mock.get(URL, json={})
+            with Deadline(0).applied():
+                self.assertRaises(DeadlineExceededException, RequestClient().get, URL, {})
+            self.assertEqual(0, mock.call_count)
+
+    def test_api_client_timeout(self):
+        client = ApiClient(timeout=(1, 2))
+        self.assertEqual((1, 2), self.get_timeout(client._request_client))
+
+
+if __name__ == "__main__":
+    unittest.main()
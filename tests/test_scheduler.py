@@ -0,0 +1,135 @@
+# pylint: disable=missing-docstring
+
+import threading
+import time
+import unittest
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.output import JsonOutputGenerator
+from housecanary.scheduler import PriorityScheduler, PriorityClass, BULK, INTERACTIVE
+
+
+def start_thread(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+
+
+class PrioritySchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.order = []
+
+    def acquire(self, scheduler, name):
+        scheduler.acquire(name)
+        self.order.append(name)
+
+    def test_higher_priority_skips_ahead(self):
+        scheduler = PriorityScheduler(max_in_flight=1, classes=[PriorityClass(INTERACTIVE, 0),
+                                                                PriorityClass(BULK, 0)])
+        scheduler.acquire(BULK)
+
+        start_thread(self.acquire, scheduler, BULK)
+        wait_for(lambda: len(scheduler._waiting) == 1)
+        start_thread(self.acquire, scheduler, INTERACTIVE)
+        wait_for(lambda: len(scheduler._waiting) == 2)
+
+        scheduler.release()
+        wait_for(lambda: self.order)
+        self.assertEqual([INTERACTIVE], self.order)
+
+        scheduler.release()
+        wait_for(lambda: len(self.order) == 2)
+        self.assertEqual([INTERACTIVE, BULK], self.order)
+
+    def test_reserved_slots(self):
+        scheduler = PriorityScheduler(max_in_flight=5)
+        for _ in range(4):
+            scheduler.acquire(BULK)
+
+        start_thread(self.acquire, scheduler, BULK)
+        wait_for(lambda: len(scheduler._waiting) == 1)
+        self.assertEqual([], self.order)
+
+        scheduler.acquire(INTERACTIVE)
+        self.assertEqual(5, scheduler.in_flight)
+
+        scheduler.release()
+        scheduler.release()
+        wait_for(lambda: self.order)
+        self.assertEqual([BULK], self.order)
+
+    def test_unreserved_slots(self):
+        scheduler = PriorityScheduler(max_in_flight=5, reserve_slots=False)
+        for _ in range(5):
+            scheduler.acquire(BULK)
+        self.assertEqual(5, scheduler.in_flight)
+
+    def test_reserved_rate_limit(self):
+        scheduler = PriorityScheduler()
+        scheduler.on_response_received(rate_limit_remaining=10, rate_limit_limit=100,
+                                       rate_limit_reset=time.time() + 0.2)
+
+        start = time.time()
+        with scheduler.slot(INTERACTIVE):
+            self.assertLess(time.time() - start, 0.1)
+        with scheduler.slot(BULK):
+            self.assertGreaterEqual(time.time() - start, 0.15)
+
+        scheduler.on_response_received(rate_limit_remaining=50, rate_limit_limit=100,
+                                       rate_limit_reset=time.time() + 60)
+        start = time.time()
+        with scheduler.slot(BULK):
+            self.assertLess(time.time() - start, 0.1)
+
+    def test_priority_context(self):
+        scheduler = PriorityScheduler()
+        self.assertEqual(INTERACTIVE, scheduler.current_priority())
+        with scheduler.priority(BULK):
+            self.assertEqual(BULK, scheduler.current_priority())
+            self.assertEqual(INTERACTIVE, scheduler.current_priority(INTERACTIVE))
+        self.assertEqual(INTERACTIVE, scheduler.current_priority())
+
+    def test_invalid_classes(self):
+        self.assertRaises(ValueError, PriorityScheduler,
+                          classes=[PriorityClass("a", 0.5), PriorityClass("b", 0.5)])
+        scheduler = PriorityScheduler()
+        self.assertRaises(ValueError, scheduler.acquire, "unknown")
+        self.assertEqual([], scheduler._waiting)
+
+
+class ApiClientSchedulerTestCase(unittest.TestCase):
+    def test_fetch_with_scheduler(self):
+        scheduler = PriorityScheduler(max_in_flight=2)
+        client = ApiClient(output_generator=JsonOutputGenerator(), scheduler=scheduler)
+        acquired = []
+        acquire = scheduler.acquire
+        scheduler.acquire = lambda name=None: acquired.append(name) or acquire(name)
+
+        headers = {"content-type": "application/json", "X-RateLimit-Limit": "100",
+                   "X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "1491920221"}
+
+        def echo(request, context):
+            return [{"zipcode_info": identifier} for identifier in request.json()]
+
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/zip/details", json=echo, headers=headers)
+            client.zip.details(["01960", "02140"])
+            with scheduler.priority(BULK):
+                results = list(client.iter_fetch("zip/details", ["01960", "02140", "02141",
+                                                                 "02142"], batch_size=2))
+
+        self.assertEqual(4, len(results))
+        self.assertEqual([None, BULK, BULK], acquired)
+        self.assertEqual(0, scheduler.in_flight)
+        self.assertEqual(10, scheduler._rate_limit_remaining)
+
+
+if __name__ == "__main__":
+    unittest.main()
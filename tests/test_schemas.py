@@ -0,0 +1,107 @@
+# pylint: disable=missing-docstring
+
+import datetime
+import unittest
+import openpyxl
+from housecanary import schemas
+from housecanary.excel import analytics_data_excel
+
+
+class ResultSchemaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.schema = schemas.ResultSchema("test/endpoint", [
+            ("price", schemas.NUMBER),
+            ("count", schemas.INTEGER),
+            ("month", schemas.DATE),
+            ("is_active", schemas.BOOLEAN),
+            ("name", schemas.STRING),
+        ])
+
+    def test_get_columns(self):
+        self.assertEqual(["address", "zipcode", "meta", "price", "count", "month",
+                          "is_active", "name"],
+                         self.schema.get_columns(["meta", "zipcode", "address"]))
+
+    def test_get_columns_skips_query_param_keys(self):
+        self.assertEqual(["block_id", "price", "count", "month", "is_active", "name"],
+                         self.schema.get_columns(["block_id", "num_bins"]))
+
+    def test_convert_value(self):
+        self.assertEqual(1500, self.schema.convert_value("price", "1500"))
+        self.assertEqual(1500.5, self.schema.convert_value("price", "1500.5"))
+        self.assertEqual(3, self.schema.convert_value("count", 3.0))
+        self.assertEqual(datetime.date(2017, 1, 31),
+                         self.schema.convert_value("month", "2017-01-31"))
+        self.assertTrue(self.schema.convert_value("is_active", "true"))
+        self.assertEqual("01960", self.schema.convert_value("name", "01960"))
+        self.assertIsNone(self.schema.convert_value("price", None))
+
+    def test_convert_value_keeps_unconvertible_values(self):
+        self.assertEqual("n/a", self.schema.convert_value("price", "n/a"))
+        self.assertEqual("soon", self.schema.convert_value("month", "soon"))
+
+    def test_convert_value_serializes_nested_values_of_unknown_keys(self):
+        self.assertEqual('{"a": 1}', self.schema.convert_value("other", {"a": 1}))
+        self.assertEqual("01960", self.schema.convert_value("zipcode", "01960"))
+
+    def test_convert_row(self):
+        self.assertEqual([None, 2, datetime.date(2017, 1, 1)],
+                         self.schema.convert_row({"count": "2", "month": "2017-01-01"},
+                                                 ["price", "count", "month"]))
+
+
+class RegistryTestCase(unittest.TestCase):
+    def test_get_schema(self):
+        schema = schemas.get_schema("property/value")
+        self.assertEqual(["price_upr", "price_lwr", "price_mean", "fsd"],
+                         [field.name for field in schema.fields])
+        self.assertIsNone(schemas.get_schema("property/unknown"))
+
+    def test_time_series_months_are_dates(self):
+        schema = schemas.get_schema("zip/hpi_ts")
+        self.assertEqual(["zipcode", "month"], schema.get_columns(["zipcode"]))
+        self.assertEqual(datetime.date(2017, 1, 1), schema.convert_value("month", "2017-01-01"))
+
+    def test_register_schema(self):
+        schema = schemas.register_schema(schemas.ResultSchema("test/registered", []))
+        self.addCleanup(schemas._SCHEMAS.pop, "test/registered")
+        self.assertIs(schema, schemas.get_schema("test/registered"))
+
+
+class WriteDataTestCase(unittest.TestCase):
+    def test_write_data_with_schema(self):
+        worksheet = openpyxl.Workbook().active
+        rows = [{"address": "47 Perley Ave", "zipcode": "01960",
+                 "price_mean": "1000", "extra": {"a": 1}},
+                {"address": "85 Clay St", "zipcode": "02140", "price_upr": 1100}]
+
+        analytics_data_excel.write_data(worksheet, rows, schemas.get_schema("property/value"),
+                                        ["address", "zipcode"])
+
+        values = [[cell.value for cell in row] for row in worksheet.rows]
+        # schema columns that no row has are not written
+        self.assertEqual(["Address", "Zipcode", "Price Upr", "Price Mean", "Extra"], values[0])
+        self.assertEqual(["47 Perley Ave", "01960", "", 1000, '{"a": 1}'], values[1])
+        self.assertEqual(["85 Clay St", "02140", 1100, "", ""], values[2])
+
+    def test_write_data_with_dates(self):
+        worksheet = openpyxl.Workbook().active
+        rows = [{"zipcode": "01960", "month": "2017-01-01", "hpi_value": 1.5}]
+
+        analytics_data_excel.write_data(worksheet, rows, schemas.get_schema("zip/hpi_ts"),
+                                        ["zipcode"])
+
+        values = [[cell.value for cell in row] for row in worksheet.rows]
+        self.assertEqual(["Zipcode", "Month", "Hpi Value"], values[0])
+        self.assertEqual(datetime.date(2017, 1, 1), values[1][1].date())
+
+    def test_write_data_without_schema(self):
+        worksheet = openpyxl.Workbook().active
+        analytics_data_excel.write_data(worksheet, [{"zipcode": "01960", "b": 1, "a": 2}])
+
+        values = [[cell.value for cell in row] for row in worksheet.rows]
+        self.assertEqual([["Zipcode", "A", "B"], ["01960", 2, 1]], values)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# pylint: disable=missing-docstring
+
+import struct
+import unittest
+from housecanary.cache import CacheEntry
+from housecanary.exceptions import CacheBackendException
+from housecanary.serialization import (EntryCodec, SCHEMA_VERSION, _import_msgpack,
+                                       _import_zstandard)
+
+ENTRY = CacheEntry([{"address_info": {"address": u"43 Valmonte Plz \xe9", "zipcode": "90274"},
+                     "property/value": {"api_code": 0,
+                                        "result": {"value": {"price_mean": 100,
+                                                             "fsd": 0.12}}}}] * 10,
+                   1500000000.25)
+
+
+class EntryCodecTestCase(unittest.TestCase):
+    def test_json(self):
+        codec = EntryCodec("json")
+        data = codec.encode(ENTRY)
+        self.assertEqual(SCHEMA_VERSION, bytearray(data)[0])
+        self.assertEqual(ENTRY, codec.decode(data))
+
+    def test_zlib(self):
+        data = EntryCodec("json", "zlib").encode(ENTRY)
+        self.assertLess(len(data), len(EntryCodec("json").encode(ENTRY)))
+        # any codec reads any entry
+        self.assertEqual(ENTRY, EntryCodec("json").decode(data))
+
+    def test_small_entries_are_not_compressed(self):
+        entry = CacheEntry({"zipcode_info": {}}, 0)
+        self.assertEqual(EntryCodec("json").encode(entry),
+                         EntryCodec("json", "zlib").encode(entry))
+
+    def test_other_schema_version_is_invalid(self):
+        data = bytearray(EntryCodec("json").encode(ENTRY))
+        data[0] = SCHEMA_VERSION + 1
+        self.assertRaises(CacheBackendException, EntryCodec.decode, bytes(data))
+
+    def test_corrupt_entries_are_invalid(self):
+        data = EntryCodec("json", "zlib").encode(ENTRY)
+        self.assertRaises(CacheBackendException, EntryCodec.decode, data[:-10])
+        self.assertRaises(CacheBackendException, EntryCodec.decode, b"\x01")
+
+    def test_unknown_format(self):
+        self.assertRaises(ValueError, EntryCodec, "pickle")
+        self.assertRaises(ValueError, EntryCodec, "json", "gzip")
+        data = struct.pack("!BBBd", SCHEMA_VERSION, 9, 0, 0) + b"{}"
+        self.assertRaises(CacheBackendException, EntryCodec.decode, data)
+
+    @unittest.skipIf(_import_msgpack() is not None, "msgpack is installed")
+    def test_msgpack_not_installed(self):
+        self.assertEqual("json", EntryCodec().format)
+        self.assertRaises(ValueError, EntryCodec, "msgpack")
+        data = struct.pack("!BBBd", SCHEMA_VERSION, 1, 0, 0) + b"\x80"
+        self.assertRaises(CacheBackendException, EntryCodec.decode, data)
+
+    @unittest.skipIf(_import_msgpack() is None, "msgpack is not installed")
+    def test_msgpack(self):
+        codec = EntryCodec()
+        self.assertEqual("msgpack", codec.format)
+        data = codec.encode(ENTRY)
+        self.assertLess(len(data), len(EntryCodec("json").encode(ENTRY)))
+        self.assertEqual(ENTRY, codec.decode(data))
+
+    @unittest.skipIf(_import_zstandard() is None, "zstandard is not installed")
+    def test_zstd(self):
+        data = EntryCodec("json", "zstd").encode(ENTRY)
+        self.assertLess(len(data), len(EntryCodec("json").encode(ENTRY)))
+        self.assertEqual(ENTRY, EntryCodec.decode(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+# pylint: disable=missing-docstring
+
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.exceptions import ResultStoreException
+from housecanary.object import ZipCode
+from housecanary.store import ResultStore
+
+
+def zip_record(zipcode, value=1):
+    return {"zipcode_info": {"zipcode": zipcode},
+            "zip/details": {"api_code": 0, "api_code_description": "ok",
+                            "result": {"value": value}}}
+
+
+class ResultStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "results.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_and_get(self):
+        with ResultStore(self.path) as store:
+            store.write("zip/details", "01960", zip_record("01960"))
+            store.write("property/value", {"address": "47 Perley Ave", "zipcode": "01960"},
+                        {"price": 1})
+
+            self.assertEqual(zip_record("01960"), store.get("zip/details", "01960"))
+            self.assertEqual({"price": 1}, store.get(
+                "property/value", {"zipcode": "01960", "address": "47 Perley Ave"}))
+            self.assertIsNone(store.get("zip/details", "02140"))
+            self.assertIn(("zip/details", "01960"), store)
+            self.assertNotIn(("zip/value", "01960"), store)
+            self.assertEqual(2, len(store))
+
+            # reads see records written after the file was mapped
+            store.write("zip/details", "02140", zip_record("02140"))
+            self.assertEqual(zip_record("02140"), store.get("zip/details", "02140"))
+
+    def test_reopen(self):
+        with ResultStore(self.path) as store:
+            store.write("zip/details", "01960", zip_record("01960"))
+            store.write("zip/details", "01960", zip_record("01960", value=2))
+
+        with ResultStore(self.path, readonly=True) as store:
+            self.assertEqual(1, len(store))
+            self.assertEqual(2, store.get("zip/details", "01960")["zip/details"]["result"]["value"])
+            self.assertRaises(ValueError, store.write, "zip/details", "02140", {})
+
+        # the data file is plain json lines
+        with open(self.path) as data_file:
+            self.assertEqual(2, len(data_file.readlines()))
+
+    def test_drops_interrupted_write(self):
+        with ResultStore(self.path) as store:
+            store.write("zip/details", "01960", zip_record("01960"))
+        with open(self.path, "ab") as data_file:
+            data_file.write(b'{"partial"')
+        with open(self.path + ".idx", "ab") as index_file:
+            index_file.write(b'[100,"zip')
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            with ResultStore(self.path) as store:
+                store.write("zip/details", "02140", zip_record("02140"))
+                self.assertEqual(zip_record("01960"), store.get("zip/details", "01960"))
+                self.assertEqual(zip_record("02140"), store.get("zip/details", "02140"))
+        self.assertEqual(1, len(caught))
+        self.assertIn("Dropping 10 bytes", str(caught[0].message))
+
+        # the partial index line was dropped rather than appended to
+        with ResultStore(self.path) as store:
+            self.assertEqual(2, len(store))
+            self.assertEqual(zip_record("02140"), store.get("zip/details", "02140"))
+
+    def test_missing_index(self):
+        with ResultStore(self.path) as store:
+            store.write("zip/details", "01960", zip_record("01960"))
+        os.remove(self.path + ".idx")
+
+        self.assertRaises(ResultStoreException, ResultStore, self.path)
+        self.assertRaises(ResultStoreException, ResultStore, self.path, readonly=True)
+        # the records were kept
+        self.assertGreater(os.path.getsize(self.path), 0)
+
+    def test_index_lines_follow_synced_records(self):
+        store = ResultStore(self.path)
+        try:
+            store.write("zip/details", "01960", zip_record("01960"))
+            self.assertEqual(0, os.path.getsize(self.path + ".idx"))
+            store.flush()
+            self.assertGreater(os.path.getsize(self.path), 0)
+            self.assertGreater(os.path.getsize(self.path + ".idx"), 0)
+        finally:
+            store.close()
+
+    def test_single_key_identifiers(self):
+        with ResultStore(self.path) as store:
+            store.write("property/value", {"slug": "43-Valmonte-Plz"}, {"price": 1})
+            self.assertEqual({"price": 1}, store.get("property/value", {"slug": "43-Valmonte-Plz"}))
+            self.assertEqual({"price": 1}, store.get("property/value", "43-Valmonte-Plz"))
+
+    def test_iter_records_and_objects(self):
+        with ResultStore(self.path) as store:
+            for zipcode in ("01960", "02140", "01960"):
+                store.write("zip/details", zipcode, zip_record(zipcode))
+            store.write("property/value", "slug", {})
+
+            self.assertEqual(["02140", "01960"],
+                             [key for key, _ in store.iter_records("zip/details")])
+
+            objects = list(store.iter_objects("zip/details"))
+            self.assertIsInstance(objects[0], ZipCode)
+            self.assertEqual("02140", objects[0].zipcode)
+
+            response = store.get_response("zip/details", ["01960", "00000"])
+            self.assertEqual(["01960"], [obj.zipcode for obj in response.objects()])
+
+            self.assertEqual([("property/value", "slug")], store.keys("property/value"))
+
+
+class FetchToStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.client = ApiClient()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fetch_to_store(self):
+        def echo(request, context):
+            if request.method == "POST":
+                return [zip_record(identifier["zipcode"]) for identifier in request.json()]
+            return [zip_record(request.qs["zipcode"][0])]
+
+        zipcodes = ["{:05d}".format(idx) for idx in range(7)]
+
+        with ResultStore(os.path.join(self.directory, "results.jsonl")) as store:
+            with requests_mock.Mocker() as mock:
+                mock.register_uri(requests_mock.ANY, "/v2/zip/details", json=echo,
+                                  headers={"content-type": "application/json"})
+                num_written = self.client.fetch_to_store("zip/details", iter(zipcodes), store,
+                                                         batch_size=3)
+
+            self.assertEqual(7, num_written)
+            self.assertEqual(zip_record("00005"), store.get("zip/details", "00005"))
+            self.assertEqual(zip_record("00005"),
+                             store.get("zip/details", {"zipcode": "00005"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
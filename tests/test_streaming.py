@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+
+import json
+import unittest
+import requests_mock
+from housecanary.apiclient import ApiClient
+from housecanary.object import Block, Property
+from housecanary.output import StreamingOutputGenerator
+from housecanary.streaming import iter_json_array
+import housecanary.exceptions
+
+
+def split(data, size):
+    return [data[idx:idx + size] for idx in range(0, len(data), size)]
+
+
+BODY = [
+    {"address_info": {"address": u"43 Valmonte Plz", "city": u"Málaga"}, "meta": None},
+    12345678,
+    [1.5e10, -2, True, False, None],
+    u"a string with \"quotes\", commas and brackets ] [ and ünicode",
+    {"nested": {"list": [{}, []]}},
+]
+
+
+class IterJsonArrayTestCase(unittest.TestCase):
+    def test_chunk_boundaries(self):
+        data = json.dumps(BODY, ensure_ascii=False, indent=2).encode("utf-8")
+        for size in (1, 2, 3, 7, 64, len(data)):
+            self.assertEqual(BODY, list(iter_json_array(split(data, size))), size)
+
+    def test_numbers_split_across_chunks(self):
+        self.assertEqual([1.5], list(iter_json_array([b'[1.', b'5]'])))
+        self.assertEqual([1e5], list(iter_json_array([b'[1e', b'5]'])))
+        self.assertEqual([1.5e+2], list(iter_json_array([b'[1.5E+', b'2]'])))
+        self.assertEqual([-2.5e-3], list(iter_json_array([b'[-2.5e-', b'3]'])))
+
+        data = b'[1.25, -3e2, 4.5E+10, 6.75e-3]'
+        for size in range(1, len(data) + 1):
+            self.assertEqual([1.25, -300.0, 4.5e10, 0.00675],
+                             list(iter_json_array(split(data, size))), size)
+
+    def test_incomplete_number(self):
+        self.assertRaises(ValueError, list, iter_json_array([b'[1.', b']']))
+        self.assertRaises(ValueError, list, iter_json_array([b'[1e', b'+]']))
+
+    def test_compact_body(self):
+        data = json.dumps(BODY, separators=(",", ":")).encode("utf-8")
+        self.assertEqual(BODY, list(iter_json_array(split(data, 5))))
+
+    def test_empty_array(self):
+        self.assertEqual([], list(iter_json_array([b" [ ", b" ] "])))
+
+    def test_items_are_yielded_before_the_end(self):
+        def chunks():
+            yield b'[{"a": 1}, '
+            raise AssertionError("read too far")
+
+        self.assertEqual({"a": 1}, next(iter_json_array(chunks())))
+
+    def test_not_an_array(self):
+        self.assertRaises(ValueError, list, iter_json_array([b'{"code": 403}']))
+
+    def test_truncated_array(self):
+        self.assertRaises(ValueError, list, iter_json_array([b'[{"a": 1}, {"b"']))
+        self.assertRaises(ValueError, list, iter_json_array([b'[{"a": 1}, 12']))
+        self.assertRaises(ValueError, list, iter_json_array([b'[{"a": 1}']))
+
+    def test_invalid_delimiter(self):
+        self.assertRaises(ValueError, list, iter_json_array([b'[{"a": 1} {"b": 2}]']))
+
+
+class StreamingOutputGeneratorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.headers = {"content-type": "application/json"}
+        self.property_json = {
+            "address_info": {
+                "city": "Palos Verdes Estates", "county_fips": "06037",
+                "geo_precision": "rooftop", "block_id": "060376703241005",
+                "zipcode": "90274", "address_full": "43 Valmonte Plz Palos Verdes Estates CA 90274",
+                "state": "CA", "zipcode_plus4": "1444", "address": "43 Valmonte Plz",
+                "lat": 33.79814, "lng": -118.36455,
+                "slug": "43-Valmonte-Plz-Palos-Verdes-Estates-CA-90274", "unit": None
+            },
+            "property/value": {"api_code_description": "ok", "api_code": 0,
+                               "result": {"value": {"price_mean": 1000}}}
+        }
+
+    def test_yields_objects(self):
+        client = ApiClient(output_generator=StreamingOutputGenerator(chunk_size=16))
+        with requests_mock.Mocker() as mock:
+            mock.post("/v2/property/value", headers=self.headers,
+                      json=[self.property_json, self.property_json])
+            response = client.property.value([("43 Valmonte Plz", "90274"),
+                                              ("43 Valmonte Plz", "90274")])
+            properties = list(response)
+
+        self.assertEqual("property/value", response.endpoint_name)
+        self.assertEqual(2, len(properties))
+        self.assertIsInstance(properties[0], Property)
+        self.assertEqual("43 Valmonte Plz", properties[0].address)
+        self.assertEqual(1000, properties[0].component_results[0].json_data["value"]["price_mean"])
+
+    def test_yields_dicts(self):
+        client = ApiClient(output_generator=StreamingOutputGenerator(objects=False))
+        with requests_mock.Mocker() as mock:
+            mock.get("/v2/property/value", headers=self.headers, json=[self.property_json])
+            response = client.property.value(("43 Valmonte Plz", "90274"))
+
+            self.assertEqual([self.property_json], list(response))
+
+    def test_no_parse_time(self):
+        client = ApiClient(output_generator=StreamingOutputGenerator())
+        events = []
+        client.hooks.register("response_received", lambda **event: events.append("response"))
+        client.hooks.register("parse_done", lambda **event: events.append("parse"))
+        with requests_mock.Mocker() as mock:
+            mock.get("/v2/property/value", headers=self.headers, json=[self.property_json])
+            list(client.property.value(("43 Valmonte Plz", "90274")))
+
+        self.assertEqual(["response"], events)
+
+    def test_block_objects(self):
+        client = ApiClient(output_generator=StreamingOutputGenerator())
+        with requests_mock.Mocker() as mock:
+            mock.get("/v2/block/value_ts", headers=self.headers,
+                     json=[{"block_info": {"block_id": "060376703241005"}}])
+            blocks = list(client.block.value_ts("060376703241005"))
+
+        self.assertIsInstance(blocks[0], Block)
+        self.assertEqual("060376703241005", blocks[0].block_id)
+
+    def test_error_response_raises(self):
+        client = ApiClient(output_generator=StreamingOutputGenerator())
+        with requests_mock.Mocker() as mock:
+            mock.get("/v2/property/value", headers=self.headers,
+                     json={"code": 403, "code_description": "Forbidden"})
+            self.assertRaises(housecanary.exceptions.UnauthorizedException,
+                              client.property.value, ("43 Valmonte Plz", "90274"))
+
+    def test_report_response(self):
+        client = ApiClient(output_generator=StreamingOutputGenerator())
+        with requests_mock.Mocker() as mock:
+            mock.get("/v2/property/value_report", headers=self.headers, json={"report": {}})
+            response = client.property.value_report("43 Valmonte Plz", "90274")
+
+            self.assertEqual([{"report": {}}], list(response))
+
+
+if __name__ == "__main__":
+    unittest.main()
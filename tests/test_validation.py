@@ -0,0 +1,87 @@
+# pylint: disable=missing-docstring
+
+import unittest
+from housecanary.apiclient import ApiClient
+import housecanary.exceptions
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+class ConvertIdentifierColumnsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.client = ApiClient()
+
+    def test_valid_columns(self):
+        identifiers, report = self.client.property.convert_identifier_columns({
+            "address": ["47 Perley Ave", "85 Clay St"],
+            "zipcode": ["01960", "02140"],
+            "unit": [None, "2"],
+        })
+
+        self.assertEqual([{"address": "47 Perley Ave", "zipcode": "01960"},
+                          {"address": "85 Clay St", "zipcode": "02140", "unit": "2"}],
+                         identifiers)
+        self.assertTrue(report.is_valid())
+        self.assertEqual([0, 1], report.valid_rows)
+        report.raise_for_errors()
+
+    def test_rows_missing_required_keys(self):
+        identifiers, report = self.client.property.convert_identifier_columns({
+            "address": ["47 Perley Ave", None, float("nan"), None],
+            "slug": [None, "85-Clay-St-Cambridge-MA-02140", None, None],
+        })
+
+        self.assertEqual([{"address": "47 Perley Ave"},
+                          {"slug": "85-Clay-St-Cambridge-MA-02140"}], identifiers)
+        self.assertEqual([0, 1], report.valid_rows)
+        self.assertEqual([(2, "Missing address or slug"), (3, "Missing address or slug")],
+                         report.errors)
+        self.assertEqual(2, report.num_invalid)
+        self.assertIn("2 of 4 address rows are invalid.", str(report))
+        self.assertIn("Row 3: Missing address or slug", str(report))
+        self.assertRaises(housecanary.exceptions.InvalidInputException, report.raise_for_errors)
+
+    def test_unknown_columns(self):
+        identifiers, report = self.client.zip.convert_identifier_columns({
+            "zipcode": ["90274", "01960"], "county": ["Los Angeles", "Essex"]})
+
+        self.assertEqual([], identifiers)
+        self.assertEqual(["county"], report.unknown_keys)
+        self.assertEqual(2, report.num_invalid)
+        self.assertIn("Keys in zip input not allowed: county", str(report))
+
+    def test_missing_required_column(self):
+        identifiers, report = self.client.block.convert_identifier_columns({"meta": ["a", "b"]})
+
+        self.assertEqual([], identifiers)
+        self.assertEqual([(0, "Missing block_id"), (1, "Missing block_id")], report.errors)
+
+    def test_summary_is_truncated(self):
+        _, report = self.client.msa.convert_identifier_columns({"msa": [None] * 25})
+
+        self.assertIn("... and 15 more", str(report))
+
+    def test_unequal_columns(self):
+        self.assertRaises(housecanary.exceptions.InvalidInputException,
+                          self.client.zip.convert_identifier_columns,
+                          {"zipcode": ["90274", "01960"], "meta": ["a"]})
+
+    def test_invalid_input(self):
+        self.assertRaises(housecanary.exceptions.InvalidInputException,
+                          self.client.zip.convert_identifier_columns, ["90274"])
+
+    @unittest.skipIf(pandas is None, "pandas is not installed")
+    def test_dataframe(self):
+        frame = pandas.DataFrame({"address": ["47 Perley Ave", None],
+                                  "zipcode": ["01960", "02140"]})
+        identifiers, report = self.client.property.convert_identifier_columns(frame)
+
+        self.assertEqual([{"address": "47 Perley Ave", "zipcode": "01960"}], identifiers)
+        self.assertEqual([(1, "Missing address or slug")], report.errors)
+
+
+if __name__ == "__main__":
+    unittest.main()